@@ -0,0 +1,79 @@
+# bench_checks.py
+#
+# Throughput of checks_engine over synthetic source/target CSVs of increasing size.
+#
+#   python benchmarks/bench_checks.py --rows 100000 1000000 5000000
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import checks_engine  # noqa: E402
+
+RULESET = {"rules": [
+    {"check": "not_null", "field": "customer_id"},
+    {"check": "type", "field": "amount", "type": "number"},
+    {"check": "range", "field": "age", "min": 0, "max": 120},
+    {"check": "unique", "field": "email"},
+    {"check": "referential", "field": "customer_id"},
+    {"check": "format", "field": "phone_number", "pattern": r"^\d{3}-\d{3}-\d{4}$"},
+    {"check": "date_format", "field": "order_date", "format": "%Y-%m-%d"},
+    {"check": "duplicate_records"},
+    {"check": "completeness", "field": "address", "min_ratio": 0.99},
+]}
+
+
+def write_synthetic_csv(path: str, rows: int, seed: int, chunk: int = 500_000):
+    """Writes a CSV with ~1% dirty values per column, generated in vectorized chunks."""
+    rng = np.random.default_rng(seed)
+    with open(path, "w") as f:
+        f.write("customer_id,amount,age,email,phone_number,order_date,address\n")
+        for start in range(0, rows, chunk):
+            n = min(chunk, rows - start)
+            ids = np.arange(start, start + n)
+            dirty = rng.random(n) < 0.01
+            amount = np.where(dirty, "abc", np.round(rng.random(n) * 1000, 2).astype(str))
+            age = np.where(dirty, "150", rng.integers(1, 100, n).astype(str))
+            email = np.char.add(np.char.add("user", ids.astype(str)), "@example.com")
+            phone = np.where(dirty, "123-ABC-4567", "555-123-4567")
+            day = np.where(dirty, "2023/13/01", "2023-01-15")
+            address = np.where(dirty, "", "123 Main St")
+            customer = np.where(dirty, "", ids.astype(str))
+            lines = np.char.add(customer, ",")
+            for col in (amount, age, email, phone, day):
+                lines = np.char.add(np.char.add(lines, col), ",")
+            lines = np.char.add(lines, address)
+            f.write("\n".join(lines.tolist()))
+            f.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="checks_engine throughput benchmark")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000, 5_000_000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'rows':>12} {'size MB':>9} {'seconds':>9} {'rows/s':>14}")
+        for rows in args.rows:
+            source = os.path.join(tmp, f"source_{rows}.csv")
+            target = os.path.join(tmp, f"target_{rows}.csv")
+            write_synthetic_csv(source, rows, seed=1)
+            write_synthetic_csv(target, rows, seed=2)
+
+            start = time.perf_counter()
+            result = checks_engine.run_checks(
+                checks_engine.local_opener(source), checks_engine.local_opener(target), RULESET
+            )
+            elapsed = time.perf_counter() - start
+            size_mb = os.path.getsize(source) / 1024 ** 2
+            print(f"{result.rows:>12,} {size_mb:>9.1f} {elapsed:>9.2f} {result.rows / elapsed:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# bench_columnar.py
+#
+# Repeated validation runs (checks + profile) over the same upload, parsing the CSV every
+# time vs. converting it once to Arrow and memory-mapping the cached copy.
+#
+#   python benchmarks/bench_columnar.py --rows 1000000 --runs 5
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import checks_engine  # noqa: E402
+import profiler  # noqa: E402
+from bench_checks import RULESET, write_synthetic_csv  # noqa: E402
+from columnar import ColumnarCache  # noqa: E402
+
+
+def validate(source, target):
+    checks_engine.run_checks(source, target, RULESET)
+    profiler.profile_file(source)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="parse-once vs parse-every-time benchmark")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'rows':>12} {'runs':>5} {'csv s':>9} {'convert s':>10} {'arrow s':>9} {'speedup':>8} {'arrow MB':>9}")
+        for rows in args.rows:
+            uploads = os.path.join(tmp, "uploads")
+            os.makedirs(uploads, exist_ok=True)
+            write_synthetic_csv(os.path.join(uploads, "source.csv"), rows, seed=1)
+            write_synthetic_csv(os.path.join(uploads, "target.csv"), rows, seed=2)
+
+            start = time.perf_counter()
+            for _ in range(args.runs):
+                validate(
+                    checks_engine.local_opener(os.path.join(uploads, "source.csv")),
+                    checks_engine.local_opener(os.path.join(uploads, "target.csv")),
+                )
+            csv_seconds = time.perf_counter() - start
+
+            cache = ColumnarCache(os.path.join(tmp, f"cache_{rows}"), max_bytes=1 << 40)
+            start = time.perf_counter()
+            source = cache.fetch_local(tmp, "uploads/source.csv")
+            target = cache.fetch_local(tmp, "uploads/target.csv")
+            convert_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            for _ in range(args.runs):
+                validate(cache.fetch_local(tmp, "uploads/source.csv"), cache.fetch_local(tmp, "uploads/target.csv"))
+            arrow_seconds = time.perf_counter() - start
+
+            arrow_mb = (os.path.getsize(source.path) + os.path.getsize(target.path)) / 1024 ** 2
+            total_arrow = convert_seconds + arrow_seconds
+            print(
+                f"{rows:>12,} {args.runs:>5} {csv_seconds:>9.2f} {convert_seconds:>10.2f} {arrow_seconds:>9.2f} "
+                f"{csv_seconds / total_arrow:>7.2f}x {arrow_mb:>9.1f}"
+            )
+            for name in os.listdir(uploads):
+                os.remove(os.path.join(uploads, name))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# bench_reconcile.py
+#
+# Out-of-core reconciliation over synthetic source/target CSVs. The target is the source
+# with ~0.5% of rows dropped, ~0.5% new rows and ~1% of amounts changed, written in
+# shuffled order so partitions really have to be joined.
+#
+#   python benchmarks/bench_reconcile.py --rows 1000000 10000000 100000000 --partitions 256
+#
+# 100M rows (8.3 GB of CSV) on 1 CPU / 5 GB RAM, 256 partitions: partitioning 337 s,
+# total 483 s (207k rows/s); 500,112 missing, 500,112 extra, 999,991 mismatched.
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import reconcile  # noqa: E402
+from checks_engine import local_opener  # noqa: E402
+
+
+def write_pair(source_path: str, target_path: str, rows: int, seed: int = 1, chunk: int = 500_000):
+    rng = np.random.default_rng(seed)
+    header = "customer_id,amount,age,email\n"
+    with open(source_path, "w") as source, open(target_path, "w") as target:
+        source.write(header)
+        target.write(header)
+        for start in range(0, rows, chunk):
+            n = min(chunk, rows - start)
+            ids = np.arange(start, start + n).astype(str)
+            amount = np.round(rng.random(n) * 1000, 2).astype(str)
+            age = rng.integers(1, 100, n).astype(str)
+            email = np.char.add(np.char.add("user", ids), "@example.com")
+
+            def lines(*cols):
+                out = cols[0]
+                for col in cols[1:]:
+                    out = np.char.add(np.char.add(out, ","), col)
+                return out
+
+            source.write("\n".join(lines(ids, amount, age, email).tolist()) + "\n")
+
+            roll = rng.random(n)
+            keep = roll >= 0.005
+            changed = np.where((roll >= 0.005) & (roll < 0.015), "0.01", amount)
+            new_ids = np.char.add("new-", ids[roll < 0.005])
+            target_lines = lines(ids, changed, age, email)[keep]
+            extra = lines(new_ids, amount[roll < 0.005], age[roll < 0.005], email[roll < 0.005])
+            block = np.concatenate([target_lines, extra])
+            rng.shuffle(block)
+            target.write("\n".join(block.tolist()) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="reconcile throughput benchmark")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 10_000_000, 100_000_000])
+    parser.add_argument("--partitions", type=int, default=reconcile.DEFAULT_PARTITIONS)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--dir", default=None, help="Scratch directory for CSVs and spill files")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        print(f"{'rows':>12} {'size MB':>9} {'partition s':>12} {'total s':>9} {'rows/s':>12} {'missing':>9} {'extra':>9} {'mismatch':>9}")
+        for rows in args.rows:
+            source = os.path.join(tmp, f"source_{rows}.csv")
+            target = os.path.join(tmp, f"target_{rows}.csv")
+            write_pair(source, target, rows)
+
+            start = time.perf_counter()
+            overview = reconcile.reconcile(
+                local_opener(source), local_opener(target), ["customer_id"],
+                num_partitions=args.partitions, workers=args.workers, spill_dir=tmp,
+            )
+            elapsed = time.perf_counter() - start
+            size_mb = (os.path.getsize(source) + os.path.getsize(target)) / 1024 ** 2
+            print(
+                f"{rows:>12,} {size_mb:>9.1f} {overview['partition_time']:>12.2f} {elapsed:>9.2f} "
+                f"{rows / elapsed:>12,.0f} {overview['missing_rows']:>9,} {overview['extra_rows']:>9,} {overview['mismatched_rows']:>9,}"
+            )
+            os.remove(source)
+            os.remove(target)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# bench_report_documents.py
+#
+# CPU per request and bytes on the wire for the whole-document report endpoints:
+# - decode: what the endpoints used to do, psycopg2 decoding the JSONB column into dicts
+#   and JSONResponse re-encoding them on every request;
+# - passthrough: the stored JSON text wrapped into the response body as-is, per encoding,
+#   on a body-cache miss (built and compressed) and on a hit;
+# - 304: a revalidation with a matching If-None-Match, which sends no body at all.
+# The database round trip is the same for all variants and is left out.
+#
+#   python benchmarks/bench_report_documents.py --entries 1000 10000 100000
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from report_documents import (  # noqa: E402
+    DOCUMENT_ENCODINGS, REPORT_DOCUMENTS, DocumentBodyCache, encode_document, etag, etag_base, matching_etag,
+)
+
+DOWNLOAD_URL = "https://storage.googleapis.com/bucket/user/report.json?X-Goog-Signature=" + "0" * 512
+
+
+def checks_document_text(entries: int, seed: int = 1) -> str:
+    """A checks document as CockroachDB renders JSONB to text."""
+    rng = random.Random(seed)
+    statuses = ("Passed", "Failed", "Warning")
+    checks = [
+        {
+            "name": rng.choice(("Null Check", "Type Check", "Range Check", "Duplicate Check", "Value Mismatch")),
+            "field": f"column_{rng.randrange(40)}",
+            "row": rng.randrange(10_000_000),
+            "source": str(rng.random()),
+            "target": str(rng.random()),
+            "status": rng.choice(statuses),
+        }
+        for _ in range(entries)
+    ]
+    return json.dumps(checks, separators=(", ", ": "))
+
+
+def cpu_per_call(fn, min_seconds: float = 0.5) -> float:
+    calls = 0
+    start = time.process_time()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.process_time() - start
+        if elapsed >= min_seconds:
+            return elapsed / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="report document passthrough benchmark")
+    parser.add_argument("--entries", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    args = parser.parse_args()
+    doc = REPORT_DOCUMENTS["checks"]
+
+    print(f"{'entries':>9} {'variant':<26} {'cpu ms/req':>11} {'bytes':>12}")
+    for entries in args.entries:
+        text = checks_document_text(entries)
+
+        def decode():
+            return JSONResponse({doc.response_key: json.loads(text), "download_url": DOWNLOAD_URL}).body
+
+        rows = [("decode + JSONResponse", cpu_per_call(decode), len(decode()))]
+        for encoding in ("identity",) + DOCUMENT_ENCODINGS:
+            body, _ = encode_document(doc, text, DOWNLOAD_URL, encoding)
+            rows.append((f"passthrough {encoding} miss", cpu_per_call(lambda: encode_document(doc, text, DOWNLOAD_URL, encoding)), len(body)))
+            cache = DocumentBodyCache(1024 ** 3)
+            base = etag_base("checks", 1, 1, DOWNLOAD_URL)
+            cache.put((base, encoding), body, encoding)
+            rows.append((f"passthrough {encoding} hit", cpu_per_call(lambda: cache.get((base, encoding))), len(body)))
+        tag = etag(etag_base("checks", 1, 1, DOWNLOAD_URL), "gzip")
+        rows.append(("304 not modified", cpu_per_call(lambda: matching_etag(tag, etag_base("checks", 1, 1, DOWNLOAD_URL))), 0))
+        for variant, cpu, size in rows:
+            print(f"{entries:>9} {variant:<26} {cpu * 1000:>11.3f} {size:>12,}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# bench_signed_urls.py
+#
+# Signing cost of one /api/reports page. Each report carries three GCS URLs; V4 signing is
+# an RSA operation done locally, so this needs no network and runs with a throwaway
+# service-account key:
+# - serial: every URL signed in turn on each request, as the listing did before the cache;
+# - parallel miss: generate_signed_urls with an empty cache (signing_executor fans out);
+# - cache hit: the same page again while its URLs are still fresh;
+# - signed_urls=false: what the listing pays when the client fetches URLs on demand.
+#
+#   python benchmarks/bench_signed_urls.py --page-sizes 10 50 100
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+def service_account_json() -> str:
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+    return json.dumps({
+        "type": "service_account",
+        "project_id": "bench",
+        "private_key_id": "bench",
+        "private_key": pem.decode(),
+        "client_email": "bench@bench.iam.gserviceaccount.com",
+        "client_id": "1",
+        "token_uri": "https://oauth2.googleapis.com/token",
+    })
+
+
+# main.py refuses to import without its configuration; none of it is contacted here.
+for name, value in {
+    "DATABASE_URL": "postgresql://bench@127.0.0.1:1/bench",
+    "FRONTEND_URL": "http://localhost:5173",
+    "KINDE_ISSUER_URL": "https://bench.local",
+    "CLIENT_ID": "bench",
+    "CLIENT_SECRET": "bench",
+    "KINDE_CALLBACK_URL": "http://localhost/api/callback",
+    "BUCKET_NAME": "bench-bucket",
+}.items():
+    os.environ.setdefault(name, value)
+os.environ.setdefault("GOOGLE_APPLICATION_CREDENTIALS_JSON", service_account_json())
+
+import main as api  # noqa: E402
+
+FIELDS = ["id", "time", "status"] + list(api.REPORT_URL_FIELDS)
+
+
+def page(size: int, offset: int) -> list:
+    now = datetime.now()
+    return [
+        (i, now, "P", f"gs://bench-bucket/u/profile_{i}.json", f"gs://bench-bucket/u/overview_{i}.json", f"gs://bench-bucket/u/checks_{i}.json")
+        for i in range(offset, offset + size)
+    ]
+
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="signed URL listing benchmark")
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[10, 50, 100])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    api.gcs.load()
+
+    def serial(rows):
+        for r in rows:
+            for path in r[3:]:
+                bucket, name = path.replace("gs://", "").split("/", 1)
+                api.gcs.client.bucket(bucket).blob(name).generate_signed_url(expiration=api.SIGNED_URL_TTL)
+
+    print(f"signing workers: {api.signing_executor._max_workers}, cpus: {os.cpu_count()}")
+    print(f"{'page':>5} {'variant':<20} {'ms/page':>9}")
+    offset = 0
+    for size in args.page_sizes:
+        rows = page(size, offset)
+        offset += size
+        results = [("serial", timed(lambda: serial(rows), args.repeat))]
+
+        def miss():
+            api.signed_url_cache._entries.clear()
+            api.format_report_rows(rows, FIELDS, True)
+
+        results.append(("parallel miss", timed(miss, args.repeat)))
+        api.format_report_rows(rows, FIELDS, True)
+        results.append(("cache hit", timed(lambda: api.format_report_rows(rows, FIELDS, True), args.repeat)))
+        results.append(("signed_urls=false", timed(lambda: api.format_report_rows(rows, FIELDS, False), args.repeat)))
+        for variant, seconds in results:
+            print(f"{size:>5} {variant:<20} {seconds * 1000:>9.2f}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
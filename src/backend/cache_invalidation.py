@@ -0,0 +1,125 @@
+# cache_invalidation.py
+#
+# Invalidation of the per-process caches in main.py (verified tokens, dashboards) across
+# the worker processes of one container. Each cache registers a handler; a writer publishes
+# the keys it made stale, and every process runs `sync()` before it serves from its caches,
+# applying the keys published since it last looked. A change made through one worker is
+# therefore seen by the next request on any worker.
+#
+# Backends (CACHE_INVALIDATION_STORE):
+# - "memory": handlers run in the publishing process only; enough for a single worker.
+# - "sqlite": an append-only log in a file shared by the container's workers (the default).
+#             Entries older than `retention` seconds are trimmed; a process that had not
+#             applied a trimmed entry clears its caches instead (the handler gets None).
+
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+CACHE_INVALIDATION_BACKENDS = ("memory", "sqlite")
+
+
+class MemoryInvalidationLog:
+    """Runs the handlers in this process as soon as keys are published."""
+
+    def __init__(self):
+        self._handlers = {}
+
+    def register(self, cache: str, handler):
+        """`handler(key)` drops `key` from the cache, or everything when `key` is None."""
+        self._handlers[cache] = handler
+
+    def publish(self, cache: str, *keys):
+        handler = self._handlers[cache]
+        for key in keys:
+            handler(key)
+
+    def sync(self):
+        pass
+
+
+class SQLiteInvalidationLog(MemoryInvalidationLog):
+    """Keys published by any process on this host, through a SQLite file in WAL mode."""
+
+    def __init__(self, path: str, retention: float):
+        super().__init__()
+        self.path = path
+        self.retention = retention
+        self._lock = threading.Lock()
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_invalidations (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    cache TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            # Caches start empty, so only later entries concern this process.
+            self._seen = conn.execute("SELECT COALESCE(max(id), 0) FROM cache_invalidations").fetchone()[0]
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5, isolation_level=None)
+
+    def publish(self, cache: str, *keys):
+        if not keys:
+            return
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT INTO cache_invalidations (cache, key, created_at) VALUES (?, ?, ?)",
+                [(cache, json.dumps(key), now) for key in keys],
+            )
+            # The newest entry is always kept, so `sync` can tell whether it missed any.
+            conn.execute("""
+                DELETE FROM cache_invalidations
+                WHERE created_at < ? AND id < (SELECT max(id) FROM cache_invalidations)
+            """, (now - self.retention,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        self.sync()
+
+    def sync(self):
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN")
+                oldest = conn.execute("SELECT min(id) FROM cache_invalidations").fetchone()[0]
+                rows = conn.execute(
+                    "SELECT id, cache, key FROM cache_invalidations WHERE id > ? ORDER BY id", (self._seen,)
+                ).fetchall()
+                conn.execute("COMMIT")
+            finally:
+                conn.close()
+            if not rows:
+                return
+            if oldest > self._seen + 1:
+                for handler in self._handlers.values():
+                    handler(None)
+            else:
+                for _, cache, key in rows:
+                    handler = self._handlers.get(cache)
+                    if handler is not None:
+                        handler(json.loads(key))
+            self._seen = rows[-1][0]
+
+
+def create_invalidation_log(backend: str, retention: float = 3600, path: str | None = None):
+    if backend == "memory":
+        return MemoryInvalidationLog()
+    if backend == "sqlite":
+        return SQLiteInvalidationLog(path or os.path.join(tempfile.gettempdir(), "cache_invalidations.sqlite3"), retention)
+    raise ValueError(f"Unknown cache invalidation store '{backend}', expected one of {', '.join(CACHE_INVALIDATION_BACKENDS)}")
@@ -0,0 +1,361 @@
+# checks_engine.py
+#
+# Columnar data-quality checks over uploaded source/target files.
+# Files are read as streams of Arrow record batches and every rule is evaluated one
+# column at a time with vectorized Arrow compute kernels, so throughput is bounded by
+# the kernels rather than the Python interpreter and memory by the batch size (plus the
+# 8-byte hashes that uniqueness/referential checks must remember per distinct value).
+#
+# Results are written to `reports.checks` as an array of entries in the shape rendered
+# by FailedChecks.jsx: {name, field, source, target, status} plus `row` and counts.
+
+import csv
+import io
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+
+from hashing import HashSet64, combine_hashes, first_occurrence_mask, hash_strings
+
+logger = logging.getLogger(__name__)
+
+# Bump versions.RULESET_VERSION whenever check semantics change.
+
+BLOCK_SIZE = 16 * 1024 * 1024
+MAX_FAILURES_PER_CHECK = 1000
+NULL_TOKENS = pa.array(["", "NULL", "null", "None", "NaN", "N/A"])
+
+NUMBER_PATTERN = r"^\s*[+-]?(\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?\s*$"
+INTEGER_PATTERN = r"^\s*[+-]?\d+\s*$"
+BOOLEAN_PATTERN = r"(?i)^(true|false|t|f|yes|no|0|1)$"
+TYPE_PATTERNS = {"number": NUMBER_PATTERN, "integer": INTEGER_PATTERN, "boolean": BOOLEAN_PATTERN}
+
+CHECK_NAMES = {
+    "not_null": "Null Value Check",
+    "type": "Data Type Consistency",
+    "range": "Range Validation",
+    "unique": "Uniqueness Constraint",
+    "referential": "Referential Integrity",
+    "format": "Format Validation",
+    "date_format": "Date Format",
+    "duplicate_records": "Duplicate Records",
+    "completeness": "Data Completeness",
+}
+
+
+# --------------------------------------------------
+# Reading
+# --------------------------------------------------
+def iter_csv_batches(opener: Callable[[], io.RawIOBase], block_size: int = BLOCK_SIZE) -> Iterator[pa.RecordBatch]:
+    """
+    Streams a CSV as record batches with every column typed as string, so type checks
+    see the raw text. `opener` returns a fresh binary stream (local file, GCS BlobReader).
+    """
+    stream = opener()
+    try:
+        header = stream.readline().decode("utf-8-sig")
+        names = next(csv.reader([header]))
+        reader = pacsv.open_csv(
+            stream,
+            read_options=pacsv.ReadOptions(column_names=names, block_size=block_size),
+            convert_options=pacsv.ConvertOptions(
+                column_types={name: pa.string() for name in names},
+                strings_can_be_null=False,
+                quoted_strings_can_be_null=False,
+            ),
+        )
+        for batch in reader:
+            yield batch
+    finally:
+        stream.close()
+
+
+def read_batches(source, block_size: int = BLOCK_SIZE) -> Iterator[pa.RecordBatch]:
+    """
+    Record batches from either a CSV opener or a columnar source (columnar.ArrowFileSource),
+    which already holds parsed batches.
+    """
+    if hasattr(source, "iter_batches"):
+        return source.iter_batches()
+    return iter_csv_batches(source, block_size)
+
+
+def column_names(source) -> list:
+    if hasattr(source, "column_names"):
+        return source.column_names()
+    stream = source()
+    try:
+        return next(csv.reader([stream.readline().decode("utf-8-sig")]))
+    finally:
+        stream.close()
+
+
+def local_opener(path: str) -> Callable[[], io.RawIOBase]:
+    return lambda: open(path, "rb")
+
+
+def gcs_opener(bucket, blob_name: str, chunk_size: int = BLOCK_SIZE) -> Callable[[], io.RawIOBase]:
+    return lambda: bucket.blob(blob_name).open("rb", chunk_size=chunk_size)
+
+
+# --------------------------------------------------
+# Vectorized kernels: each returns a boolean array, True where the row fails
+# --------------------------------------------------
+def null_mask(values: pa.Array) -> pa.Array:
+    return pc.fill_null(pc.or_(pc.is_null(values), pc.is_in(values, value_set=NULL_TOKENS)), True)
+
+
+def pattern_failures(values: pa.Array, pattern: str) -> pa.Array:
+    # Nulls are the null check's concern, not a format failure.
+    matches = pc.match_substring_regex(values, pattern)
+    return pc.and_not(pc.invert(pc.fill_null(matches, True)), null_mask(values))
+
+
+def range_failures(values: pa.Array, minimum: Optional[float], maximum: Optional[float]) -> pa.Array:
+    numeric_mask = pc.fill_null(pc.match_substring_regex(values, NUMBER_PATTERN), False)
+    numbers = pc.cast(pc.utf8_trim_whitespace(pc.if_else(numeric_mask, values, pa.scalar(None, pa.string()))), pa.float64())
+    out_of_range = pa.array(np.zeros(len(values), dtype=bool))
+    if minimum is not None:
+        out_of_range = pc.or_(out_of_range, pc.fill_null(pc.less(numbers, minimum), False))
+    if maximum is not None:
+        out_of_range = pc.or_(out_of_range, pc.fill_null(pc.greater(numbers, maximum), False))
+    return out_of_range
+
+
+def date_failures(values: pa.Array, fmt: str) -> pa.Array:
+    parsed = pc.strptime(values, format=fmt, unit="s", error_is_null=True)
+    return pc.and_not(pc.is_null(parsed), null_mask(values))
+
+
+# --------------------------------------------------
+# Checks
+# --------------------------------------------------
+@dataclass
+class CheckState:
+    rule: dict
+    failed: int = 0
+    total: int = 0
+    samples: list = field(default_factory=list)
+    seen: HashSet64 = field(default_factory=HashSet64)  # uniqueness / duplicate records
+
+    @property
+    def name(self) -> str:
+        return CHECK_NAMES[self.rule["check"]]
+
+    @property
+    def field_name(self) -> str:
+        return self.rule.get("field", "*")
+
+    def expectation(self) -> str:
+        rule = self.rule
+        check = rule["check"]
+        if check == "not_null":
+            return "not null"
+        if check == "type":
+            return rule["type"]
+        if check == "range":
+            return f"{rule.get('min', '-inf')}..{rule.get('max', 'inf')}"
+        if check == "format":
+            return rule["pattern"]
+        if check == "date_format":
+            return rule["format"]
+        if check == "unique":
+            return "unique"
+        if check == "referential":
+            return f"exists in target.{rule.get('target_field', rule['field'])}"
+        if check == "duplicate_records":
+            return "unique row"
+        if check == "completeness":
+            return f">= {rule.get('min_ratio', 1.0):.0%} populated"
+        return ""
+
+    def record(self, mask: pa.Array, values: Optional[pa.Array], row_offset: int, max_failures: int):
+        mask_np = mask.to_numpy(zero_copy_only=False)
+        failed_rows = np.flatnonzero(mask_np)
+        self.failed += len(failed_rows)
+        self.total += len(mask_np)
+        room = max_failures - len(self.samples)
+        if room > 0 and len(failed_rows) and values is not None:
+            picked = failed_rows[:room]
+            sample_values = pc.take(values, pa.array(picked)).to_pylist()
+            self.samples.extend((int(row) + row_offset, value) for row, value in zip(picked, sample_values))
+
+
+def _unique_failures(state: CheckState, hashes: np.ndarray) -> pa.Array:
+    """
+    Marks every occurrence after the first, both within the batch and against hashes seen
+    in earlier batches.
+    """
+    repeat = state.seen.contains(hashes) | ~first_occurrence_mask(hashes)
+    state.seen.add(hashes)
+    return pa.array(repeat)
+
+
+def _row_hashes(batch: pa.RecordBatch) -> np.ndarray:
+    return combine_hashes(hash_strings(col) for col in batch.columns)
+
+
+def _row_display(batch: pa.RecordBatch) -> pa.Array:
+    return pc.binary_join_element_wise(*[pc.fill_null(col, "") for col in batch.columns], ", ")
+
+
+def default_rules(names: list, target_names: list) -> list:
+    """
+    Rules applied when the ruleset does not list any: null and completeness checks on every
+    column, duplicate records, and referential integrity for `*_id` columns shared with the target.
+    """
+    rules = [{"check": "duplicate_records"}]
+    for name in names:
+        rules.append({"check": "not_null", "field": name})
+        rules.append({"check": "completeness", "field": name, "min_ratio": 1.0})
+        if name.endswith("_id") and name in target_names:
+            rules.append({"check": "referential", "field": name})
+    return rules
+
+
+def _collect_reference_values(opener, rules: list) -> dict:
+    """One pass over the target file collecting hashes of the values referential checks need."""
+    wanted = {r.get("target_field", r["field"]) for r in rules if r["check"] == "referential"}
+    values = {}
+    if not wanted:
+        return values
+    for batch in read_batches(opener):
+        for name in wanted:
+            idx = batch.schema.get_field_index(name)
+            if idx < 0:
+                continue
+            values.setdefault(name, HashSet64()).add(hash_strings(batch.column(idx)))
+    return values
+
+
+@dataclass
+class CheckResult:
+    entries: list
+    rows: int
+    failed_checks: int
+    seconds: float
+
+    @property
+    def passed(self) -> bool:
+        return self.failed_checks == 0
+
+
+def run_checks(source_opener, target_opener, ruleset: Optional[dict] = None, max_failures: int = MAX_FAILURES_PER_CHECK) -> CheckResult:
+    """
+    Evaluates the ruleset against the source file in one streaming pass (plus one pass over
+    the target for referential checks) and returns the entries for `reports.checks`.
+    """
+    start = time.perf_counter()
+    rules = list((ruleset or {}).get("rules") or [])
+    target_names = column_names(target_opener)
+    source_batches = read_batches(source_opener)
+    first = next(source_batches, None)
+    if first is None:
+        return CheckResult([], 0, 0, time.perf_counter() - start)
+    if not rules:
+        rules = default_rules(first.schema.names, target_names)
+
+    states = [CheckState(rule) for rule in rules]
+    reference = _collect_reference_values(target_opener, rules)
+
+    rows = 0
+    for batch in _chain(first, source_batches):
+        for state in states:
+            rule = state.rule
+            check = rule["check"]
+            if check == "duplicate_records":
+                mask = _unique_failures(state, _row_hashes(batch))
+                if len(state.samples) < max_failures and pc.any(mask).as_py():
+                    state.record(mask, _row_display(batch), rows, max_failures)
+                else:
+                    state.record(mask, None, rows, max_failures)
+                continue
+            idx = batch.schema.get_field_index(rule["field"])
+            if idx < 0:
+                continue
+            values = batch.column(idx)
+            if check in ("not_null", "completeness"):
+                mask = null_mask(values)
+            elif check == "type":
+                mask = pattern_failures(values, TYPE_PATTERNS[rule["type"]])
+            elif check == "format":
+                mask = pattern_failures(values, rule["pattern"])
+            elif check == "range":
+                mask = range_failures(values, rule.get("min"), rule.get("max"))
+            elif check == "date_format":
+                mask = date_failures(values, rule["format"])
+            elif check == "unique":
+                mask = pc.and_not(_unique_failures(state, hash_strings(values)), null_mask(values))
+            elif check == "referential":
+                ref = reference.get(rule.get("target_field", rule["field"]), HashSet64())
+                mask = pc.and_not(pa.array(~ref.contains(hash_strings(values))), null_mask(values))
+            else:
+                raise ValueError(f"Unknown check: {check}")
+            state.record(mask, values, rows, max_failures)
+        rows += batch.num_rows
+
+    entries = []
+    failed_checks = 0
+    for state in states:
+        failed = state.failed
+        if state.rule["check"] == "completeness":
+            # Completeness is a column-level ratio rather than a per-row rule.
+            ratio = 1 - failed / state.total if state.total else 1.0
+            failed = 0 if ratio >= state.rule.get("min_ratio", 1.0) else failed
+            if failed:
+                entries.append(_entry(state, None, f"{ratio:.2%} populated", failed))
+                failed_checks += 1
+            else:
+                entries.append(_entry(state, None, "", 0))
+            continue
+        if failed:
+            failed_checks += 1
+            for row, value in state.samples:
+                entries.append(_entry(state, row, "NULL" if value is None else value, failed))
+        else:
+            entries.append(_entry(state, None, "", 0))
+
+    seconds = time.perf_counter() - start
+    logger.info("Checked %d rows against %d rules in %.2fs (%.0f rows/s)", rows, len(states), seconds, rows / seconds if seconds else 0)
+    return CheckResult(entries, rows, failed_checks, seconds)
+
+
+def _chain(first, rest):
+    yield first
+    yield from rest
+
+
+def _entry(state: CheckState, row: Optional[int], source, failed: int) -> dict:
+    return {
+        "name": state.name,
+        "field": state.field_name,
+        "row": row,
+        "source": source,
+        "target": state.expectation(),
+        "status": "Failed" if failed else "Passed",
+        "failed_count": failed,
+        "total_count": state.total,
+    }
+
+
+# --------------------------------------------------
+# Persistence
+# --------------------------------------------------
+def save_checks_report(cursor, username: str, report_name: str, result: CheckResult) -> int:
+    """
+    Stores the check results as a new report row and returns its id. Runs on the caller's
+    cursor; the caller commits.
+    """
+    cursor.execute("""
+        INSERT INTO reports (username, report_name, report_date, time, status, checks)
+        VALUES (%s, %s, CURRENT_DATE, now(), %s, %s)
+        RETURNING id
+    """, (username, report_name, "P" if result.passed else "F", json.dumps(result.entries)))
+    return cursor.fetchone()[0]
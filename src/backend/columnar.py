@@ -0,0 +1,180 @@
+# columnar.py
+#
+# Parse-once columnar copies of uploaded CSVs.
+# The first job that touches an upload converts it into an uncompressed Arrow IPC file
+# stored next to the original (`{username}/objects/sha256/{digest}.arrow`), so later
+# runs (re-validation, profiling, reconciliation) skip CSV parsing entirely. Workers keep
+# those files in a local size-bounded LRU cache directory and memory-map them: batches
+# are read straight from the page cache without copying or parsing.
+#
+# Columns stay strings, exactly as iter_csv_batches produces them, so checks that
+# validate raw text (type, format, date) behave identically on either representation.
+
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from typing import Iterator, Optional
+
+import pyarrow as pa
+
+from checks_engine import gcs_opener, iter_csv_batches, local_opener
+from versions import COLUMNAR_SUFFIX
+
+logger = logging.getLogger(__name__)
+
+
+def columnar_blob_name(blob_name: str) -> str:
+    return blob_name + COLUMNAR_SUFFIX
+
+
+def convert_csv(opener, path: str) -> int:
+    """
+    Streams a CSV into an Arrow IPC file at `path` (written to a temporary name and renamed,
+    so readers never see a partial file). Returns the row count.
+    """
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    rows = 0
+    writer = None
+    try:
+        for batch in iter_csv_batches(opener):
+            if writer is None:
+                writer = pa.ipc.new_file(tmp_path, batch.schema)
+            writer.write_batch(batch)
+            rows += batch.num_rows
+        if writer is None:
+            writer = pa.ipc.new_file(tmp_path, pa.schema([]))
+        writer.close()
+        writer = None
+        os.replace(tmp_path, path)
+    finally:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return rows
+
+
+class ArrowFileSource:
+    """
+    A columnar stand-in for a CSV opener: anything that reads batches through
+    checks_engine.read_batches accepts either. Picklable, so it can be handed to workers.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def iter_batches(self) -> Iterator[pa.RecordBatch]:
+        reader = pa.ipc.open_file(pa.memory_map(self.path))
+        for i in range(reader.num_record_batches):
+            yield reader.get_batch(i)
+
+    def column_names(self) -> list:
+        return pa.ipc.open_file(pa.memory_map(self.path)).schema.names
+
+
+class ColumnarCache:
+    """
+    Local directory of converted uploads, evicted least-recently-used first once the total
+    size exceeds `max_bytes`. Recency is the file mtime (touched on every hit), so several
+    worker processes can share one directory. Evicting a file another process has mapped
+    is safe: the unlinked data stays readable until it is unmapped.
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, hashlib.sha256(key.encode()).hexdigest() + COLUMNAR_SUFFIX)
+
+    def get(self, key: str) -> Optional[ArrowFileSource]:
+        path = self._path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return ArrowFileSource(path)
+
+    def put(self, key: str, fill) -> ArrowFileSource:
+        """Creates the entry by calling `fill(path)`, which must write the file at `path`."""
+        path = self._path(key)
+        fill(path)
+        self._evict(keep=path)
+        return ArrowFileSource(path)
+
+    def _evict(self, keep: str):
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.root):
+                if not name.endswith(COLUMNAR_SUFFIX):
+                    continue
+                full = os.path.join(self.root, name)
+                try:
+                    stat = os.stat(full)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, full))
+            total = sum(size for _, size, _ in entries)
+            for _, size, full in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if full == keep:
+                    continue
+                try:
+                    os.remove(full)
+                    total -= size
+                except FileNotFoundError:
+                    pass
+
+    def fetch_gcs(self, bucket, blob_name: str) -> ArrowFileSource:
+        """
+        Returns the columnar copy of an uploaded CSV: from the local cache, else downloaded
+        from its `.arrow` sibling in GCS, else converted from the CSV and the sibling uploaded
+        for every other worker.
+        """
+        key = columnar_blob_name(blob_name)
+        cached = self.get(key)
+        if cached:
+            return cached
+        columnar_blob = bucket.blob(key)
+
+        def fill(path: str):
+            tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            try:
+                columnar_blob.download_to_filename(tmp_path)
+                os.replace(tmp_path, path)
+                return
+            except Exception as e:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                if getattr(e, "code", None) != 404:
+                    raise
+            start = time.perf_counter()
+            rows = convert_csv(gcs_opener(bucket, blob_name), path)
+            columnar_blob.upload_from_filename(path, content_type="application/vnd.apache.arrow.file")
+            logger.info("Converted %s (%d rows) to Arrow in %.2fs", blob_name, rows, time.perf_counter() - start)
+
+        return self.put(key, fill)
+
+    def fetch_local(self, root: str, blob_name: str) -> ArrowFileSource:
+        """`fetch_gcs` for uploads mirrored in a local directory (one-machine testing)."""
+        sibling = os.path.join(root, columnar_blob_name(blob_name))
+        if not os.path.exists(sibling):
+            convert_csv(local_opener(os.path.join(root, blob_name)), sibling)
+        key = columnar_blob_name(blob_name)
+        cached = self.get(key)
+        if cached:
+            return cached
+
+        def fill(path: str):
+            tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            shutil.copyfile(sibling, tmp_path)
+            os.replace(tmp_path, path)
+
+        return self.put(key, fill)
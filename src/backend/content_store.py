@@ -0,0 +1,93 @@
+# content_store.py
+#
+# Content-addressed uploads and validation result reuse.
+# Uploads are stored once per user under `{username}/objects/sha256/{digest}`, so a
+# nightly extract that did not change is neither re-uploaded nor re-stored. A completed
+# validation is recorded in `validation_results` keyed by (source digest, target digest,
+# rulesets.ruleset_key); uploading the same pair again records a new validation_history row
+# pointing at the cached report instead of queueing a job.
+# Tables/columns are created by migrations/005_content_addressed_uploads.sql.
+
+import hashlib
+from typing import Optional
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_stream(fileobj, max_bytes: Optional[int] = None, chunk_size: int = HASH_CHUNK_SIZE) -> tuple:
+    """
+    Returns (sha256 hex digest, size) of a seekable binary stream, rewound afterwards.
+    Raises ValueError as soon as more than `max_bytes` have been read.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    fileobj.seek(0)
+    while True:
+        chunk = fileobj.read(chunk_size)
+        if not chunk:
+            break
+        size += len(chunk)
+        if max_bytes is not None and size > max_bytes:
+            raise ValueError(f"Upload exceeds the {max_bytes} byte limit")
+        digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest(), size
+
+
+def content_blob_name(username: str, digest: str) -> str:
+    # Namespaced per user: a shared namespace would let anyone probe for other users' files.
+    return f"{username}/objects/sha256/{digest}"
+
+
+def is_content_blob(blob_name: str) -> bool:
+    return "/objects/sha256/" in blob_name
+
+
+def find_result(cursor, username: str, source_hash: str, target_hash: str, ruleset_version: int) -> Optional[tuple]:
+    """Returns (report_id, is_valid) of an earlier validation of this exact pair, if any."""
+    cursor.execute("""
+        SELECT r.report_id, r.is_valid
+        FROM validation_results r
+        JOIN reports ON reports.id = r.report_id AND reports.username = r.username
+        WHERE r.username = %s AND r.source_hash = %s AND r.target_hash = %s AND r.ruleset_version = %s
+    """, (username, source_hash, target_hash, ruleset_version))
+    return cursor.fetchone()
+
+
+def find_results(cursor, username: str, pairs: list, ruleset_version: int) -> dict:
+    """
+    `find_result` for many (source_hash, target_hash) pairs in one query. Maps each pair
+    that was validated before to its (report_id, is_valid).
+    """
+    if not pairs:
+        return {}
+    cursor.execute("""
+        SELECT r.source_hash, r.target_hash, r.report_id, r.is_valid
+        FROM validation_results r
+        JOIN reports ON reports.id = r.report_id AND reports.username = r.username
+        WHERE r.username = %s AND r.ruleset_version = %s AND (r.source_hash, r.target_hash) IN %s
+    """, (username, ruleset_version, tuple(set(pairs))))
+    return {(source_hash, target_hash): (report_id, is_valid) for source_hash, target_hash, report_id, is_valid in cursor.fetchall()}
+
+
+def record_result(cursor, history_id: int, report_id: int, is_valid: bool, ruleset_version: int):
+    """
+    Links a finished validation to its report and, when the history row carries content
+    hashes, makes the result reusable. Must run in the transaction that settles the row.
+    """
+    cursor.execute("""
+        UPDATE validation_history SET report_id = %s WHERE id = %s
+        RETURNING username, source_hash, target_hash
+    """, (report_id, history_id))
+    row = cursor.fetchone()
+    if not row or not row[1] or not row[2]:
+        return
+    username, source_hash, target_hash = row
+    cursor.execute("""
+        INSERT INTO validation_results (username, source_hash, target_hash, ruleset_version, report_id, is_valid)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        ON CONFLICT (username, source_hash, target_hash, ruleset_version) DO UPDATE SET
+            report_id = EXCLUDED.report_id,
+            is_valid = EXCLUDED.is_valid,
+            created_at = now()
+    """, (username, source_hash, target_hash, ruleset_version, report_id, is_valid))
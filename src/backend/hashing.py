@@ -0,0 +1,154 @@
+# hashing.py
+#
+# Vectorized 64-bit hashing of Arrow string columns with NumPy, shared by the checks
+# engine (uniqueness, duplicates, referential integrity), the profiler (distinct-count
+# sketches) and reconciliation (row partitioning). Hashes are computed straight from the
+# Arrow offsets/data buffers, so no Python object is created per value.
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+_MULTIPLIER = np.uint64(0x100000001B3)
+_LENGTH_MIX = np.uint64(0x9E3779B97F4A7C15)
+_NULL_HASH = np.uint64(0x5BD1E9955BD1E995)
+_powers = np.ones(1, dtype=np.uint64)
+
+
+def _power_table(size: int) -> np.ndarray:
+    global _powers
+    if len(_powers) < size:
+        table = np.full(max(size, 2 * len(_powers)), _MULTIPLIER, dtype=np.uint64)
+        table[0] = 1
+        with np.errstate(over="ignore"):
+            _powers = np.cumprod(table, dtype=np.uint64)
+    return _powers
+
+
+def mix64(x: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer: spreads entropy across all 64 bits."""
+    with np.errstate(over="ignore"):
+        x = x ^ (x >> np.uint64(30))
+        x = x * np.uint64(0xBF58476D1CE4E5B9)
+        x = x ^ (x >> np.uint64(27))
+        x = x * np.uint64(0x94D049BB133111EB)
+        return x ^ (x >> np.uint64(31))
+
+
+def hash_strings(values: pa.Array) -> np.ndarray:
+    """
+    Returns a uint64 hash per value of a string array. Nulls hash to a fixed value distinct
+    from the empty string.
+    """
+    if isinstance(values, pa.ChunkedArray):
+        if values.num_chunks == 0:
+            return np.zeros(0, dtype=np.uint64)
+        return np.concatenate([hash_strings(chunk) for chunk in values.chunks])
+    if not pa.types.is_string(values.type) and not pa.types.is_large_string(values.type):
+        values = pc.cast(values, pa.string())
+    n = len(values)
+    if n == 0:
+        return np.zeros(0, dtype=np.uint64)
+
+    offset_type = np.int64 if pa.types.is_large_string(values.type) else np.int32
+    _, offsets_buf, data_buf = values.buffers()
+    offsets = np.frombuffer(offsets_buf, dtype=offset_type)[values.offset: values.offset + n + 1].astype(np.int64)
+    data = np.frombuffer(data_buf, dtype=np.uint8) if data_buf is not None else np.zeros(0, dtype=np.uint8)
+    data = data[offsets[0]:offsets[-1]].astype(np.uint64)
+    starts = offsets[:-1] - offsets[0]
+    lengths = np.diff(offsets)
+
+    if len(data):
+        positions = np.arange(len(data)) - np.repeat(starts, lengths)
+        weights = _power_table(int(lengths.max()))[positions]
+        with np.errstate(over="ignore"):
+            contributions = (data + np.uint64(1)) * weights
+        # Segments are reduced from the starts of non-empty strings only: an empty string
+        # shares its start with the next value, or lies past the end of `data`.
+        nonempty = lengths > 0
+        sums = np.zeros(n, dtype=np.uint64)
+        sums[nonempty] = np.add.reduceat(contributions, starts[nonempty])
+    else:
+        sums = np.zeros(n, dtype=np.uint64)
+
+    with np.errstate(over="ignore"):
+        hashes = mix64(sums ^ (lengths.astype(np.uint64) * _LENGTH_MIX))
+    if values.null_count:
+        hashes[values.is_null().to_numpy(zero_copy_only=False)] = _NULL_HASH
+    return hashes
+
+
+def combine_hashes(columns) -> np.ndarray:
+    """Hashes rows by folding per-column hashes in column order."""
+    combined = None
+    for column_hash in columns:
+        if combined is None:
+            combined = column_hash.copy()
+        else:
+            with np.errstate(over="ignore"):
+                combined = mix64(combined * _MULTIPLIER + column_hash)
+    return combined
+
+
+def sorted_unique(hashes: np.ndarray) -> np.ndarray:
+    """Sort-based unique; much faster than np.unique's hash path for uint64 keys."""
+    ordered = np.sort(hashes)
+    if len(ordered) < 2:
+        return ordered
+    keep = np.empty(len(ordered), dtype=bool)
+    keep[0] = True
+    np.not_equal(ordered[1:], ordered[:-1], out=keep[1:])
+    return ordered[keep]
+
+
+class HashSet64:
+    """
+    Append-only set of uint64 hashes kept as a few sorted NumPy levels (merged like a
+    binary counter), so membership is a vectorized `searchsorted` per level and inserting
+    n hashes costs O(n log n) amortized instead of rebuilding one big set every batch.
+    """
+
+    def __init__(self):
+        self._levels = []
+
+    def __len__(self) -> int:
+        return sum(len(level) for level in self._levels)
+
+    def contains(self, hashes: np.ndarray) -> np.ndarray:
+        found = np.zeros(len(hashes), dtype=bool)
+        if not self._levels or not len(hashes):
+            return found
+        # Probing with sorted needles keeps the binary searches cache friendly.
+        order = np.argsort(hashes)
+        needles = hashes[order]
+        for level in self._levels:
+            idx = np.searchsorted(level, needles)
+            idx[idx == len(level)] = 0
+            found[order] |= level[idx] == needles
+        return found
+
+    def add(self, hashes: np.ndarray):
+        level = sorted_unique(hashes)
+        if not len(level):
+            return
+        while self._levels and len(self._levels[-1]) <= len(level):
+            level = sorted_unique(np.concatenate([self._levels.pop(), level]))
+        self._levels.append(level)
+
+    def to_array(self) -> np.ndarray:
+        if not self._levels:
+            return np.zeros(0, dtype=np.uint64)
+        return sorted_unique(np.concatenate(self._levels))
+
+
+def first_occurrence_mask(hashes: np.ndarray) -> np.ndarray:
+    """True for the first occurrence of each hash within the array."""
+    first = np.zeros(len(hashes), dtype=bool)
+    if len(hashes):
+        order = np.argsort(hashes, kind="stable")
+        ordered = hashes[order]
+        first_sorted = np.empty(len(hashes), dtype=bool)
+        first_sorted[0] = True
+        np.not_equal(ordered[1:], ordered[:-1], out=first_sorted[1:])
+        first[order] = first_sorted
+    return first
@@ -0,0 +1,167 @@
+# ingest.py
+#
+# Micro-batched, idempotent ingestion of Pub/Sub push notifications.
+# Each push is parsed by the route, queued here and acknowledged (HTTP 200) only after
+# the batch it landed in has been committed, so Pub/Sub redelivers anything not durably
+# stored. Redeliveries are absorbed by the unique `idempotency_key` on validation_history
+# (migrations/003_validation_history_idempotency.sql).
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+
+from psycopg2.extras import execute_values
+from starlette.concurrency import run_in_threadpool
+
+import rollups
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class IngestRecord:
+    idempotency_key: str
+    username: str
+    file_name: str
+    is_valid: bool
+    created_at: datetime
+
+
+def idempotency_key_for(message: dict) -> str:
+    """
+    Identifies the underlying event rather than the delivery: the GCS object generation
+    when present (one per write), otherwise the Pub/Sub message ID.
+    """
+    attributes = message.get("attributes", {}) or {}
+    generation = attributes.get("objectGeneration")
+    if attributes.get("objectId") and generation:
+        return f"gcs:{attributes.get('bucketId', '')}/{attributes['objectId']}#{generation}"
+    message_id = message.get("messageId") or message.get("message_id")
+    if not message_id:
+        raise ValueError("Message has neither an object generation nor a message ID")
+    return f"msg:{message_id}"
+
+
+def write_batch(conn, records: list) -> set:
+    """
+    Inserts a batch in one multi-row statement and updates the dashboard rollups for the
+    rows that were actually new, all in one transaction. Returns the usernames touched.
+    """
+    try:
+        with conn.cursor() as cursor:
+            inserted = execute_values(cursor, """
+                INSERT INTO validation_history (idempotency_key, username, source_file_name, is_valid, created_at)
+                VALUES %s
+                ON CONFLICT (idempotency_key) DO NOTHING
+                RETURNING idempotency_key
+            """, [(r.idempotency_key, r.username, r.file_name, r.is_valid, r.created_at) for r in records], fetch=True)
+            new_keys = {row[0] for row in inserted}
+            new_records = [r for r in records if r.idempotency_key in new_keys]
+            rollups.record_validations(cursor, [(r.username, r.is_valid, r.created_at) for r in new_records])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    if len(new_records) < len(records):
+        logger.info("Pub/Sub ingest skipped %d duplicate message(s)", len(records) - len(new_records))
+    return {r.username for r in new_records}
+
+
+class IngestBuffer:
+    """
+    Coalesces records submitted by concurrent requests into batches flushed when
+    `max_batch` records are waiting or `max_delay` seconds after the first one arrived.
+    `submit` resolves once the record's batch is committed and raises if the flush failed.
+    """
+
+    def __init__(self, engine, max_batch: int = 500, max_delay: float = 0.05, on_flush=None):
+        self.engine = engine
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.on_flush = on_flush
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run(), name="pubsub-ingest")
+
+    async def stop(self):
+        """Flushes whatever is queued and stops the flusher."""
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    async def submit(self, record: IngestRecord):
+        if self._task is None or self._task.done():
+            raise RuntimeError("Ingest buffer is not running")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((record, future))
+        await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            try:
+                await self._flush(batch)
+            except Exception as e:
+                # One bad batch must not stop the flusher: later submits would never resolve.
+                logger.error("Pub/Sub batch of %d message(s) could not be flushed: %s", len(batch), e, exc_info=True)
+                self._settle(batch, e)
+
+    def _write(self, records: list) -> set:
+        conn = self.engine.raw_connection()
+        try:
+            return write_batch(conn, records)
+        finally:
+            conn.close()
+
+    async def _flush(self, batch: list):
+        # Redeliveries of the same event inside one batch collapse to a single row.
+        unique = {}
+        for record, _ in batch:
+            unique.setdefault(record.idempotency_key, record)
+        try:
+            usernames = await run_in_threadpool(self._write, list(unique.values()))
+        except Exception as e:
+            logger.error("Pub/Sub batch of %d message(s) failed: %s", len(batch), e, exc_info=True)
+            self._settle(batch, e)
+            return
+        # The batch is committed, so its pushes are acknowledged even if the callback fails.
+        if self.on_flush:
+            try:
+                await run_in_threadpool(self.on_flush, usernames)
+            except Exception as e:
+                logger.error("Pub/Sub flush callback failed: %s", e, exc_info=True)
+        self._settle(batch)
+
+    @staticmethod
+    def _settle(batch: list, error: Exception | None = None):
+        for _, future in batch:
+            if future.done():
+                continue
+            if error is None:
+                future.set_result(None)
+            else:
+                future.set_exception(error)
@@ -0,0 +1,713 @@
+# jobs.py
+#
+# Background validation jobs, decoupled from HTTP requests.
+# Uploads (and Pub/Sub pushes carrying a `jobId`) enqueue a row in `validation_jobs`
+# (migrations/004_validation_jobs.sql). A JobRunner in one API worker per container (the
+# holder of its lock file) schedules queued jobs fairly across users onto a process pool,
+# so parsing and checking never compete with request handling for the GIL. Each job runs
+# the checks engine, the profiler and the source/target reconciliation, stores the report
+# and settles `validation_history.is_valid`.
+# Failures are retried with exponential backoff; jobs can be cancelled while queued or running.
+#
+# The in-process FairQueue stands in for Pub/Sub: the database row is the durable record
+# and the queue only orders work, so jobs left queued by a restart are recovered from the
+# table. A standalone worker that polls the table instead of serving HTTP:
+#     python jobs.py --workers 4
+
+import argparse
+import asyncio
+import fcntl
+import json
+import logging
+import multiprocessing
+import os
+import random
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from psycopg2.extras import execute_values
+from starlette.concurrency import run_in_threadpool
+
+import content_store
+import rollups
+from rulesets import ruleset_key
+
+# The checks engine, profiler, reconciliation and columnar cache (NumPy / pyarrow) are
+# imported where they are used, so importing this module from the API does not pay for
+# them at startup.
+
+logger = logging.getLogger(__name__)
+
+JOB_STATES = ("queued", "running", "done", "failed", "cancelled")
+
+
+# --------------------------------------------------
+# Persistence
+# --------------------------------------------------
+def create_job(cursor, history_id: int, username: str, source_blob: str, target_blob: str,
+               ruleset: Optional[dict] = None) -> int:
+    """
+    Records a queued job that checks the pair against `ruleset` (None: the default rules).
+    Must run in the same transaction as the validation_history insert so a committed upload
+    always has its job.
+    """
+    cursor.execute("""
+        INSERT INTO validation_jobs (history_id, username, source_blob, target_blob, ruleset)
+        VALUES (%s, %s, %s, %s, %s)
+        RETURNING id
+    """, (history_id, username, source_blob, target_blob, json.dumps(ruleset) if ruleset else None))
+    return cursor.fetchone()[0]
+
+
+def create_jobs(cursor, entries: list) -> dict:
+    """
+    `create_job` for many jobs in one statement. `entries` are (history_id, username,
+    source_blob, target_blob, ruleset) tuples; returns {history_id: job_id}.
+    """
+    if not entries:
+        return {}
+    rows = execute_values(cursor, """
+        INSERT INTO validation_jobs (history_id, username, source_blob, target_blob, ruleset)
+        VALUES %s
+        RETURNING history_id, id
+    """, [entry[:4] + (json.dumps(entry[4]) if entry[4] else None,) for entry in entries], page_size=len(entries), fetch=True)
+    return dict(rows)
+
+
+def get_job(conn, job_id: int, username: str) -> Optional[dict]:
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT id, history_id, state, attempts, error, report_id, created_at, started_at, finished_at
+            FROM validation_jobs WHERE id = %s AND username = %s
+        """, (job_id, username))
+        row = cursor.fetchone()
+    if not row:
+        return None
+    keys = ("id", "history_id", "state", "attempts", "error", "report_id", "created_at", "started_at", "finished_at")
+    job = dict(zip(keys, row))
+    for key in ("created_at", "started_at", "finished_at"):
+        job[key] = job[key].isoformat() if job[key] else None
+    return job
+
+
+def _claim_job(conn, job_id: int, lease_seconds: float) -> Optional[dict]:
+    """Moves a job from queued to running; returns None if it was cancelled or taken."""
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                UPDATE validation_jobs
+                SET state = 'running', attempts = attempts + 1, started_at = now(), error = NULL,
+                    lease_expires_at = now() + %s * INTERVAL '1 second'
+                WHERE id = %s AND state = 'queued' AND (run_after IS NULL OR run_after <= now())
+                RETURNING id, history_id, username, source_blob, target_blob, attempts, ruleset
+            """, (lease_seconds, job_id))
+            row = cursor.fetchone()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    if not row:
+        return None
+    job = dict(zip(("id", "history_id", "username", "source_blob", "target_blob", "attempts", "ruleset"), row))
+    if isinstance(job["ruleset"], str):
+        job["ruleset"] = json.loads(job["ruleset"])
+    return job
+
+
+def _complete_job(conn, job: dict, result, profile: dict, overview: Optional[dict]) -> Optional[int]:
+    """
+    Settles the job, stores the report, profile and detailed overview and settles the
+    history row in one transaction. Returns the report id, or None if the job was cancelled
+    or re-claimed by another runner meanwhile (nothing is stored then).
+    """
+    from checks_engine import save_checks_report
+    from profiler import save_profile
+    from reconcile import save_overview
+    report_name = f"{os.path.basename(job['source_blob'])} vs {os.path.basename(job['target_blob'])}"
+    try:
+        with conn.cursor() as cursor:
+            # Taking the job row first also makes a concurrent cancel wait for this commit.
+            cursor.execute("""
+                UPDATE validation_jobs SET state = 'done', finished_at = now(), lease_expires_at = NULL
+                WHERE id = %s AND state = 'running' AND attempts = %s
+                RETURNING id
+            """, (job["id"], job["attempts"]))
+            if not cursor.fetchone():
+                conn.rollback()
+                return None
+            report_id = save_checks_report(cursor, job["username"], report_name, result)
+            save_profile(cursor, report_id, job["username"], profile)
+            if overview is not None:
+                save_overview(cursor, report_id, job["username"], overview)
+            cursor.execute("UPDATE validation_jobs SET report_id = %s WHERE id = %s", (report_id, job["id"]))
+            cursor.execute("SELECT is_valid FROM validation_history WHERE id = %s FOR UPDATE", (job["history_id"],))
+            row = cursor.fetchone()
+            if row:
+                cursor.execute("UPDATE validation_history SET is_valid = %s WHERE id = %s", (result.passed, job["history_id"]))
+                rollups.record_validation_outcome(cursor, job["username"], bool(row[0]), result.passed)
+                content_store.record_result(cursor, job["history_id"], report_id, result.passed, ruleset_key(job.get("ruleset")))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return report_id
+
+
+def _fail_job(conn, job: dict, error: str, retry_in: Optional[float]):
+    """
+    Re-queues the job to run no earlier than `retry_in` seconds from now, or marks it
+    failed. A no-op if the job was cancelled or re-claimed by another runner meanwhile.
+    """
+    try:
+        with conn.cursor() as cursor:
+            if retry_in is None:
+                cursor.execute("""
+                    UPDATE validation_jobs SET state = 'failed', error = %s, finished_at = now(), lease_expires_at = NULL
+                    WHERE id = %s AND state = 'running' AND attempts = %s
+                """, (error[:2000], job["id"], job["attempts"]))
+            else:
+                cursor.execute("""
+                    UPDATE validation_jobs
+                    SET state = 'queued', error = %s, run_after = now() + %s * INTERVAL '1 second', lease_expires_at = NULL
+                    WHERE id = %s AND state = 'running' AND attempts = %s
+                """, (error[:2000], retry_in, job["id"], job["attempts"]))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def cancel_job(conn, job_id: int, username: str) -> Optional[str]:
+    """Cancels a queued or running job; returns the state it was in, or None if not cancellable."""
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT state FROM validation_jobs WHERE id = %s AND username = %s FOR UPDATE",
+                (job_id, username)
+            )
+            row = cursor.fetchone()
+            if row and row[0] in ("queued", "running"):
+                cursor.execute(
+                    "UPDATE validation_jobs SET state = 'cancelled', finished_at = now() WHERE id = %s",
+                    (job_id,)
+                )
+            else:
+                row = None
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return row[0] if row else None
+
+
+def queued_job_owner(conn, job_id: int) -> Optional[str]:
+    """The username of a job that is still queued, or None."""
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT username FROM validation_jobs WHERE id = %s AND state = 'queued'", (job_id,))
+            row = cursor.fetchone()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return row[0] if row else None
+
+
+def _release_job(conn, job: dict):
+    """
+    Puts a claimed job back in the queue without counting the attempt, for failures of the
+    runner rather than of the job.
+    """
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                UPDATE validation_jobs SET state = 'queued', attempts = attempts - 1, lease_expires_at = NULL
+                WHERE id = %s AND state = 'running' AND attempts = %s
+            """, (job["id"], job["attempts"]))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def _renew_leases(conn, job_ids: list, lease_seconds: float):
+    """Extends the lease on those of `job_ids` that are still running."""
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                UPDATE validation_jobs SET lease_expires_at = now() + %s * INTERVAL '1 second'
+                WHERE id = ANY(%s) AND state = 'running'
+            """, (lease_seconds, job_ids))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def _pending_jobs(conn, limit: int = 1000) -> list:
+    """
+    Returns queued jobs as (id, username), first re-queueing running jobs whose lease has
+    expired (their runner died). Jobs claimed before leases existed have none and are
+    re-queued an hour after they started, as before.
+    """
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                UPDATE validation_jobs SET state = 'queued', lease_expires_at = NULL
+                WHERE state = 'running' AND (
+                    lease_expires_at < now()
+                    OR (lease_expires_at IS NULL AND started_at < now() - INTERVAL '1 hour')
+                )
+            """)
+            cursor.execute("""
+                SELECT id, username FROM validation_jobs
+                WHERE state = 'queued' AND (run_after IS NULL OR run_after <= now())
+                ORDER BY created_at LIMIT %s
+            """, (limit,))
+            rows = cursor.fetchall()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return rows
+
+
+# --------------------------------------------------
+# Worker process
+# --------------------------------------------------
+_worker_bucket = None
+_worker_local_root = None
+_worker_columnar_cache = None
+
+# Uploads are parsed once into Arrow files cached per worker host (see columnar.py);
+# set COLUMNAR_CACHE_MAX_BYTES=0 to read the CSVs directly.
+COLUMNAR_CACHE_DIR = os.getenv("COLUMNAR_CACHE_DIR", os.path.join(os.getenv("TMPDIR", "/tmp"), "columnar-cache"))
+COLUMNAR_CACHE_MAX_BYTES = int(os.getenv("COLUMNAR_CACHE_MAX_BYTES", str(10 * 1024 ** 3)))
+
+# Each job also reconciles target against source (reconcile.py) into the report's detailed
+# overview. Jobs already run in parallel across the pool, so one job compares its
+# partitions in-process unless RECONCILE_WORKERS says otherwise.
+RECONCILE_ENABLED = os.getenv("RECONCILE_ENABLED", "true").lower() in ("1", "true", "yes")
+RECONCILE_KEY_COLUMNS = [c.strip() for c in os.getenv("RECONCILE_KEY_COLUMNS", "").split(",") if c.strip()]
+RECONCILE_PARTITIONS = int(os.getenv("RECONCILE_PARTITIONS", "64"))
+RECONCILE_WORKERS = int(os.getenv("RECONCILE_WORKERS", "1"))
+RECONCILE_SPILL_DIR = os.getenv("RECONCILE_SPILL_DIR") or None
+
+
+def _init_worker(local_root: Optional[str]):
+    """
+    Process-pool initializer. Workers read uploads from `local_root` when set (one-machine
+    testing), otherwise from GCS with the same credentials as the API.
+    """
+    global _worker_bucket, _worker_local_root, _worker_columnar_cache
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
+    _worker_local_root = local_root
+    if COLUMNAR_CACHE_MAX_BYTES > 0:
+        from columnar import ColumnarCache
+        _worker_columnar_cache = ColumnarCache(COLUMNAR_CACHE_DIR, COLUMNAR_CACHE_MAX_BYTES)
+    if local_root:
+        return
+    from google.cloud import storage
+    from google.oauth2 import service_account
+    credentials = service_account.Credentials.from_service_account_info(
+        json.loads(os.environ["GOOGLE_APPLICATION_CREDENTIALS_JSON"])
+    )
+    _worker_bucket = storage.Client(credentials=credentials).bucket(os.environ["BUCKET_NAME"])
+
+
+def _opener(blob_name: str):
+    from checks_engine import gcs_opener, local_opener
+    if _worker_columnar_cache is not None:
+        try:
+            if _worker_local_root:
+                return _worker_columnar_cache.fetch_local(_worker_local_root, blob_name)
+            return _worker_columnar_cache.fetch_gcs(_worker_bucket, blob_name)
+        except Exception as e:
+            logger.warning(f"Columnar copy of {blob_name} unavailable, reading CSV: {e}")
+    if _worker_local_root:
+        return local_opener(os.path.join(_worker_local_root, blob_name))
+    return gcs_opener(_worker_bucket, blob_name)
+
+
+def reconcile_pair(source_blob: str, target_blob: str) -> Optional[dict]:
+    """
+    Reconciles target against source on RECONCILE_KEY_COLUMNS when both files have them,
+    otherwise on reconcile.default_key_columns. None if the files share no column.
+    """
+    from checks_engine import column_names
+    from reconcile import default_key_columns, reconcile
+    source_names, target_names = column_names(_opener(source_blob)), column_names(_opener(target_blob))
+    key_columns = RECONCILE_KEY_COLUMNS
+    if not key_columns or any(c not in source_names or c not in target_names for c in key_columns):
+        key_columns = default_key_columns(source_names, target_names)
+    if not key_columns:
+        logger.info(f"Skipping reconciliation of {source_blob} and {target_blob}: no shared columns")
+        return None
+    return reconcile(
+        _opener(source_blob), _opener(target_blob), key_columns,
+        num_partitions=RECONCILE_PARTITIONS, workers=RECONCILE_WORKERS, spill_dir=RECONCILE_SPILL_DIR,
+    )
+
+
+def run_validation(source_blob: str, target_blob: str, ruleset: Optional[dict] = None):
+    """
+    Runs in a worker process. Checks the pair against `ruleset`, the job's snapshot of the
+    user's rules (None: checks_engine.default_rules). Returns (CheckResult, profile dict,
+    detailed overview dict or None) for the pair.
+    """
+    from checks_engine import run_checks
+    from profiler import profile_file
+    result = run_checks(_opener(source_blob), _opener(target_blob), ruleset)
+    profile = profile_file(_opener(source_blob))
+    overview = reconcile_pair(source_blob, target_blob) if RECONCILE_ENABLED else None
+    return result, profile, overview
+
+
+# --------------------------------------------------
+# Scheduling
+# --------------------------------------------------
+class FairQueue:
+    """
+    Round-robin over users, FIFO within a user, so one user's burst of uploads cannot
+    starve everyone else.
+    """
+
+    def __init__(self):
+        self._users: OrderedDict = OrderedDict()
+
+    def __len__(self) -> int:
+        return sum(len(q) for q in self._users.values())
+
+    def push(self, username: str, job_id: int):
+        queue = self._users.setdefault(username, deque())
+        if job_id not in queue:
+            queue.append(job_id)
+
+    def pop(self, busy_users=()) -> Optional[tuple]:
+        """Next (username, job_id) from the first user not in `busy_users`, rotating that user to the back."""
+        for username in list(self._users):
+            if username in busy_users:
+                continue
+            queue = self._users.pop(username)
+            job_id = queue.popleft()
+            if queue:
+                self._users[username] = queue
+            return username, job_id
+        return None
+
+    def remove(self, job_id: int) -> bool:
+        for username, queue in list(self._users.items()):
+            if job_id in queue:
+                queue.remove(job_id)
+                if not queue:
+                    del self._users[username]
+                return True
+        return False
+
+
+class JobRunner:
+    """
+    Dispatches queued jobs onto a process pool with at most `workers` jobs in flight and at
+    most `per_user` per user. `poll_interval` > 0 also picks up jobs queued by other
+    processes; it is always used once at start to recover jobs left behind by a restart.
+    A claimed job is leased for `lease_seconds` and the lease is renewed every third of
+    that while the job runs, so only jobs of a runner that died are recovered.
+    With `lock_path`, only the process holding an exclusive lock on that file runs jobs;
+    the others wait to take over and leave what they enqueue to its polling.
+    `on_status(username, event)` is called on the event loop whenever a job this runner
+    handles changes state.
+    """
+
+    def __init__(self, engine, workers: int = 2, per_user: int = 1, max_attempts: int = 3,
+                 backoff_base: float = 5.0, backoff_max: float = 300.0, poll_interval: float = 0.0,
+                 lease_seconds: float = 60.0, local_root: Optional[str] = None, lock_path: Optional[str] = None,
+                 on_complete=None, on_status=None):
+        self.engine = engine
+        self.workers = workers
+        self.per_user = per_user
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.local_root = local_root
+        self.lock_path = lock_path
+        self.on_complete = on_complete
+        self.on_status = on_status
+        self._queue = FairQueue()
+        self._running: dict = {}
+        self._cancelled: set = set()
+        self._pool: ProcessPoolExecutor | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._tasks: list = []
+        self._jobs: set = set()
+        self._stopping = False
+        self._lock_file = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    def running_count(self) -> int:
+        """Jobs this runner has in flight."""
+        return len(self._running)
+
+    def queued_count(self) -> int:
+        """Jobs waiting in this runner's queue."""
+        return len(self._queue)
+
+    async def start(self):
+        if not self.enabled:
+            return
+        self._stopping = False
+        if self.lock_path and not self._acquire_lock():
+            logger.info(f"Validation jobs run in the process holding {self.lock_path}; waiting to take over")
+            self._tasks = [asyncio.create_task(self._await_lock(), name="job-lock")]
+            return
+        await self._start()
+
+    async def _start(self):
+        self._pool = self._new_pool()
+        self._wakeup = asyncio.Event()
+        await self._recover()
+        self._tasks = [
+            asyncio.create_task(self._dispatch(), name="job-dispatch"),
+            asyncio.create_task(self._heartbeat(), name="job-heartbeat"),
+        ]
+        if self.poll_interval > 0:
+            self._tasks.append(asyncio.create_task(self._poll(), name="job-poll"))
+
+    async def stop(self):
+        """Stops dispatching; in-flight jobs stay `running` and are recovered once their lease expires."""
+        self._stopping = True
+        if self._wakeup is not None:
+            self._wakeup.set()
+        for task in self._tasks + list(self._jobs):
+            task.cancel()
+        await asyncio.gather(*self._tasks, *self._jobs, return_exceptions=True)
+        self._tasks = []
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def _acquire_lock(self) -> bool:
+        # flock is released by the kernel when the holder exits, so a crashed runner's
+        # lock is taken over; spawned pool processes do not inherit the descriptor.
+        lock_file = open(self.lock_path, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    async def _await_lock(self):
+        while not self._stopping:
+            await asyncio.sleep(self.poll_interval or self.lease_seconds)
+            if self._acquire_lock():
+                logger.info(f"Took over validation jobs from {self.lock_path}")
+                await self._start()
+                return
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        # spawn, not fork: the API process has live threads (JWKS refresh, DB pool)
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.local_root,),
+        )
+
+    def _replace_pool(self, broken: ProcessPoolExecutor):
+        """Replaces a pool left broken by a worker process that died (e.g. killed for memory)."""
+        if self._pool is not broken or self._stopping:
+            return  # another job already replaced it
+        logger.error("Validation process pool is broken; starting a new one")
+        broken.shutdown(wait=False, cancel_futures=True)
+        self._pool = self._new_pool()
+
+    def enqueue(self, job_id: int, username: str):
+        """Schedules a job already recorded as queued in the database."""
+        if not self.enabled or self._pool is None:
+            return
+        self._queue.push(username, job_id)
+        self._wakeup.set()
+
+    async def cancel(self, job_id: int, username: str) -> Optional[str]:
+        previous = await run_in_threadpool(self._with_conn, cancel_job, job_id, username)
+        if previous:
+            self._queue.remove(job_id)
+            if job_id in self._running:
+                # A running task cannot be interrupted; its result is discarded instead.
+                self._cancelled.add(job_id)
+            self._notify(username, job_id, "cancelled")
+        return previous
+
+    def _notify(self, username: str, job_id: int, state: str, **details):
+        if self.on_status is None:
+            return
+        try:
+            self.on_status(username, {"job_id": job_id, "state": state, **details})
+        except Exception as e:
+            logger.warning(f"Status callback for job {job_id} failed: {e}")
+
+    def _with_conn(self, fn, *args):
+        conn = self.engine.raw_connection()
+        try:
+            return fn(conn, *args)
+        finally:
+            conn.close()
+
+    async def _recover(self):
+        try:
+            rows = await run_in_threadpool(self._with_conn, _pending_jobs)
+        except Exception as e:
+            logger.error(f"Failed to load pending validation jobs: {e}")
+            return
+        for job_id, username in rows:
+            if job_id not in self._running:
+                self._queue.push(username, job_id)
+        if rows:
+            self._wakeup.set()
+
+    async def _poll(self):
+        while not self._stopping:
+            await asyncio.sleep(self.poll_interval)
+            await self._recover()
+
+    async def _heartbeat(self):
+        while not self._stopping:
+            await asyncio.sleep(self.lease_seconds / 3)
+            if not self._running:
+                continue
+            try:
+                await run_in_threadpool(self._with_conn, _renew_leases, list(self._running), self.lease_seconds)
+            except Exception as e:
+                logger.error(f"Failed to renew validation job leases: {e}")
+
+    def _busy_users(self) -> set:
+        counts = {}
+        for username in self._running.values():
+            counts[username] = counts.get(username, 0) + 1
+        return {u for u, n in counts.items() if n >= self.per_user}
+
+    async def _dispatch(self):
+        while not self._stopping:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while len(self._running) < self.workers:
+                picked = self._queue.pop(self._busy_users())
+                if picked is None:
+                    break
+                username, job_id = picked
+                self._running[job_id] = username
+                # The loop keeps only weak references to tasks; hold each job's until it ends.
+                task = asyncio.create_task(self._execute(job_id, username), name=f"job-{job_id}")
+                self._jobs.add(task)
+                task.add_done_callback(self._jobs.discard)
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _execute(self, job_id: int, username: str):
+        try:
+            job = await run_in_threadpool(self._with_conn, _claim_job, job_id, self.lease_seconds)
+            if job is None:
+                return
+            self._notify(username, job_id, "running", history_id=job["history_id"], attempt=job["attempts"])
+            loop = asyncio.get_running_loop()
+            pool = self._pool
+            try:
+                result, profile, overview = await loop.run_in_executor(
+                    pool, run_validation, job["source_blob"], job["target_blob"], job.get("ruleset"),
+                )
+                if job_id in self._cancelled:
+                    logger.info(f"Discarding result of cancelled job {job_id}")
+                    return
+                report_id = await run_in_threadpool(self._with_conn, _complete_job, job, result, profile, overview)
+            except BrokenProcessPool as e:
+                # A worker process died, possibly running another job; not this job's failure.
+                logger.error(f"Validation job {job_id} lost its worker process: {e}")
+                self._replace_pool(pool)
+                await run_in_threadpool(self._with_conn, _release_job, job)
+                self._notify(username, job_id, "queued", history_id=job["history_id"])
+                self.enqueue(job_id, username)
+                return
+            except Exception as e:
+                retry_in = self._backoff(job["attempts"]) if job["attempts"] < self.max_attempts else None
+                logger.error(f"Validation job {job_id} attempt {job['attempts']} failed: {e}", exc_info=True)
+                error = f"{type(e).__name__}: {e}"
+                await run_in_threadpool(self._with_conn, _fail_job, job, error, retry_in)
+                if retry_in is not None:
+                    logger.info(f"Retrying job {job_id} in {retry_in:.1f}s")
+                    self._notify(username, job_id, "queued", history_id=job["history_id"], error=error, retry_in=round(retry_in, 1))
+                    asyncio.get_running_loop().call_later(retry_in, self.enqueue, job_id, username)
+                else:
+                    self._notify(username, job_id, "failed", history_id=job["history_id"], error=error)
+                return
+            if report_id is not None:
+                logger.info(f"Validation job {job_id} for '{username}' stored report {report_id}")
+                if self.on_complete:
+                    await run_in_threadpool(self.on_complete, username)
+                self._notify(username, job_id, "done", history_id=job["history_id"], report_id=report_id, passed=result.passed)
+        except Exception as e:
+            logger.error(f"Validation job {job_id} could not be processed: {e}", exc_info=True)
+        finally:
+            self._running.pop(job_id, None)
+            self._cancelled.discard(job_id)
+            if self._wakeup is not None:
+                self._wakeup.set()
+
+
+# --------------------------------------------------
+# Standalone worker
+# --------------------------------------------------
+async def _serve(runner: JobRunner, hub=None):
+    if hub is not None:
+        await hub.start()
+    await runner.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.stop()
+        if hub is not None:
+            await hub.stop()
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    from sqlalchemy import create_engine
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Run validation jobs from the validation_jobs table")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("JOB_WORKERS", "2")))
+    parser.add_argument("--per-user", type=int, default=int(os.getenv("JOB_MAX_PER_USER", "1")))
+    parser.add_argument("--poll", type=float, default=float(os.getenv("JOB_POLL_SECONDS", "2")))
+    parser.add_argument("--lease", type=float, default=float(os.getenv("JOB_LEASE_SECONDS", "60")), help="Seconds a running job is leased for")
+    parser.add_argument("--local-root", default=os.getenv("JOB_LOCAL_ROOT"), help="Read uploads from this directory instead of GCS")
+    args = parser.parse_args()
+
+    engine = create_engine(os.environ["DATABASE_URL"], pool_pre_ping=True)
+    # Job status reaches the API's event streams through the status_events table.
+    hub = None
+    if os.getenv("STATUS_EVENTS_BACKEND", "database") == "database":
+        from status_events import StatusHub
+        hub = StatusHub("database", engine)
+    runner = JobRunner(
+        engine,
+        workers=args.workers, per_user=args.per_user, poll_interval=args.poll, lease_seconds=args.lease,
+        local_root=args.local_root,
+        on_status=(lambda username, event: hub.publish(username, "job", event)) if hub else None,
+    )
+    try:
+        asyncio.run(_serve(runner, hub))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,161 @@
+# jwks.py
+
+import logging
+import threading
+import time
+from typing import NamedTuple, Optional
+
+import requests
+from jose import jwk
+from jose.exceptions import JWKError
+
+from metrics import span
+
+logger = logging.getLogger(__name__)
+
+
+class JWKSFetchError(Exception):
+    """Raised when the key set cannot be fetched and no previously fetched keys exist."""
+
+
+class SigningKey(NamedTuple):
+    key: object
+    alg: str
+
+
+class JWKSKeyStore:
+    """
+    Rotating store for the issuer's JSON Web Key Set.
+
+    - Keys are pre-constructed once per fetch and indexed by `kid`, so verification
+      is a dict lookup instead of a list scan plus `jwk.construct`.
+    - `start()` prefetches the key set and launches a daemon thread that refreshes it
+      every `ttl` seconds, so Kinde key rotations are picked up without a restart.
+    - A token signed with an unknown `kid` triggers an immediate refetch. Refetches are
+      single-flight (concurrent misses wait for one fetch) and rate limited to one per
+      `min_refetch_interval` seconds so garbage `kid`s cannot hammer the issuer.
+    - A failed refresh keeps serving the last good key set.
+    """
+
+    def __init__(
+        self,
+        issuer_url: str,
+        jwks_uri: Optional[str] = None,
+        ttl: float = 3600,
+        min_refetch_interval: float = 30,
+        http_timeout: float = 5,
+    ):
+        self.issuer_url = issuer_url.rstrip("/")
+        self.jwks_uri = jwks_uri
+        self.ttl = ttl
+        self.min_refetch_interval = min_refetch_interval
+        self.http_timeout = http_timeout
+
+        self._keys: dict[str, SigningKey] = {}
+        self._last_fetch: Optional[float] = None
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._session = requests.Session()
+
+    # --------------------------------------------------
+    # Lifecycle
+    # --------------------------------------------------
+    def start(self):
+        """Prefetches the key set and starts the background refresher."""
+        try:
+            self.refresh()
+        except JWKSFetchError as e:
+            logger.warning("JWKS prefetch failed, keys will be fetched on demand: %s", e)
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._refresh_loop, name="jwks-refresh", daemon=True)
+            self._thread.start()
+
+    @property
+    def has_keys(self) -> bool:
+        return bool(self._keys)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.http_timeout)
+            self._thread = None
+
+    def _refresh_loop(self):
+        while not self._stop.wait(self.ttl):
+            try:
+                self.refresh()
+            except JWKSFetchError as e:
+                logger.error("Background JWKS refresh failed: %s", e)
+
+    # --------------------------------------------------
+    # Fetching
+    # --------------------------------------------------
+    def _fetch_jwks(self) -> dict:
+        with span("jwks_fetch"):
+            try:
+                if not self.jwks_uri:
+                    config_url = f"{self.issuer_url}/.well-known/openid-configuration"
+                    config_resp = self._session.get(config_url, timeout=self.http_timeout)
+                    config_resp.raise_for_status()
+                    jwks_uri = config_resp.json().get("jwks_uri")
+                    if not jwks_uri:
+                        raise JWKSFetchError("JWKS URI not found")
+                    self.jwks_uri = jwks_uri
+                jwks_resp = self._session.get(self.jwks_uri, timeout=self.http_timeout)
+                jwks_resp.raise_for_status()
+                return jwks_resp.json()
+            except (requests.RequestException, ValueError) as e:
+                raise JWKSFetchError(f"Failed to fetch JWKS: {e}") from e
+
+    def refresh(self):
+        """Fetches the key set and atomically swaps in the newly constructed keys."""
+        with self._refresh_lock:
+            self._refresh_locked()
+
+    def _refresh_locked(self):
+        self._last_fetch = time.monotonic()
+        jwks = self._fetch_jwks()
+        keys = {}
+        for key_data in jwks.get("keys", []):
+            kid = key_data.get("kid")
+            if not kid:
+                continue
+            alg = key_data.get("alg", "RS256")
+            try:
+                keys[kid] = SigningKey(key=jwk.construct(key_data, alg), alg=alg)
+            except JWKError as e:
+                logger.warning("Skipping unusable JWK %s: %s", kid, e)
+        self._keys = keys
+        logger.info("JWKS refreshed: %d key(s)", len(keys))
+
+    # --------------------------------------------------
+    # Lookup
+    # --------------------------------------------------
+    def get_key(self, kid: str) -> Optional[SigningKey]:
+        """
+        Returns the constructed key for `kid`, refetching the key set once (rate limited)
+        if it is unknown. Returns None if the key still cannot be found.
+        """
+        key = self._keys.get(kid)
+        if key is not None:
+            return key
+
+        with self._refresh_lock:
+            # Another request may have refreshed while we waited for the lock.
+            key = self._keys.get(kid)
+            if key is not None:
+                return key
+            if self._last_fetch is not None and time.monotonic() - self._last_fetch < self.min_refetch_interval:
+                if not self._keys:
+                    raise JWKSFetchError("JWKS unavailable, retry later")
+                return None
+            try:
+                self._refresh_locked()
+            except JWKSFetchError:
+                if not self._keys:
+                    raise
+                logger.error("JWKS refetch for unknown kid %s failed", kid, exc_info=True)
+                return None
+        return self._keys.get(kid)
@@ -0,0 +1,155 @@
+# cold_start.py
+#
+# Startup-time benchmark. For each run, in a fresh interpreter:
+# - import time of `main` (what a worker pays before it can even start warming up);
+# - time from spawning `uvicorn main:app` to the first 200 from /readyz, i.e. the
+#   lifespan warm-up included, plus the per-component warm-up times it reports;
+# - latency of the first authenticated request against that instance and of the
+#   request after it, which should match once warm-up has done its job.
+# Runs against the same local stand-ins as run_suite.py.
+#
+#   python loadtest/cold_start.py --runs 5
+#   python loadtest/cold_start.py --importtime      # plus the slowest imports
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from standins import BACKEND_DIR, LocalIssuer, ThrowawayCockroach, apply_schema, free_port, seed
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+
+
+def measure_import(env: dict) -> float:
+    out = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET], cwd=BACKEND_DIR, env=env, check=True,
+        capture_output=True, text=True,
+    ).stdout
+    return float(out.strip().splitlines()[-1])
+
+
+def slowest_imports(env: dict, top: int = 15) -> list:
+    """(cumulative seconds, module) for the slowest imports under `python -X importtime`."""
+    err = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"], cwd=BACKEND_DIR, env=env,
+        check=True, capture_output=True, text=True,
+    ).stderr
+    rows = []
+    for line in err.splitlines():
+        if line.startswith("import time:") and "|" in line and "cumulative" not in line:
+            _, cumulative, module = line[len("import time:"):].split("|")
+            rows.append((int(cumulative) / 1e6, module.rstrip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def measure_boot(env: dict, token: str) -> dict:
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        ready = None
+        with httpx.Client(timeout=5) as client:
+            while time.perf_counter() - start < 120:
+                try:
+                    ready = client.get(f"{base}/readyz")
+                    if ready.status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.01)
+            else:
+                raise RuntimeError("API did not become ready within 120s")
+            ready_after = time.perf_counter() - start
+
+            latencies = []
+            for _ in range(2):
+                t = time.perf_counter()
+                response = client.get(f"{base}/api/profile", headers={"Authorization": f"Bearer {token}"})
+                latencies.append(time.perf_counter() - t)
+        return {
+            "ready": ready_after,
+            "components": ready.json()["components"],
+            "first_request": latencies[0],
+            "second_request": latencies[1],
+            "status": response.status_code,
+        }
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+def _ms(values) -> str:
+    return f"{statistics.median(values) * 1000:9.1f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start benchmark of the API")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--database-url", help="use this database instead of a throwaway CockroachDB")
+    parser.add_argument("--importtime", action="store_true", help="also list the slowest imports")
+    args = parser.parse_args()
+
+    stopping = []
+    try:
+        issuer = LocalIssuer()
+        issuer.start()
+        stopping.append(issuer)
+        database_url = args.database_url
+        if not database_url:
+            db = ThrowawayCockroach()
+            database_url = db.start()
+            stopping.append(db)
+        apply_schema(database_url)
+        user = seed(database_url, 1, 10, 2, 10)[0]
+
+        env = dict(os.environ)
+        env.update({
+            "DATABASE_URL": database_url,
+            "KINDE_ISSUER_URL": issuer.issuer,
+            "KINDE_JWKS_URI": issuer.jwks_uri,
+            "KINDE_AUDIENCE": issuer.audience,
+            "CLIENT_ID": issuer.audience,
+            "CLIENT_SECRET": "loadtest",
+            "KINDE_CALLBACK_URL": "http://127.0.0.1/api/callback",
+            "FRONTEND_URL": "http://localhost:5173",
+            "GOOGLE_APPLICATION_CREDENTIALS_JSON": issuer.service_account_json(),
+            "BUCKET_NAME": "loadtest-bucket",
+            "JOB_WORKERS": env.get("JOB_WORKERS", "0"),
+        })
+        token = issuer.mint(user["sub"])
+
+        imports, boots = [], []
+        for run in range(args.runs):
+            imports.append(measure_import(env))
+            boots.append(measure_boot(env, token))
+            print(f"run {run + 1}: import {imports[-1] * 1000:.0f} ms, ready {boots[-1]['ready'] * 1000:.0f} ms, "
+                  f"first request {boots[-1]['first_request'] * 1000:.1f} ms ({boots[-1]['status']})")
+    finally:
+        for item in reversed(stopping):
+            item.stop()
+
+    print(f"\nmedian of {args.runs} runs (ms)")
+    print(f"  {'import main':<24}{_ms(imports)}")
+    print(f"  {'spawn -> /readyz 200':<24}{_ms([b['ready'] for b in boots])}")
+    for component in boots[0]["components"]:
+        print(f"    {'warm ' + component:<22}{_ms([b['components'][component]['seconds'] for b in boots])}")
+    print(f"  {'first request':<24}{_ms([b['first_request'] for b in boots])}")
+    print(f"  {'second request':<24}{_ms([b['second_request'] for b in boots])}")
+
+    if args.importtime:
+        print("\nslowest imports (cumulative ms)")
+        for seconds, module in slowest_imports(env):
+            print(f"  {seconds * 1000:9.1f}  {module}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# db_pool.py
+#
+# Before/after benchmark of how routes get their database connection, driven from
+# `--concurrency` threads the way the threadpool runs sync routes:
+# - connect: a new psycopg2 connection per request, as get_connection did before the
+#   pooled engine (TCP + CockroachDB session setup on every request);
+# - pooled: engine.raw_connection() from a QueuePool configured like main.py's engine.
+# Each request runs the username lookup every authenticated route makes plus one
+# dashboard-sized query. With --transfer-ms, a second pair of variants mixes in uploads
+# (one request in ten waits that long) that either hold their pooled connection for the
+# transfer, as /api/upload-files did through get_db, or check one out only for the insert.
+# Prints throughput and p50/p95/p99 latency of the non-upload requests per variant.
+#
+#   python loadtest/db_pool.py --requests 2000 --concurrency 32
+#   python loadtest/db_pool.py --requests 2000 --concurrency 32 --transfer-ms 2000
+
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import psycopg2
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+
+from standins import ThrowawayCockroach, apply_schema, dbapi_dsn, seed
+
+
+def query(conn, kinde_id: str):
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT username FROM users WHERE kinde_id = %s", (kinde_id,))
+        username = cursor.fetchone()[0]
+        cursor.execute("SELECT total, successful, failed FROM user_dashboard_rollups WHERE username = %s", (username,))
+        cursor.fetchall()
+    conn.rollback()
+
+
+def run(requests: int, concurrency: int, handle) -> dict:
+    latencies = []
+    lock = threading.Lock()
+
+    def one(i):
+        start = time.perf_counter()
+        if handle(i):
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    elapsed = time.perf_counter() - start
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {"rps": len(latencies) / elapsed, "p50": quantiles[49], "p95": quantiles[94], "p99": quantiles[98]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-request connect vs pooled connections")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--pool-size", type=int, default=10, help="DB_POOL_SIZE")
+    parser.add_argument("--max-overflow", type=int, default=10, help="DB_MAX_OVERFLOW")
+    parser.add_argument("--transfer-ms", type=float, default=0, help="also run the upload mix with transfers this long")
+    parser.add_argument("--database-url", help="use this database instead of a throwaway CockroachDB")
+    args = parser.parse_args()
+
+    db = None
+    try:
+        database_url = args.database_url
+        if not database_url:
+            db = ThrowawayCockroach()
+            database_url = db.start()
+        apply_schema(database_url)
+        kinde_ids = [u["sub"] for u in seed(database_url, 20, 10, 2, 10)]
+        dsn = dbapi_dsn(database_url)
+        engine = create_engine(
+            database_url, poolclass=QueuePool, pool_size=args.pool_size, max_overflow=args.max_overflow,
+            pool_timeout=30, pool_pre_ping=True,
+        )
+
+        def connect(i):
+            conn = psycopg2.connect(dsn)
+            try:
+                query(conn, kinde_ids[i % len(kinde_ids)])
+            finally:
+                conn.close()
+            return True
+
+        def pooled(i):
+            conn = engine.raw_connection()
+            try:
+                query(conn, kinde_ids[i % len(kinde_ids)])
+            finally:
+                conn.close()
+            return True
+
+        def upload_holding(i):
+            if i % 10:
+                return pooled(i)
+            conn = engine.raw_connection()
+            try:
+                time.sleep(args.transfer_ms / 1000)
+                query(conn, kinde_ids[i % len(kinde_ids)])
+            finally:
+                conn.close()
+            return False
+
+        def upload_releasing(i):
+            if i % 10:
+                return pooled(i)
+            time.sleep(args.transfer_ms / 1000)
+            pooled(i)
+            return False
+
+        variants = {"connect per request": connect, "pooled": pooled}
+        if args.transfer_ms:
+            variants["uploads hold conn"] = upload_holding
+            variants["uploads release conn"] = upload_releasing
+        for handle in variants.values():
+            run(min(args.requests, 100), args.concurrency, handle)  # warm the pool and the server
+        results = {name: run(args.requests, args.concurrency, handle) for name, handle in variants.items()}
+        engine.dispose()
+    finally:
+        if db is not None:
+            db.stop()
+
+    print(f"\n{args.requests} requests, {args.concurrency} threads, pool {args.pool_size}+{args.max_overflow}")
+    print(f"  {'variant':<24}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for name, r in results.items():
+        print(f"  {name:<24}{r['rps']:>9.0f}{r['p50'] * 1000:>9.1f}{r['p95'] * 1000:>9.1f}{r['p99'] * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# pubsub_replay.py
+#
+# Replays synthetic Pub/Sub push messages against a running backend, including a share of
+# redeliveries, and checks that exactly one validation_history row exists per event.
+#
+#   uvicorn main:app --port 8080            # pointed at a throwaway database
+#   python loadtest/pubsub_replay.py --messages 5000 --duplicates 0.3
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import time
+import uuid
+
+import httpx
+
+
+def make_message(username: str, generation: int) -> dict:
+    object_id = f"{username}/uploads/{generation}_replay.csv"
+    return {
+        "message": {
+            "data": base64.b64encode(json.dumps({"name": object_id}).encode()).decode(),
+            "messageId": str(uuid.uuid4()),
+            "attributes": {
+                "bucketId": "replay-bucket",
+                "objectId": object_id,
+                "objectGeneration": str(generation),
+                "eventType": "OBJECT_FINALIZE",
+            },
+        },
+        "subscription": "projects/local/subscriptions/replay",
+    }
+
+
+async def replay(base_url: str, messages: list, concurrency: int) -> list:
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+        async def push(body):
+            async with semaphore:
+                start = time.perf_counter()
+                resp = await client.post("/pubsub-handler", json=body)
+                latencies.append(time.perf_counter() - start)
+                resp.raise_for_status()
+        await asyncio.gather(*(push(m) for m in messages))
+    return latencies
+
+
+def count_rows(database_url: str, username: str) -> int:
+    from sqlalchemy import create_engine, text
+    engine = create_engine(database_url, future=True)
+    with engine.connect() as conn:
+        return conn.execute(
+            text("SELECT COUNT(*) FROM validation_history WHERE username = :u"), {"u": username}
+        ).scalar_one()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--base-url", default="http://localhost:8080")
+    parser.add_argument("--messages", type=int, default=5000, help="distinct events to send")
+    parser.add_argument("--duplicates", type=float, default=0.3, help="fraction of events redelivered")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    args = parser.parse_args()
+
+    username = f"replay-{uuid.uuid4().hex[:8]}"
+    generations = range(1, args.messages + 1)
+    messages = [make_message(username, g) for g in generations]
+    # Redeliveries carry a new messageId but the same object generation, like real GCS retries.
+    messages += [make_message(username, g) for g in random.sample(generations, int(args.messages * args.duplicates))]
+    random.shuffle(messages)
+
+    start = time.perf_counter()
+    latencies = sorted(asyncio.run(replay(args.base_url, messages, args.concurrency)))
+    elapsed = time.perf_counter() - start
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    print(f"sent {len(messages)} pushes in {elapsed:.2f}s ({len(messages) / elapsed:.0f} msg/s)")
+    print(f"latency p50={pct(0.50):.1f}ms p95={pct(0.95):.1f}ms p99={pct(0.99):.1f}ms")
+    if args.database_url:
+        rows = count_rows(args.database_url, username)
+        status = "OK" if rows == args.messages else "MISMATCH"
+        print(f"rows for {username}: {rows} (expected {args.messages}) {status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+# run_suite.py
+#
+# Reproducible load test of the whole API on one machine. Boots local stand-ins
+# (standins.py: throwaway CockroachDB, fake GCS, local JWKS issuer), seeds synthetic data,
+# starts `uvicorn main:app` against them and drives a weighted mix of dashboard,
+# upload-history, report listing, report detail and upload traffic from closed-loop
+# virtual users. Prints throughput and p50/p95/p99 per endpoint, writes the results as
+# JSON and compares them against a stored baseline, exiting non-zero on regressions.
+#
+#   pip install -r loadtest/requirements.txt
+#   python loadtest/run_suite.py --duration 60 --concurrency 32 --save-baseline
+#   python loadtest/run_suite.py --duration 60 --concurrency 32      # later: flags regressions
+#
+# Pass --database-url / --gcs-url to reuse running services instead of starting them.
+# Baselines are only comparable across runs on the same machine with the same options;
+# they live in loadtest/baselines/<profile>.json.
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import uuid
+from collections import defaultdict
+
+import httpx
+
+from standins import BACKEND_DIR, FakeGCS, LocalIssuer, ThrowawayCockroach, apply_schema, create_bucket, free_port, seed, wait_for
+
+DEFAULT_MIX = "dashboard=30,history=25,reports=20,report_detail=20,upload=5"
+BUCKET = "loadtest-bucket"
+
+
+# --------------------------------------------------
+# Scenarios
+# --------------------------------------------------
+def _csv_payload(rows: int, rng: random.Random) -> bytes:
+    lines = ["customer_id,amount,email"]
+    lines += [f"{i},{rng.random() * 1000:.2f},user{i}@example.com" for i in range(rows)]
+    # Unique content per upload so content-addressed dedup does not short-circuit the path.
+    lines.append(f"{uuid.uuid4().hex},0,nonce@example.com")
+    return ("\n".join(lines) + "\n").encode()
+
+
+async def dashboard(client, user, rng, args):
+    return await client.get("/api/dashboard")
+
+
+async def history(client, user, rng, args):
+    params = {"page_size": 20}
+    if rng.random() < 0.2:
+        params["search"] = f"extract_{rng.randint(0, 99)}"
+    return await client.get("/api/upload-history", params=params)
+
+
+async def reports(client, user, rng, args):
+    return await client.get("/api/reports", params={"limit": 50})
+
+
+async def report_detail(client, user, rng, args):
+    report_id = rng.choice(user["report_ids"])
+    return await client.get(f"/api/reports/{report_id}/checks", params={"limit": 50, "status": "Failed"})
+
+
+async def upload(client, user, rng, args):
+    files = {
+        "source_file": ("source.csv", _csv_payload(args.upload_rows, rng), "text/csv"),
+        "target_file": ("target.csv", _csv_payload(args.upload_rows, rng), "text/csv"),
+    }
+    return await client.post("/api/upload-files", files=files)
+
+
+SCENARIOS = {
+    "dashboard": dashboard,
+    "history": history,
+    "reports": reports,
+    "report_detail": report_detail,
+    "upload": upload,
+}
+
+
+def parse_mix(mix: str) -> dict:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario '{name}' (choose from {', '.join(SCENARIOS)})")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+# --------------------------------------------------
+# Driver
+# --------------------------------------------------
+async def drive(base_url: str, users: list, tokens: dict, weights: dict, args) -> dict:
+    samples = defaultdict(list)
+    errors = defaultdict(int)
+    names = list(weights)
+    weight_values = [weights[n] for n in names]
+    measure_from = time.perf_counter() + args.warmup
+    stop_at = measure_from + args.duration
+
+    async def virtual_user(index: int):
+        rng = random.Random(args.seed * 1000 + index)
+        async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+            while True:
+                now = time.perf_counter()
+                if now >= stop_at:
+                    return
+                user = rng.choice(users)
+                client.headers["Authorization"] = f"Bearer {tokens[user['sub']]}"
+                name = rng.choices(names, weights=weight_values)[0]
+                start = time.perf_counter()
+                try:
+                    resp = await SCENARIOS[name](client, user, rng, args)
+                    ok = resp.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                elapsed = time.perf_counter() - start
+                if start >= measure_from:
+                    samples[name].append(elapsed)
+                    if not ok:
+                        errors[name] += 1
+
+    await asyncio.gather(*(virtual_user(i) for i in range(args.concurrency)))
+    return summarize(samples, errors, args.duration)
+
+
+def percentile(sorted_values: list, p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+def summarize(samples: dict, errors: dict, duration: float) -> dict:
+    endpoints = {}
+    for name, values in samples.items():
+        values.sort()
+        endpoints[name] = {
+            "requests": len(values),
+            "errors": errors.get(name, 0),
+            "rps": round(len(values) / duration, 2),
+            "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(values, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(values, 0.99) * 1000, 2),
+        }
+    total = sum(e["requests"] for e in endpoints.values())
+    return {"total_rps": round(total / duration, 2), "endpoints": endpoints}
+
+
+def print_results(results: dict):
+    print(f"\n{'endpoint':<15} {'requests':>9} {'errors':>7} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, e in sorted(results["endpoints"].items()):
+        print(f"{name:<15} {e['requests']:>9} {e['errors']:>7} {e['rps']:>9.1f} {e['p50_ms']:>9.1f} {e['p95_ms']:>9.1f} {e['p99_ms']:>9.1f}")
+    print(f"{'total':<15} {'':>9} {'':>7} {results['total_rps']:>9.1f}")
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Regressions: p95/p99 up or throughput down by more than `tolerance`, or new errors above 1%."""
+    regressions = []
+    for name, current in results["endpoints"].items():
+        before = baseline["endpoints"].get(name)
+        if not before:
+            continue
+        for key in ("p95_ms", "p99_ms"):
+            if before[key] and current[key] > before[key] * (1 + tolerance):
+                regressions.append(f"{name}: {key} {before[key]:.1f} -> {current[key]:.1f}")
+        if before["rps"] and current["rps"] < before["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: rps {before['rps']:.1f} -> {current['rps']:.1f}")
+        if current["errors"] > before["errors"] and current["errors"] > 0.01 * current["requests"]:
+            regressions.append(f"{name}: errors {before['errors']} -> {current['errors']}")
+    return regressions
+
+
+# --------------------------------------------------
+# Orchestration
+# --------------------------------------------------
+def start_api(env: dict, port: int, workers: int) -> subprocess.Popen:
+    cmd = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+           "--workers", str(workers), "--log-level", "warning"]
+    proc = subprocess.Popen(cmd, cwd=BACKEND_DIR, env=env)
+    wait_for(lambda: httpx.get(f"http://127.0.0.1:{port}/readyz", timeout=2).raise_for_status(), timeout=120, what="API")
+    return proc
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backend load-test suite with local stand-ins")
+    parser.add_argument("--duration", type=float, default=60, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=10, help="unmeasured seconds before measuring")
+    parser.add_argument("--concurrency", type=int, default=32, help="closed-loop virtual users")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="scenario=weight,...")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--history-per-user", type=int, default=2000)
+    parser.add_argument("--reports-per-user", type=int, default=200)
+    parser.add_argument("--checks-per-report", type=int, default=500)
+    parser.add_argument("--upload-rows", type=int, default=1000)
+    parser.add_argument("--api-workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--database-url", help="use this database instead of a throwaway CockroachDB")
+    parser.add_argument("--gcs-url", help="use this GCS emulator instead of starting fake-gcs-server")
+    parser.add_argument("--profile", default="default", help="baseline name")
+    parser.add_argument("--baseline-dir", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines"))
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    parser.add_argument("--output", help="write results JSON here")
+    args = parser.parse_args()
+    weights = parse_mix(args.mix)
+
+    stopping = []
+    try:
+        issuer = LocalIssuer()
+        issuer.start()
+        stopping.append(issuer)
+
+        database_url = args.database_url
+        if not database_url:
+            db = ThrowawayCockroach()
+            database_url = db.start()
+            stopping.append(db)
+        apply_schema(database_url)
+        print(f"Seeding {args.users} users ...")
+        users = seed(database_url, args.users, args.history_per_user, args.reports_per_user, args.checks_per_report, args.seed)
+
+        gcs_url = args.gcs_url
+        if not gcs_url:
+            try:
+                gcs = FakeGCS()
+                gcs_url = gcs.start()
+                stopping.append(gcs)
+            except RuntimeError as e:
+                print(f"GCS emulator unavailable ({e}); dropping the upload scenario")
+                weights.pop("upload", None)
+        if gcs_url:
+            create_bucket(gcs_url, BUCKET)
+
+        port = free_port()
+        env = dict(os.environ)
+        env.update({
+            "DATABASE_URL": database_url,
+            "KINDE_ISSUER_URL": issuer.issuer,
+            "KINDE_JWKS_URI": issuer.jwks_uri,
+            "KINDE_AUDIENCE": issuer.audience,
+            "CLIENT_ID": issuer.audience,
+            "CLIENT_SECRET": "loadtest",
+            "KINDE_CALLBACK_URL": f"http://127.0.0.1:{port}/api/callback",
+            "FRONTEND_URL": "http://localhost:5173",
+            "GOOGLE_APPLICATION_CREDENTIALS_JSON": issuer.service_account_json(),
+            "BUCKET_NAME": BUCKET,
+            "JOB_WORKERS": env.get("JOB_WORKERS", "0"),
+        })
+        if gcs_url:
+            env["STORAGE_EMULATOR_HOST"] = gcs_url
+        api = start_api(env, port, args.api_workers)
+        stopping.append(api)
+
+        tokens = {u["sub"]: issuer.mint(u["sub"], ttl=int(args.warmup + args.duration) + 600) for u in users}
+        print(f"Driving {args.concurrency} virtual users for {args.warmup:.0f}s warmup + {args.duration:.0f}s ({', '.join(weights)})")
+        results = asyncio.run(drive(f"http://127.0.0.1:{port}", users, tokens, weights, args))
+    finally:
+        for item in reversed(stopping):
+            if isinstance(item, subprocess.Popen):
+                item.terminate()
+                item.wait(timeout=30)
+            else:
+                item.stop()
+
+    results["options"] = {k: v for k, v in vars(args).items() if k not in ("database_url", "gcs_url", "output", "baseline_dir", "save_baseline")}
+    results["machine"] = {"platform": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count()}
+    print_results(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    baseline_path = os.path.join(args.baseline_dir, f"{args.profile}.json")
+    if args.save_baseline:
+        os.makedirs(args.baseline_dir, exist_ok=True)
+        with open(baseline_path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline saved to {baseline_path}")
+        return
+    if os.path.exists(baseline_path):
+        with open(baseline_path) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\nRegressions vs {baseline_path} (tolerance {args.tolerance:.0%}):")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print(f"\nNo regressions vs {baseline_path}")
+    else:
+        print(f"\nNo baseline at {baseline_path}; run with --save-baseline to create one")
+
+
+if __name__ == "__main__":
+    main()
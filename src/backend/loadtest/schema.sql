@@ -0,0 +1,37 @@
+-- schema.sql
+-- Base tables the backend expects, for throwaway load-test databases only. Production
+-- databases already have them; the numbered files in ../migrations are applied on top.
+
+CREATE TABLE IF NOT EXISTS users (
+    id INT8 PRIMARY KEY DEFAULT unique_rowid(),
+    username STRING NOT NULL UNIQUE,
+    email STRING,
+    first_name STRING,
+    last_name STRING,
+    kinde_id STRING UNIQUE,
+    password STRING
+);
+
+CREATE TABLE IF NOT EXISTS validation_history (
+    id INT8 PRIMARY KEY DEFAULT unique_rowid(),
+    username STRING NOT NULL,
+    source_file_name STRING,
+    target_file_name STRING,
+    is_valid BOOL NOT NULL DEFAULT false,
+    created_at TIMESTAMP NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS reports (
+    id INT8 PRIMARY KEY DEFAULT unique_rowid(),
+    username STRING NOT NULL,
+    report_name STRING,
+    report_date DATE,
+    status STRING,
+    time TIMESTAMP,
+    data_profiling_url STRING,
+    detailed_overview_url STRING,
+    failed_checks_url STRING,
+    checks JSONB,
+    profiling JSONB,
+    detailedoverview JSONB
+);
@@ -0,0 +1,321 @@
+# standins.py
+#
+# Local stand-ins for the backend's external services, so main:app can be booted and
+# load-tested on one machine without cloud credentials:
+# - ThrowawayCockroach: in-memory single-node CockroachDB (`cockroach` binary or Docker),
+#   with loadtest/schema.sql and ../migrations applied
+# - FakeGCS: fake-gcs-server (binary or Docker), reached through STORAGE_EMULATOR_HOST
+# - LocalIssuer: serves a JWKS plus an OAuth token endpoint and mints RS256 access tokens
+#   that main.py verifies exactly like Kinde's. It also signs the fake GCS service
+#   account, so signed URLs are generated offline.
+# - seed(): synthetic users, upload history and reports of configurable size
+
+import glob
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import psycopg2
+import requests
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+from psycopg2.extras import execute_values
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+COCKROACH_IMAGE = os.getenv("LOADTEST_COCKROACH_IMAGE", "cockroachdb/cockroach:latest-v24.1")
+FAKE_GCS_IMAGE = os.getenv("LOADTEST_FAKE_GCS_IMAGE", "fsouza/fake-gcs-server:latest")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(check, timeout: float = 60.0, what: str = "service"):
+    deadline = time.monotonic() + timeout
+    last_error = None
+    while time.monotonic() < deadline:
+        try:
+            check()
+            return
+        except Exception as e:
+            last_error = e
+            time.sleep(0.25)
+    raise RuntimeError(f"{what} did not become ready within {timeout:.0f}s: {last_error}")
+
+
+def dbapi_dsn(database_url: str) -> str:
+    """The app's SQLAlchemy URL (cockroachdb://...) as a psycopg2 DSN."""
+    scheme, rest = database_url.split("://", 1)
+    return "postgresql://" + rest
+
+
+class _Process:
+    """A stand-in running as a local binary or as a throwaway Docker container."""
+
+    def __init__(self):
+        self._proc = None
+        self._container = None
+
+    def _launch(self, binary: str, binary_args: list, image: str, container_port: int, host_port: int, container_args: list):
+        if shutil.which(binary):
+            self._proc = subprocess.Popen([binary] + binary_args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        elif shutil.which("docker"):
+            self._container = f"dq-loadtest-{binary}-{uuid.uuid4().hex[:8]}"
+            subprocess.run(
+                ["docker", "run", "-d", "--rm", "--name", self._container,
+                 "-p", f"127.0.0.1:{host_port}:{container_port}", image] + container_args,
+                check=True, stdout=subprocess.DEVNULL,
+            )
+        else:
+            raise RuntimeError(f"Neither `{binary}` nor `docker` is available")
+
+    def stop(self):
+        if self._proc:
+            self._proc.terminate()
+            self._proc.wait(timeout=30)
+            self._proc = None
+        if self._container:
+            subprocess.run(["docker", "rm", "-f", self._container], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            self._container = None
+
+
+# --------------------------------------------------
+# Database
+# --------------------------------------------------
+class ThrowawayCockroach(_Process):
+    def __init__(self):
+        super().__init__()
+        self.port = free_port()
+        self.database_url = f"cockroachdb://root@127.0.0.1:{self.port}/defaultdb?sslmode=disable"
+
+    def start(self) -> str:
+        store = "--store=type=mem,size=2GiB"
+        self._launch(
+            "cockroach",
+            ["start-single-node", "--insecure", store, f"--listen-addr=127.0.0.1:{self.port}", "--http-addr=127.0.0.1:0"],
+            COCKROACH_IMAGE, 26257, self.port,
+            ["start-single-node", "--insecure", store],
+        )
+        wait_for(lambda: psycopg2.connect(dbapi_dsn(self.database_url)).close(), what="CockroachDB")
+        return self.database_url
+
+
+def apply_schema(database_url: str):
+    """Applies loadtest/schema.sql then every migration, in order. All statements are idempotent."""
+    files = [os.path.join(BACKEND_DIR, "loadtest", "schema.sql")]
+    files += sorted(glob.glob(os.path.join(BACKEND_DIR, "migrations", "*.sql")))
+    conn = psycopg2.connect(dbapi_dsn(database_url))
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cursor:
+            for path in files:
+                with open(path) as f:
+                    cursor.execute(f.read())
+    finally:
+        conn.close()
+
+
+# --------------------------------------------------
+# GCS
+# --------------------------------------------------
+class FakeGCS(_Process):
+    def __init__(self):
+        super().__init__()
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+
+    def start(self) -> str:
+        args = ["-scheme", "http", "-backend", "memory", "-public-host", f"127.0.0.1:{self.port}", "-external-url", self.url]
+        self._launch(
+            "fake-gcs-server", args + ["-port", str(self.port)],
+            FAKE_GCS_IMAGE, 4443, self.port, args + ["-port", "4443"],
+        )
+        wait_for(lambda: requests.get(f"{self.url}/storage/v1/b", timeout=2).raise_for_status(), what="fake-gcs-server")
+        return self.url
+
+
+def create_bucket(gcs_url: str, name: str):
+    resp = requests.post(f"{gcs_url}/storage/v1/b", params={"project": "loadtest"}, json={"name": name}, timeout=10)
+    if resp.status_code not in (200, 409):
+        resp.raise_for_status()
+
+
+# --------------------------------------------------
+# Identity provider
+# --------------------------------------------------
+class LocalIssuer:
+    """
+    Minimal OIDC issuer. `issuer` is only a claim value (main.py is pointed at the JWKS
+    directly through KINDE_JWKS_URI), so it can stay an https URL as main.py expects.
+    """
+
+    def __init__(self, issuer: str = "https://loadtest.local", audience: str = "loadtest"):
+        self.issuer = issuer
+        self.audience = audience
+        self.kid = f"loadtest-{uuid.uuid4().hex[:8]}"
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self.private_pem = key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        ).decode()
+        public_pem = key.public_key().public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+        ).decode()
+        public_jwk = jwk.construct(public_pem, "RS256").to_dict()
+        public_jwk.update({"kid": self.kid, "use": "sig", "alg": "RS256"})
+        self.jwks = {"keys": [public_jwk]}
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self._server = None
+
+    @property
+    def jwks_uri(self) -> str:
+        return f"{self.url}/.well-known/jwks.json"
+
+    def start(self) -> str:
+        issuer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _json(self, body: dict):
+                data = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path == "/.well-known/jwks.json":
+                    self._json(issuer.jwks)
+                elif self.path == "/.well-known/openid-configuration":
+                    self._json({"issuer": issuer.issuer, "jwks_uri": issuer.jwks_uri, "token_endpoint": f"{issuer.url}/token"})
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                # Token endpoint for the fake GCS service account; any assertion is accepted.
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if self.path == "/token":
+                    self._json({"access_token": "loadtest", "token_type": "Bearer", "expires_in": 3600})
+                else:
+                    self.send_error(404)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", self.port), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self.url
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server = None
+
+    def mint(self, sub: str, ttl: int = 3600) -> str:
+        now = int(time.time())
+        claims = {"sub": sub, "iss": self.issuer, "aud": self.audience, "iat": now, "exp": now + ttl}
+        return jwt.encode(claims, self.private_pem, algorithm="RS256", headers={"kid": self.kid})
+
+    def service_account_json(self) -> str:
+        return json.dumps({
+            "type": "service_account",
+            "project_id": "loadtest",
+            "private_key_id": self.kid,
+            "private_key": self.private_pem,
+            "client_email": "loadtest@loadtest.iam.gserviceaccount.com",
+            "client_id": "1",
+            "token_uri": f"{self.url}/token",
+        })
+
+
+# --------------------------------------------------
+# Data
+# --------------------------------------------------
+def _checks_document(entries: int, rng: random.Random) -> list:
+    names = ["Null Value Check", "Data Type Consistency", "Range Validation", "Format Validation", "Uniqueness Constraint"]
+    fields = ["customer_id", "amount", "age", "email", "phone_number", "order_date"]
+    return [{
+        "name": rng.choice(names),
+        "field": rng.choice(fields),
+        "row": i + 2,
+        "source": str(rng.randint(0, 10 ** 6)),
+        "target": "expected",
+        "status": "Failed" if rng.random() < 0.3 else "Passed",
+        "failed_count": rng.randint(0, 1000),
+        "total_count": 100000,
+    } for i in range(entries)]
+
+
+def _profiling_document(columns: int, rng: random.Random) -> dict:
+    return {
+        "time": round(rng.uniform(0.1, 5.0), 3),
+        "row_count": 100000,
+        "columns": [{
+            "field": f"column_{i}",
+            "type": "number",
+            "count": 100000,
+            "null_count": rng.randint(0, 100),
+            "distinct_estimate": rng.randint(1, 100000),
+            "min": 0,
+            "max": rng.randint(1, 10 ** 6),
+            "status": "Passed",
+        } for i in range(columns)],
+    }
+
+
+def seed(database_url: str, users: int, history_per_user: int, reports_per_user: int, checks_per_report: int, seed_value: int = 1) -> list:
+    """
+    Inserts synthetic data and rebuilds the dashboard rollups. Returns
+    [{"username", "sub", "report_ids"}] for the load driver.
+    """
+    sys.path.insert(0, BACKEND_DIR)
+    import rollups
+
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+    seeded = []
+    conn = psycopg2.connect(dbapi_dsn(database_url))
+    try:
+        with conn.cursor() as cursor:
+            for u in range(users):
+                username = f"loadtest-user-{u}"
+                sub = f"kp_loadtest_{u}"
+                cursor.execute("""
+                    INSERT INTO users (username, email, first_name, last_name, kinde_id)
+                    VALUES (%s, %s, 'Load', 'Test', %s)
+                    ON CONFLICT (username) DO UPDATE SET kinde_id = EXCLUDED.kinde_id
+                """, (username, f"{username}@example.com", sub))
+                execute_values(cursor, """
+                    INSERT INTO validation_history (username, source_file_name, target_file_name, is_valid, created_at) VALUES %s
+                """, [(
+                    username, f"extract_{i}_source.csv", f"extract_{i}_target.csv", rng.random() < 0.7,
+                    now - timedelta(minutes=i * 7),
+                ) for i in range(history_per_user)], page_size=1000)
+                report_ids = [r[0] for r in execute_values(cursor, """
+                    INSERT INTO reports (username, report_name, report_date, time, status, checks, profiling, detailedoverview)
+                    VALUES %s RETURNING id
+                """, [(
+                    username, f"Report {i}", (now - timedelta(days=i)).date(), now - timedelta(hours=i),
+                    "P" if rng.random() < 0.7 else "F",
+                    json.dumps(_checks_document(checks_per_report, rng)),
+                    json.dumps(_profiling_document(12, rng)),
+                    json.dumps({"fields": _checks_document(max(1, checks_per_report // 4), rng)}),
+                ) for i in range(reports_per_user)], page_size=100, fetch=True)]
+                seeded.append({"username": username, "sub": sub, "report_ids": report_ids})
+        conn.commit()
+        rollups.rebuild_rollups(conn)
+    finally:
+        conn.close()
+    return seeded
@@ -0,0 +1,149 @@
+# upload_batch.py
+#
+# Throughput of recording many file pairs, the nightly-load shape: the same N pairs sent
+# - as N /api/upload-files requests, `--concurrency` in flight at a time, and
+# - as /api/upload-batch requests of `--batch-size` pairs each, one at a time,
+# against the same local stand-ins as run_suite.py (throwaway CockroachDB, fake GCS, local
+# JWKS issuer). Every pair carries unique content so content-addressed dedup does not
+# short-circuit the transfers. Prints wall time, pairs/s and requests made per variant.
+#
+#   python loadtest/upload_batch.py --pairs 200 --batch-size 50 --upload-rows 1000
+#   UPLOAD_BATCH_CONCURRENCY=16 python loadtest/upload_batch.py ...   # passed to the API
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import time
+
+import httpx
+
+from run_suite import BUCKET, _csv_payload, start_api
+from standins import FakeGCS, LocalIssuer, ThrowawayCockroach, apply_schema, create_bucket, free_port, seed
+
+
+def make_pairs(count: int, rows: int, rng: random.Random) -> list:
+    return [
+        (f"source_{i}.csv", _csv_payload(rows, rng), f"target_{i}.csv", _csv_payload(rows, rng))
+        for i in range(count)
+    ]
+
+
+async def single_pairs(client: httpx.AsyncClient, pairs: list, concurrency: int) -> dict:
+    limit = asyncio.Semaphore(concurrency)
+    failed = 0
+
+    async def send(source_name, source, target_name, target):
+        nonlocal failed
+        async with limit:
+            response = await client.post("/api/upload-files", files={
+                "source_file": (source_name, source, "text/csv"),
+                "target_file": (target_name, target, "text/csv"),
+            })
+        if response.status_code != 200:
+            failed += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(send(*pair) for pair in pairs))
+    return {"seconds": time.perf_counter() - start, "requests": len(pairs), "failed": failed}
+
+
+async def batches(client: httpx.AsyncClient, pairs: list, batch_size: int) -> dict:
+    failed = requests = 0
+    start = time.perf_counter()
+    for offset in range(0, len(pairs), batch_size):
+        files = []
+        for source_name, source, target_name, target in pairs[offset:offset + batch_size]:
+            files.append(("source_files", (source_name, source, "text/csv")))
+            files.append(("target_files", (target_name, target, "text/csv")))
+        response = await client.post("/api/upload-batch", files=files)
+        requests += 1
+        if response.status_code != 200:
+            failed += min(batch_size, len(pairs) - offset)
+        else:
+            failed += response.json()["failed"]
+    return {"seconds": time.perf_counter() - start, "requests": requests, "failed": failed}
+
+
+async def run(base_url: str, token: str, args) -> dict:
+    rng = random.Random(args.seed)
+    headers = {"Authorization": f"Bearer {token}"}
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, timeout=600) as client:
+        # One unmeasured pair of each so lazy clients and connections are warm.
+        await single_pairs(client, make_pairs(1, args.upload_rows, rng), 1)
+        await batches(client, make_pairs(1, args.upload_rows, rng), 1)
+        return {
+            f"single x{args.concurrency}": await single_pairs(client, make_pairs(args.pairs, args.upload_rows, rng), args.concurrency),
+            f"batch of {args.batch_size}": await batches(client, make_pairs(args.pairs, args.upload_rows, rng), args.batch_size),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Single-pair vs batch upload throughput")
+    parser.add_argument("--pairs", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8, help="single-pair requests in flight")
+    parser.add_argument("--upload-rows", type=int, default=1000)
+    parser.add_argument("--api-workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--database-url", help="use this database instead of a throwaway CockroachDB")
+    parser.add_argument("--gcs-url", help="use this GCS emulator instead of starting fake-gcs-server")
+    args = parser.parse_args()
+
+    stopping = []
+    try:
+        issuer = LocalIssuer()
+        issuer.start()
+        stopping.append(issuer)
+        database_url = args.database_url
+        if not database_url:
+            db = ThrowawayCockroach()
+            database_url = db.start()
+            stopping.append(db)
+        apply_schema(database_url)
+        user = seed(database_url, 1, 10, 2, 10)[0]
+        gcs_url = args.gcs_url
+        if not gcs_url:
+            gcs = FakeGCS()
+            gcs_url = gcs.start()
+            stopping.append(gcs)
+        create_bucket(gcs_url, BUCKET)
+
+        port = free_port()
+        env = dict(os.environ)
+        env.update({
+            "DATABASE_URL": database_url,
+            "KINDE_ISSUER_URL": issuer.issuer,
+            "KINDE_JWKS_URI": issuer.jwks_uri,
+            "KINDE_AUDIENCE": issuer.audience,
+            "CLIENT_ID": issuer.audience,
+            "CLIENT_SECRET": "loadtest",
+            "KINDE_CALLBACK_URL": f"http://127.0.0.1:{port}/api/callback",
+            "FRONTEND_URL": "http://localhost:5173",
+            "GOOGLE_APPLICATION_CREDENTIALS_JSON": issuer.service_account_json(),
+            "BUCKET_NAME": BUCKET,
+            "STORAGE_EMULATOR_HOST": gcs_url,
+            "JOB_WORKERS": env.get("JOB_WORKERS", "0"),
+        })
+        api = start_api(env, port, args.api_workers)
+        stopping.append(api)
+
+        results = asyncio.run(run(f"http://127.0.0.1:{port}", issuer.mint(user["sub"]), args))
+    finally:
+        for item in reversed(stopping):
+            if isinstance(item, subprocess.Popen):
+                item.terminate()
+                item.wait(timeout=30)
+            else:
+                item.stop()
+
+    print(f"\n{args.pairs} pairs of {args.upload_rows}-row files")
+    print(f"  {'variant':<16}{'seconds':>9}{'pairs/s':>10}{'requests':>10}{'failed':>8}")
+    for variant, result in results.items():
+        print(f"  {variant:<16}{result['seconds']:>9.2f}{args.pairs / result['seconds']:>10.1f}"
+              f"{result['requests']:>10}{result['failed']:>8}")
+
+
+if __name__ == "__main__":
+    main()
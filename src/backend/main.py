@@ -1,26 +1,51 @@
 # main.py
 
-from fastapi import FastAPI, Request, UploadFile, File, Form, Depends, Query, HTTPException, APIRouter, Response, Cookie, Header
-from fastapi.responses import JSONResponse, RedirectResponse
+from fastapi import FastAPI, Request, UploadFile, File, Form, Depends, Query, Path, HTTPException, APIRouter, Response, Cookie, Header
+from fastapi.responses import JSONResponse, RedirectResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from google.cloud import storage
-from google.oauth2 import service_account
 from dotenv import load_dotenv
 from pydantic import BaseModel
-import os, json, logging, psycopg2, bcrypt
-from datetime import datetime, timedelta
+import os, json, logging, bcrypt
+from datetime import date, datetime, timedelta
 import requests
-from jose import jwt, jwk
+from jose import jwt
 from jose.exceptions import JWTError, ExpiredSignatureError, JWTClaimsError
-from functools import lru_cache
 from sqlalchemy import create_engine, text
 from sqlalchemy.exc import SQLAlchemyError
+from psycopg2.extras import execute_values
 import uuid
 import urllib.parse
+import hashlib
+import hmac
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import base64
 import asyncio
+import anyio
+import importlib
+from contextlib import asynccontextmanager
 from starlette.concurrency import run_in_threadpool
+from functools import lru_cache
 from typing import Optional
+from jwks import JWKSKeyStore, JWKSFetchError, SigningKey
+import rollups
+from report_documents import (
+    REPORT_DOCUMENTS, DocumentBodyCache, EntryQuery, encode_document, etag, etag_base, matching_etag,
+    negotiate_encoding, query_entries,
+)
+from ingest import IngestBuffer, IngestRecord, idempotency_key_for
+import jobs
+import metrics
+import content_store
+import rulesets
+from versions import COLUMNAR_SUFFIX
+from oauth_state import create_state_store
+from cache_invalidation import create_invalidation_log
+from upload_progress import create_progress_store
+from status_events import StatusHub
 
 # ------------------------------------------------------
 # Pydantic models for request body validation
@@ -33,6 +58,10 @@ class PubSubMessage(BaseModel):
     message: dict
     subscription: str
 
+class Ruleset(BaseModel):
+    """A user's check rules; each rule is validated by rulesets.validate_ruleset."""
+    rules: list
+
 
 # ------------------------------------------------------
 # Load environment variables early
@@ -64,7 +93,37 @@ if missing:
 # ------------------------------------------------------
 # Initialize FastAPI app
 # ------------------------------------------------------
-app = FastAPI()
+# Blocking work (psycopg2 queries, GCS calls, JWKS fetches) never runs on the event loop:
+# it either lives in a plain `def` route/dependency, which FastAPI dispatches to the
+# threadpool, or is wrapped in `run_in_threadpool` from an `async def` route.
+# The threadpool is sized so that it can keep the DB pool fully busy.
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "40"))
+
+# Startup warm-up (see "Readiness and warm-up" below). The server only starts accepting
+# connections once the lifespan has yielded, so cold instances take no traffic until the
+# JWKS, DB pool and GCS credentials are ready or WARMUP_TIMEOUT_SECONDS has passed.
+WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT_SECONDS", "20"))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The stores, pools and runners used here are defined further down the module.
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    await warm_up(WARMUP_TIMEOUT)
+    await status_hub.start()
+    pubsub_buffer.start()
+    await job_runner.start()
+    readiness.mark_ready()
+    try:
+        yield
+    finally:
+        # Fail readiness first so the load balancer stops routing here while we drain.
+        readiness.mark_draining()
+        await pubsub_buffer.stop()
+        await job_runner.stop()
+        await status_hub.stop()
+        await run_in_threadpool(jwks_store.stop)
+
+app = FastAPI(lifespan=lifespan)
 
 frontend_url = os.getenv("FRONTEND_URL")
 if not frontend_url:
@@ -80,6 +139,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(metrics.MetricsMiddleware, skip_paths=("/metrics", "/healthz", "/readyz", "/api/events"))
 
 
 # ------------------------------------------------------
@@ -96,36 +156,128 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not all([KINDE_DOMAIN, KINDE_CLIENT_ID, KINDE_CLIENT_SECRET, KINDE_REDIRECT_URI]):
     raise RuntimeError("Missing one or more required Kinde environment variables")
 
-engine = create_engine(DATABASE_URL, future=True)
+# ------------------------------------------------------
+# Database connection pool
+# ------------------------------------------------------
+# Every route checks a connection out of this pool instead of opening its own,
+# so the TLS + auth handshake to CockroachDB is paid once per pooled connection
+# rather than once per request.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+engine = create_engine(
+    DATABASE_URL,
+    future=True,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=True,
+    connect_args={"cursor_factory": metrics.TimedCursor},
+)
 auth_router = APIRouter()
 
-# In-memory session store to handle OAuth state.
-# This is a robust alternative to using cookies for cross-site state management.
-# WARNING: In a production environment with multiple instances, this should be
-# replaced with a distributed store like Redis, a database, or a dedicated session library.
-session_store = {}
+# Pending OAuth states, keyed by the per-login `state` value (see oauth_state.py). The
+# default SQLite store is shared by all worker processes in the container; use
+# OAUTH_STATE_STORE=database when login and callback may reach different instances.
+oauth_states = create_state_store(
+    os.getenv("OAUTH_STATE_STORE", "sqlite"),
+    engine=engine,
+    ttl=float(os.getenv("OAUTH_STATE_TTL_SECONDS", "600")),
+    max_size=int(os.getenv("OAUTH_STATE_MAX_SIZE", "10000")),
+    path=os.getenv("OAUTH_STATE_SQLITE_PATH"),
+)
 
-@lru_cache()
-def get_cached_jwks() -> dict:
-    try:
-        config_url = f"https://{KINDE_DOMAIN}/.well-known/openid-configuration"
-        config_resp = requests.get(config_url)
-        config_resp.raise_for_status()
-        jwks_uri = config_resp.json().get("jwks_uri")
-        if not jwks_uri:
-            raise HTTPException(status_code=500, detail="JWKS URI not found")
-        jwks_resp = requests.get(jwks_uri)
-        jwks_resp.raise_for_status()
-        return jwks_resp.json()
-    except requests.RequestException as e:
-        raise HTTPException(status_code=500, detail=f"Failed to fetch JWKS: {str(e)}")
+class VerifiedTokenCache:
+    """
+    Bounded, thread-safe LRU of access tokens that already passed signature and claims
+    verification. Entries are keyed by the SHA-256 of the token (the raw token is never
+    stored) and hold the verified claims plus the resolved username until the token's `exp`.
+    """
 
-def get_kinde_public_key(kid: str) -> dict | None:
-    jwks = get_cached_jwks()
-    for key in jwks.get("keys", []):
-        if key.get("kid") == kid:
-            return key
-    return None
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> dict | None:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry["exp"] <= time.time():
+                # Let the caller re-verify so an expired token gets the proper 401.
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, token: str, claims: dict):
+        exp = claims.get("exp")
+        if not exp:
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = {"claims": claims, "username": None, "exp": float(exp)}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def set_username(self, token: str, username: str):
+        with self._lock:
+            entry = self._entries.get(self._key(token))
+            if entry is not None:
+                entry["username"] = username
+
+    def invalidate_user(self, kinde_id: str | None = None, username: str | None = None):
+        """Drops every cached token belonging to the given Kinde ID or username."""
+        with self._lock:
+            stale = [
+                key for key, entry in self._entries.items()
+                if (kinde_id and entry["claims"].get("sub") == kinde_id)
+                or (username and entry["username"] == username)
+            ]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+token_cache = VerifiedTokenCache(max_size=int(os.getenv("TOKEN_CACHE_SIZE", "10000")))
+
+# Invalidations of the per-process caches, shared by the container's workers (see
+# cache_invalidation.py). `get_current_user_id` syncs before any cache is read, once per
+# authenticated request.
+cache_invalidations = create_invalidation_log(
+    os.getenv("CACHE_INVALIDATION_STORE", "sqlite"),
+    path=os.getenv("CACHE_INVALIDATION_SQLITE_PATH"),
+)
+cache_invalidations.register(
+    "token", lambda key: token_cache.clear() if key is None else token_cache.invalidate_user(**key)
+)
+
+# Kinde signing keys: prefetched at startup, refreshed in the background every
+# JWKS_TTL_SECONDS and refetched (rate limited) when a token carries an unknown kid.
+jwks_store = JWKSKeyStore(
+    issuer_url=f"https://{KINDE_DOMAIN}",
+    jwks_uri=os.getenv("KINDE_JWKS_URI"),
+    ttl=float(os.getenv("JWKS_TTL_SECONDS", "3600")),
+    min_refetch_interval=float(os.getenv("JWKS_MIN_REFETCH_SECONDS", "30")),
+)
+
+def get_kinde_public_key(kid: str) -> SigningKey | None:
+    try:
+        return jwks_store.get_key(kid)
+    except JWKSFetchError as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
 def split_full_name(full_name: str):
     parts = full_name.strip().split(" ", 1)
@@ -168,15 +320,18 @@ def upsert_user(user_info: dict):
                 "kinde_id": kinde_id
             })
             conn.commit()
-            return result.scalar_one_or_none()
+            upserted_username = result.scalar_one_or_none()
+            # The username <-> kinde_id mapping may have changed, so cached identities are stale.
+            cache_invalidations.publish("token", {"kinde_id": kinde_id, "username": upserted_username})
+            return upserted_username
         except SQLAlchemyError as e:
             conn.rollback()
             logger.error("DB upsert error for Kinde ID %s: %s", kinde_id, e, exc_info=True)
             raise HTTPException(status_code=500, detail="Database error during user upsert")
 
-def get_current_user_id(access_token: Optional[str] = Cookie(None), authorization: Optional[str] = Header(None)):
+def get_access_token(access_token: Optional[str] = Cookie(None), authorization: Optional[str] = Header(None)):
     """
-    Decodes the JWT from the access_token cookie or Authorization header to get the user's ID.
+    Extracts the raw JWT from the request.
     Accepts:
       - Cookie: access_token
       - Authorization header: Bearer <token>
@@ -189,6 +344,17 @@ def get_current_user_id(access_token: Optional[str] = Cookie(None), authorizatio
 
     if not token:
         raise HTTPException(status_code=401, detail="Not authenticated. Missing access token.")
+    return token
+
+def get_current_user_id(token: str = Depends(get_access_token)):
+    """
+    Decodes the JWT to get the user's ID. Tokens that were already verified are served
+    from `token_cache` without repeating the signature check.
+    """
+    cache_invalidations.sync()
+    cached = token_cache.get(token)
+    if cached:
+        return cached["claims"].get("sub")
 
     try:
         headers = jwt.get_unverified_header(token)
@@ -198,19 +364,20 @@ def get_current_user_id(access_token: Optional[str] = Cookie(None), authorizatio
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token header.")
 
-    key_data = get_kinde_public_key(kid)
-    if not key_data:
+    signing_key = get_kinde_public_key(kid)
+    if not signing_key:
         raise HTTPException(status_code=401, detail="Invalid token – unknown key ID")
 
     try:
-        public_key = jwk.construct(key_data)
-        payload = jwt.decode(
-            token,
-            key=public_key,
-            algorithms=[key_data.get("alg", "RS256")],
-            audience=AUDIENCE,
-            issuer=f"https://{KINDE_DOMAIN}"
-        )
+        with metrics.span("jwt_verify"):
+            payload = jwt.decode(
+                token,
+                key=signing_key.key,
+                algorithms=[signing_key.alg],
+                audience=AUDIENCE,
+                issuer=f"https://{KINDE_DOMAIN}"
+            )
+        token_cache.put(token, payload)
         return payload.get("sub")
     except ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token has expired. Please log in again.")
@@ -219,21 +386,70 @@ def get_current_user_id(access_token: Optional[str] = Cookie(None), authorizatio
     except JWTError as e:
         raise HTTPException(status_code=401, detail=f"Token verification failed: {str(e)}")
 
-def get_current_username(kinde_id: str = Depends(get_current_user_id)):
+def get_db():
+    """
+    Checks a DBAPI connection out of the engine's pool for the duration of a request.
+    The connection is returned to the pool (and rolled back) when the request finishes.
+    FastAPI caches dependencies per request, so the route and `get_current_username`
+    share the same connection.
+    """
+    if not DATABASE_URL:
+        raise HTTPException(status_code=500, detail="DATABASE_URL not configured")
+    with metrics.span("db_checkout"):
+        conn = engine.raw_connection()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+def with_connection(fn, *args):
+    """
+    Runs `fn(conn, *args)` on a pooled connection checked out for the call only, for
+    routes that spend most of their time waiting on something other than the database.
+    """
+    if not DATABASE_URL:
+        raise HTTPException(status_code=500, detail="DATABASE_URL not configured")
+    with metrics.span("db_checkout"):
+        conn = engine.raw_connection()
+    try:
+        return fn(conn, *args)
+    finally:
+        conn.close()
+
+def get_current_username(
+    token: str = Depends(get_access_token),
+    kinde_id: str = Depends(get_current_user_id),
+    conn = Depends(get_db)
+):
     """
     Fetches the username from the database based on the Kinde ID.
+    The result is remembered alongside the verified token in `token_cache`.
     """
     if not kinde_id:
         raise HTTPException(status_code=401, detail="Unauthorized")
-    
-    conn = get_connection()
+
+    cached = token_cache.get(token)
+    if cached and cached["username"]:
+        return cached["username"]
+
     with conn.cursor() as cursor:
         cursor.execute("SELECT username FROM users WHERE kinde_id = %s", (kinde_id,))
         result = cursor.fetchone()
         if not result:
             raise HTTPException(status_code=404, detail="User not found in database")
-        return result[0]
+    token_cache.set_username(token, result[0])
+    return result[0]
 
+def get_username_briefly(token: str = Depends(get_access_token), kinde_id: str = Depends(get_current_user_id)) -> str:
+    """
+    `get_current_username` without a `get_db` connection. Dependencies with `yield` are
+    only closed once the response has been sent, so streams and uploads, which can run for
+    minutes, must not hold one.
+    """
+    cached = token_cache.get(token)
+    if cached and cached["username"]:
+        return cached["username"]
+    return with_connection(lambda conn: get_current_username(token, kinde_id, conn))
 
 @auth_router.get("/login")
 async def login(response: Response):
@@ -248,9 +464,7 @@ async def login(response: Response):
     encoded_params = urllib.parse.urlencode(redirect_params)
     auth_url = f"https://{KINDE_DOMAIN}/oauth2/auth?{encoded_params}"
 
-    # Store the state in the session store instead of a cookie
-    session_store["oauth_state"] = state
-    logger.info("OAuth state set in session_store: %s", state)
+    await run_in_threadpool(oauth_states.put, state)
 
     return RedirectResponse(url=auth_url)
 
@@ -261,15 +475,10 @@ async def auth_callback(
     state: str,
     request: Request
 ):
-    # Retrieve the state from the session store instead of a cookie
-    oauth_state = session_store.get("oauth_state")
-
-    if not oauth_state or oauth_state != state:
-        logger.error("OAuth state mismatch: session_store=%s, received_url_param=%s", oauth_state, state)
+    # Each state is redeemable once, before it expires
+    if not await run_in_threadpool(oauth_states.consume, state):
+        logger.error("OAuth state not found or expired: %s", state)
         raise HTTPException(status_code=400, detail="Invalid state parameter or state mismatch.")
-    
-    # Remove the state from the session store after use
-    session_store.pop("oauth_state", None)
 
     if not code:
         raise HTTPException(status_code=400, detail="Missing authorization code")
@@ -285,7 +494,7 @@ async def auth_callback(
     }
 
     try:
-        resp = requests.post(token_url, data=data)
+        resp = await run_in_threadpool(requests.post, token_url, data=data)
         if not resp.ok:
             logger.error(" Token exchange failed: %s", resp.text)
             resp.raise_for_status()
@@ -302,16 +511,14 @@ async def auth_callback(
         if not id_token_kid:
             raise HTTPException(status_code=401, detail="Missing 'kid' in ID token header.")
 
-        id_token_key_data = get_kinde_public_key(id_token_kid)
-        if not id_token_key_data:
+        id_token_signing_key = await run_in_threadpool(get_kinde_public_key, id_token_kid)
+        if not id_token_signing_key:
             raise HTTPException(status_code=401, detail="Invalid ID token – unknown key ID")
 
-        public_key_id_token = jwk.construct(id_token_key_data)
-
         payload = jwt.decode(
             id_token,
-            key=public_key_id_token,
-            algorithms=[id_token_key_data.get("alg", "RS256")],
+            key=id_token_signing_key.key,
+            algorithms=[id_token_signing_key.alg],
             audience=KINDE_CLIENT_ID,
             issuer=f"https://{KINDE_DOMAIN}",
             access_token=access_token
@@ -356,40 +563,158 @@ app.include_router(auth_router, prefix="/api")
 # ------------------------------------------------------
 # Google Cloud Storage setup
 # ------------------------------------------------------
-credentials = None
-storage_client = None
-bucket = None
-try:
-    if os.getenv("GOOGLE_APPLICATION_CREDENTIALS_JSON"):
-        credentials_info = json.loads(os.environ["GOOGLE_APPLICATION_CREDENTIALS_JSON"])
-        credentials = service_account.Credentials.from_service_account_info(credentials_info)
-        storage_client = storage.Client(credentials=credentials)
-        bucket_name = os.getenv("BUCKET_NAME")
-        if bucket_name:
-            bucket = storage_client.bucket(bucket_name)
-except Exception as e:
-    logger.error(f"Failed to initialize GCS: {e}")
+class GCSClients:
+    """
+    The storage client, built on first use rather than at import time: google-cloud-storage
+    is the most expensive import in this module. The lifespan warm-up loads it and fetches
+    the first access token while the JWKS and DB pool are warming.
+    """
+
+    def __init__(self):
+        self.credentials = None
+        self.client = None
+        self.bucket = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def load(self) -> "GCSClients":
+        if self._loaded:
+            return self
+        with self._lock:
+            if self._loaded:
+                return self
+            try:
+                if os.getenv("GOOGLE_APPLICATION_CREDENTIALS_JSON"):
+                    from google.cloud import storage
+                    from google.oauth2 import service_account
+                    credentials_info = json.loads(os.environ["GOOGLE_APPLICATION_CREDENTIALS_JSON"])
+                    self.credentials = service_account.Credentials.from_service_account_info(credentials_info)
+                    self.client = storage.Client(credentials=self.credentials)
+                    bucket_name = os.getenv("BUCKET_NAME")
+                    if bucket_name:
+                        self.bucket = self.client.bucket(bucket_name)
+            except Exception as e:
+                logger.error(f"Failed to initialize GCS: {e}")
+            self._loaded = True
+        return self
+
+    def warm(self):
+        """Loads the client and refreshes the OAuth token GCS API calls are made with."""
+        self.load()
+        if self.credentials is None:
+            raise RuntimeError("GCS not configured")
+        from google.auth.transport.requests import Request as AuthRequest
+        self.credentials.refresh(AuthRequest())
+
+gcs = GCSClients()
 
 # ------------------------------------------------------
-# Database connection
+# Signed URLs
 # ------------------------------------------------------
-def get_connection():
-    if not DATABASE_URL:
-        raise HTTPException(status_code=500, detail="DATABASE_URL not configured")
-    conn_url = DATABASE_URL.replace("cockroachdb+psycopg2://", "postgresql://")
-    return psycopg2.connect(conn_url)
+# Every signature is an RSA operation, so signed URLs are cached per GCS path and reused
+# until they are within SIGNED_URL_REFRESH_MARGIN of expiring. Cache misses for a page of
+# reports are signed in parallel on `signing_executor`.
+SIGNED_URL_TTL = timedelta(minutes=60)
+SIGNED_URL_REFRESH_MARGIN = timedelta(minutes=int(os.getenv("SIGNED_URL_REFRESH_MARGIN_MINUTES", "10")))
+SIGNED_URL_CACHE_SIZE = int(os.getenv("SIGNED_URL_CACHE_SIZE", "20000"))
+
+signing_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("SIGNING_WORKERS", "8")),
+    thread_name_prefix="gcs-sign",
+)
+signing_queue = metrics.QueueDepth()  # signings waiting for a `signing_executor` thread
 
-def generate_signed_url(gcs_path: str) -> str:
-    if not storage_client:
-        return ""
+class SignedUrlCache:
+    """
+    Bounded, thread-safe LRU of signed URLs keyed by GCS path.
+    """
+
+    def __init__(self, max_size: int, refresh_margin: timedelta):
+        self.max_size = max_size
+        self.refresh_margin = refresh_margin.total_seconds()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, gcs_path: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get(gcs_path)
+            if entry is None:
+                return None
+            url, expires_at = entry
+            if expires_at - self.refresh_margin <= time.time():
+                del self._entries[gcs_path]
+                return None
+            self._entries.move_to_end(gcs_path)
+            return url
+
+    def put(self, gcs_path: str, url: str, expires_at: float):
+        with self._lock:
+            self._entries[gcs_path] = (url, expires_at)
+            self._entries.move_to_end(gcs_path)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+signed_url_cache = SignedUrlCache(SIGNED_URL_CACHE_SIZE, SIGNED_URL_REFRESH_MARGIN)
+
+@lru_cache(maxsize=32)
+def get_bucket(bucket_name: str):
+    return gcs.load().client.bucket(bucket_name)
+
+def _sign_gcs_path(gcs_path: str) -> str:
     try:
         path_parts = gcs_path.replace("gs://", "").split("/", 1)
-        blob = storage_client.bucket(path_parts[0]).blob(path_parts[1])
-        return blob.generate_signed_url(expiration=timedelta(minutes=60))
+        blob = get_bucket(path_parts[0]).blob(path_parts[1])
+        expires_at = time.time() + SIGNED_URL_TTL.total_seconds()
+        with metrics.span("signed_url"):
+            url = blob.generate_signed_url(expiration=SIGNED_URL_TTL)
+        signed_url_cache.put(gcs_path, url, expires_at)
+        return url
     except Exception as e:
         logger.error(f"Signed URL generation failed: {e}")
         return ""
 
+def generate_signed_url(gcs_path: str) -> str:
+    if not gcs.load().client or not gcs_path:
+        return ""
+    return signed_url_cache.get(gcs_path) or _sign_gcs_path(gcs_path)
+
+def generate_signed_urls(gcs_paths) -> dict:
+    """
+    Signs a batch of GCS paths, serving cached URLs and signing the misses in parallel.
+    Returns a mapping of path -> signed URL ("" for empty paths or failures).
+    """
+    urls = {}
+    misses = []
+    configured = gcs.load().client is not None
+    for path in set(gcs_paths):
+        if not configured or not path:
+            urls[path] = ""
+            continue
+        cached = signed_url_cache.get(path)
+        if cached:
+            urls[path] = cached
+        else:
+            misses.append(path)
+    if misses:
+        futures = [signing_queue.submit(signing_executor, _sign_gcs_path, path) for path in misses]
+        urls.update(zip(misses, (future.result() for future in futures)))
+    return urls
+
+# ------------------------------------------------------
+# Pagination cursors
+# ------------------------------------------------------
+def encode_cursor(*values) -> str:
+    """
+    Packs the sort key of the last row on a page into an opaque, URL-safe cursor.
+    """
+    return base64.urlsafe_b64encode(json.dumps(values, default=str).encode()).decode()
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
 # ------------------------------------------------------
 # Application Routes
 # All protected routes now use `get_current_username` as a dependency.
@@ -398,42 +723,33 @@ def generate_signed_url(gcs_path: str) -> str:
 async def get_me(username: str = Depends(get_current_username)):
     return {"user": username}
 
-@app.get("/api/dashboard")
-def dashboard(username: str = Depends(get_current_username)):
-    conn = get_connection()
-    with conn.cursor() as cursor:
-        cursor.execute("""
-            SELECT COUNT(*), COUNT(*) FILTER (WHERE is_valid), COUNT(*) FILTER (WHERE NOT is_valid)
-            FROM validation_history WHERE username = %s
-        """, (username,))
-        total, successful, failed = cursor.fetchone()
+# Short-lived per-process cache in front of the rollup tables; writers drop the user's
+# entry in every worker through `cache_invalidations`, so their changes show up immediately.
+DASHBOARD_CACHE_TTL = float(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", "5"))
+dashboard_cache = {}
+cache_invalidations.register(
+    "dashboard", lambda username: dashboard_cache.clear() if username is None else dashboard_cache.pop(username, None)
+)
 
-        cursor.execute("""
-            SELECT TO_CHAR(created_at, 'FMDay'), COUNT(*)
-            FROM validation_history
-            WHERE username = %s AND created_at >= CURRENT_DATE - INTERVAL '6 days'
-            GROUP BY 1 ORDER BY 1
-        """, (username,))
-        chart = cursor.fetchall()
+def invalidate_dashboard(*usernames):
+    cache_invalidations.publish("dashboard", *usernames)
 
-        cursor.execute("""
-            SELECT AVG((profiling->>'time')::FLOAT)
-            FROM reports WHERE username = %s AND profiling->>'time' IS NOT NULL
-        """, (username,))
-        avg_time = cursor.fetchone()[0] or 0
+@app.get("/api/dashboard")
+def dashboard(username: str = Depends(get_current_username), conn = Depends(get_db)):
+    """
+    Dashboard metrics served from the incrementally maintained rollups in rollups.py.
+    """
+    cached = dashboard_cache.get(username)
+    if cached and cached[0] > time.monotonic():
+        return JSONResponse(cached[1])
 
-    return JSONResponse({
-        "total": total,
-        "successful": successful,
-        "failed": failed,
-        "chart_labels": [r[0] for r in chart],
-        "chart_values": [r[1] for r in chart],
-        "avg_time": round(avg_time, 2),
-    })
+    with conn.cursor() as cursor:
+        data = rollups.fetch_dashboard(cursor, username)
+    dashboard_cache[username] = (time.monotonic() + DASHBOARD_CACHE_TTL, data)
+    return JSONResponse(data)
 
 @app.get("/api/session")
-def get_session(username: str = Depends(get_current_username)):
-    conn = get_connection()
+def get_session(username: str = Depends(get_current_username), conn = Depends(get_db)):
     with conn.cursor() as cursor:
         cursor.execute("SELECT id, username, email FROM users WHERE username = %s", (username,))
         user = cursor.fetchone()
@@ -444,157 +760,851 @@ def get_session(username: str = Depends(get_current_username)):
 # ----------------------------------------------------------------------------------
 # File Upload and Database Insertion Endpoint
 # ----------------------------------------------------------------------------------
-async def insert_file_records(username: str, source_filename: str, target_filename: str):
+# Uploads are streamed from the UploadFile spool to GCS with resumable uploads, so each
+# upload holds at most one chunk in memory regardless of file size.
+_GCS_CHUNK_GRANULARITY = 256 * 1024  # GCS requires chunk sizes in multiples of 256 KiB
+UPLOAD_CHUNK_SIZE = max(
+    _GCS_CHUNK_GRANULARITY,
+    int(os.getenv("UPLOAD_CHUNK_SIZE", str(8 * 1024 * 1024))) // _GCS_CHUNK_GRANULARITY * _GCS_CHUNK_GRANULARITY,
+)
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 ** 3)))
+
+# In-flight GCS transfers, exposed per user via /api/upload-progress (see upload_progress.py).
+# The default SQLite store is shared by all worker processes in the container.
+upload_progress = create_progress_store(
+    os.getenv("UPLOAD_PROGRESS_STORE", "sqlite"),
+    stale_after=float(os.getenv("UPLOAD_PROGRESS_STALE_SECONDS", "3600")),
+    path=os.getenv("UPLOAD_PROGRESS_SQLITE_PATH"),
+)
+
+class UploadTooLargeError(Exception):
+    pass
+
+class UploadStreamReader:
+    """
+    File-like wrapper around an UploadFile spool that is handed to `blob.upload_from_file`.
+    It enforces MAX_UPLOAD_BYTES while the stream is read and records progress in
+    `upload_progress`. `tell`/`seek` are passed through so resumable uploads can retry a chunk.
+    """
+
+    def __init__(self, fileobj, blob_name: str, username: str, total_bytes: Optional[int], max_bytes: int):
+        self._fileobj = fileobj
+        self.transfer_id = uuid.uuid4().hex
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+        upload_progress.start(self.transfer_id, username, blob_name, total_bytes)
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self._fileobj.read(size)
+        self.bytes_read = max(self.bytes_read, self._fileobj.tell())
+        if self.bytes_read > self.max_bytes:
+            raise UploadTooLargeError(f"File exceeds the {self.max_bytes} byte upload limit")
+        upload_progress.update(self.transfer_id, self.bytes_read)
+        return chunk
+
+    def tell(self) -> int:
+        return self._fileobj.tell()
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self._fileobj.seek(offset, whence)
+
+    def close(self):
+        upload_progress.finish(self.transfer_id)
+
+def stream_file_to_gcs(file: UploadFile, blob_name: str, username: str, if_absent: bool = False) -> int:
+    """
+    Blocking chunked upload of `file` to `blob_name`, to be run in a threadpool.
+    Returns the number of bytes uploaded. With `if_absent`, GCS rejects the write with
+    PreconditionFailed if the object already exists.
+    """
+    blob = gcs.load().bucket.blob(blob_name, chunk_size=UPLOAD_CHUNK_SIZE)
+    file.file.seek(0)
+    reader = UploadStreamReader(file.file, blob_name, username, file.size, MAX_UPLOAD_BYTES)
+    try:
+        with metrics.span("gcs_upload"):
+            blob.upload_from_file(
+                reader, size=file.size, content_type=file.content_type, rewind=False,
+                if_generation_match=0 if if_absent else None,
+            )
+        logger.info("Uploaded %s (%d bytes) to GCS", blob_name, reader.bytes_read)
+        return reader.bytes_read
+    finally:
+        reader.close()
+
+async def hash_upload(file: UploadFile) -> str:
+    """Hashes `file` from the request's spooled copy in the threadpool."""
+    if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+        raise UploadTooLargeError(f"'{file.filename}' exceeds the {MAX_UPLOAD_BYTES} byte upload limit")
+    try:
+        digest, _ = await run_in_threadpool(content_store.hash_stream, file.file, MAX_UPLOAD_BYTES)
+    except ValueError as e:
+        raise UploadTooLargeError(f"'{file.filename}': {e}")
+    return digest
+
+async def transfer_upload(file: UploadFile, username: str, digest: str) -> dict:
+    """
+    Uploads `file` content-addressed under `digest` unless this user already stored
+    identical bytes. Returns {"blob", "uploaded"}.
+    """
+    from google.api_core.exceptions import PreconditionFailed
+    blob_name = content_store.content_blob_name(username, digest)
+    uploaded = False
+    if not await run_in_threadpool(gcs.load().bucket.blob(blob_name).exists):
+        try:
+            await run_in_threadpool(stream_file_to_gcs, file, blob_name, username, True)
+            uploaded = True
+        except PreconditionFailed:
+            pass  # a concurrent upload of the same bytes won
+    return {"blob": blob_name, "uploaded": uploaded}
+
+async def store_uploads(files: list, username: str, concurrency: int) -> list:
+    """
+    Hashes every file, then transfers each distinct content once, with at most
+    `concurrency` hashes or transfers running at a time. Returns, per file in order,
+    {"filename", "blob", "hash", "uploaded"} or the exception that stopped it; only the
+    first file with given content reports "uploaded".
+    """
+    limit = asyncio.Semaphore(concurrency)
+
+    async def bounded(fn, *args):
+        async with limit:
+            return await fn(*args)
+
+    digests = await asyncio.gather(*(bounded(hash_upload, file) for file in files), return_exceptions=True)
+    first = {}  # digest -> index of the file whose bytes are transferred
+    for index, digest in enumerate(digests):
+        if not isinstance(digest, Exception):
+            first.setdefault(digest, index)
+    transferred = await asyncio.gather(
+        *(bounded(transfer_upload, files[index], username, digest) for digest, index in first.items()),
+        return_exceptions=True,
+    )
+    by_digest = dict(zip(first, transferred))
+
+    stored = []
+    for index, (file, digest) in enumerate(zip(files, digests)):
+        outcome = digest if isinstance(digest, Exception) else by_digest[digest]
+        if isinstance(outcome, Exception):
+            stored.append(outcome)
+        else:
+            stored.append({
+                "filename": file.filename,
+                "blob": outcome["blob"],
+                "hash": digest,
+                "uploaded": outcome["uploaded"] and first[digest] == index,
+            })
+    return stored
+
+# ------------------------------------------------------
+# Status events
+# ------------------------------------------------------
+# Job and upload history changes are pushed to the browser over Server-Sent Events (see
+# status_events.py). The database backend is the default because the Dockerfile runs
+# several workers and jobs run in one of them (or another instance, or a standalone
+# `python jobs.py`), and a job's events must reach streams held by any of them.
+status_hub = StatusHub(
+    backend=os.getenv("STATUS_EVENTS_BACKEND", "database"),
+    engine=engine,
+    backlog=int(os.getenv("STATUS_EVENTS_BACKLOG", "256")),
+    poll_interval=float(os.getenv("STATUS_EVENTS_POLL_SECONDS", "0.5")),
+)
+STATUS_KEEPALIVE_SECONDS = float(os.getenv("STATUS_KEEPALIVE_SECONDS", "15"))
+# Streams are closed after this long and the browser reconnects with its Last-Event-ID,
+# which spreads clients over workers and lets shutdown drain open connections.
+STATUS_STREAM_MAX_SECONDS = float(os.getenv("STATUS_STREAM_MAX_SECONDS", "300"))
+STATUS_RETRY_MS = int(os.getenv("STATUS_RETRY_MS", "2000"))
+
+def format_sse(event_id: int, event_type: str | None, data: dict | None) -> str:
+    """One SSE message; without a type it only moves the client's Last-Event-ID."""
+    lines = [f"id: {event_id}"]
+    if event_type is not None:
+        lines += [f"event: {event_type}", f"data: {json.dumps(data, default=str)}"]
+    return "\n".join(lines) + "\n\n"
+
+@app.get("/api/events")
+async def status_events_stream(
+    username: str = Depends(get_username_briefly),
+    last_event_id: Optional[str] = Header(None),
+    since: Optional[int] = Query(None, description="Event id to resume after, for clients that cannot set Last-Event-ID"),
+):
+    """
+    Server-Sent Events stream of the user's job and upload history changes. Reconnects
+    resume after the Last-Event-ID header that EventSource sends automatically.
+    """
+    resume_after = since
+    if last_event_id and last_event_id.strip().isdigit():
+        resume_after = int(last_event_id)
+
+    async def events():
+        deadline = time.monotonic() + STATUS_STREAM_MAX_SECONDS
+        yield f"retry: {STATUS_RETRY_MS}\n\n"
+        async for item in status_hub.stream(username, resume_after, STATUS_KEEPALIVE_SECONDS):
+            yield ": keepalive\n\n" if item is None else format_sse(*item)
+            if time.monotonic() > deadline:
+                return
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# Validation runs in a process pool owned by one API worker per container: the worker
+# holding JOB_RUNNER_LOCK runs the jobs, and the others only record them, so JOB_WORKERS
+# and JOB_MAX_PER_USER apply per container. Jobs recorded by the other workers are picked
+# up by polling every JOB_POLL_SECONDS. JOB_WORKERS=0 leaves jobs queued for a standalone
+# `python jobs.py` worker instead.
+job_runner = jobs.JobRunner(
+    engine,
+    workers=int(os.getenv("JOB_WORKERS", "2")),
+    per_user=int(os.getenv("JOB_MAX_PER_USER", "1")),
+    max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", "3")),
+    backoff_base=float(os.getenv("JOB_BACKOFF_SECONDS", "5")),
+    poll_interval=float(os.getenv("JOB_POLL_SECONDS", "2")),
+    lease_seconds=float(os.getenv("JOB_LEASE_SECONDS", "60")),
+    local_root=os.getenv("JOB_LOCAL_ROOT"),
+    lock_path=os.getenv("JOB_RUNNER_LOCK", os.path.join(tempfile.gettempdir(), "validation_jobs.lock")),
+    on_complete=lambda username: invalidate_dashboard(username),
+    on_status=lambda username, event: status_hub.publish(username, "job", event),
+)
+
+def insert_file_records(conn, username: str, source: dict, target: dict) -> dict:
     """
     Synchronous database insertion logic, to be run in a threadpool.
+    `source`/`target` carry the original `filename`, the stored `blob` and its `hash`.
+    If this exact pair was already validated under the current ruleset the new history row
+    reuses that report; otherwise a validation job is queued in the same transaction.
+    Returns {"history_id", "job_id", "report_id"} (one of the last two None).
     """
-    conn = get_connection()
+    created_at = datetime.utcnow()
+    job_id = None
     try:
         with conn.cursor() as cursor:
+            ruleset = rulesets.fetch_ruleset(cursor, username)
+            cached = content_store.find_result(cursor, username, source["hash"], target["hash"], rulesets.ruleset_key(ruleset))
+            report_id, is_valid = cached if cached else (None, False)
             cursor.execute("""
                 INSERT INTO validation_history (
                     username,
                     source_file_name,
                     target_file_name,
                     is_valid,
-                    created_at
-                ) VALUES (%s, %s, %s, %s, %s)
-            """, (username, source_filename, target_filename, False, datetime.utcnow()))
+                    created_at,
+                    source_hash,
+                    target_hash,
+                    report_id
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                RETURNING id
+            """, (username, source["filename"], target["filename"], is_valid, created_at, source["hash"], target["hash"], report_id))
+            history_id = cursor.fetchone()[0]
+            if report_id is None:
+                job_id = jobs.create_job(cursor, history_id, username, source["blob"], target["blob"], ruleset)
+            rollups.record_validations(cursor, [(username, is_valid, created_at)])
             conn.commit()
     except Exception as e:
         conn.rollback()
         raise e
-    finally:
-        if conn:
-            conn.close()
+    invalidate_dashboard(username)
+    return {"history_id": history_id, "job_id": job_id, "report_id": report_id}
+
+def insert_file_records_batch(conn, username: str, pairs: list) -> list:
+    """
+    `insert_file_records` for many (source, target) pairs in one transaction: one lookup of
+    earlier results, one multi-row INSERT into validation_history and one into
+    validation_jobs. Rows are matched to their pair through a per-batch idempotency key,
+    since RETURNING does not promise the VALUES order.
+    Returns a {"history_id", "job_id", "report_id"} dict per pair, in order.
+    """
+    created_at = datetime.utcnow()
+    batch_key = f"upload-batch:{uuid.uuid4().hex}"
+    try:
+        with conn.cursor() as cursor:
+            ruleset = rulesets.fetch_ruleset(cursor, username)
+            cached = content_store.find_results(
+                cursor, username, [(source["hash"], target["hash"]) for source, target in pairs], rulesets.ruleset_key(ruleset)
+            )
+            rows = []
+            for index, (source, target) in enumerate(pairs):
+                report_id, is_valid = cached.get((source["hash"], target["hash"]), (None, False))
+                rows.append((
+                    f"{batch_key}/{index}", username, source["filename"], target["filename"],
+                    is_valid, created_at, source["hash"], target["hash"], report_id,
+                ))
+            inserted = execute_values(cursor, """
+                INSERT INTO validation_history (
+                    idempotency_key,
+                    username,
+                    source_file_name,
+                    target_file_name,
+                    is_valid,
+                    created_at,
+                    source_hash,
+                    target_hash,
+                    report_id
+                ) VALUES %s
+                RETURNING idempotency_key, id
+            """, rows, page_size=len(rows), fetch=True)
+            history_ids = dict(inserted)
+            recorded = [{"history_id": history_ids[row[0]], "job_id": None, "report_id": row[8]} for row in rows]
+            job_ids = jobs.create_jobs(cursor, [
+                (entry["history_id"], username, source["blob"], target["blob"], ruleset)
+                for entry, (source, target) in zip(recorded, pairs) if entry["report_id"] is None
+            ])
+            for entry in recorded:
+                entry["job_id"] = job_ids.get(entry["history_id"])
+            rollups.record_validations(cursor, [(username, row[4], created_at) for row in rows])
+            conn.commit()
+    except Exception as e:
+        conn.rollback()
+        raise e
+    invalidate_dashboard(username)
+    return recorded
 
 @app.post("/api/upload-files")
 async def upload_files(
-    username: str = Depends(get_current_username),
+    username: str = Depends(get_username_briefly),
     source_file: UploadFile = File(...),
     target_file: UploadFile = File(...)
 ):
     """
     Handles concurrent upload of source and target files to GCS and
     records the upload in CockroachDB.
+    Files are stored content-addressed: each is hashed from the request's spooled copy first,
+    and skipped if this user already stored identical bytes.
     """
-    if not bucket:
+    if not gcs.load().bucket:
         raise HTTPException(status_code=500, detail="GCS not configured")
-    
-    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-    folder_prefix = f"{username}/uploads/{timestamp}_"
-    
-    # Define a helper function for uploading to GCS
-    async def upload_to_gcs_task(file: UploadFile, filename: str):
-        blob = bucket.blob(f"{folder_prefix}{filename}")
-        file_content = await file.read()
-        blob.upload_from_string(file_content, content_type=file.content_type)
-        return filename
+
+    for file in (source_file, target_file):
+        if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail=f"'{file.filename}' exceeds the {MAX_UPLOAD_BYTES} byte upload limit")
 
     try:
-        # Upload both files concurrently using asyncio.gather
-        source_filename, target_filename = await asyncio.gather(
-            upload_to_gcs_task(source_file, source_file.filename),
-            upload_to_gcs_task(target_file, target_file.filename)
-        )
+        # Upload both files concurrently; identical files are transferred once
+        stored = await store_uploads([source_file, target_file], username, 2)
+        for outcome in stored:
+            if isinstance(outcome, Exception):
+                raise outcome
+        source, target = stored
         
-        # Run the blocking DB insertion in a background thread
-        await run_in_threadpool(insert_file_records, username, source_filename, target_filename)
-
-        logger.info(f"Files '{source_filename}' and '{target_filename}' uploaded and recorded for user '{username}'.")
+        # Run the blocking DB insertion in a background thread, then hand validation to the job runner
+        recorded = await run_in_threadpool(with_connection, insert_file_records, username, source, target)
+        if recorded["job_id"] is not None:
+            status_hub.publish(username, "job", {"job_id": recorded["job_id"], "state": "queued", "history_id": recorded["history_id"]})
+            job_runner.enqueue(recorded["job_id"], username)
+        else:
+            status_hub.publish(username, "history", {"history_id": recorded["history_id"], "report_id": recorded["report_id"], "reused_report": True})
+
+        logger.info(
+            f"Files '{source_file.filename}' and '{target_file.filename}' recorded for user '{username}' "
+            f"(uploaded: {source['uploaded']}/{target['uploaded']}, job: {recorded['job_id']}, reused report: {recorded['report_id']})."
+        )
         
-        return {"message": "Files uploaded to GCS and recorded in DB successfully"}
+        return {
+            "message": "Files uploaded to GCS and recorded in DB successfully",
+            "job_id": recorded["job_id"],
+            "report_id": recorded["report_id"],
+            "reused_report": recorded["report_id"] is not None,
+            "uploaded": {"source": source["uploaded"], "target": target["uploaded"]},
+        }
     
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         logger.error(f"File upload or DB insertion failed for user '{username}': {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Upload failed: {e}")
 
+# Batch uploads: files are hashed and transferred up to UPLOAD_BATCH_CONCURRENCY at a time
+# per request, each distinct content once, and every pair is recorded in one transaction.
+# Starlette parses at most 1000 files per multipart form, which caps a batch at 500 pairs.
+UPLOAD_BATCH_MAX_PAIRS = int(os.getenv("UPLOAD_BATCH_MAX_PAIRS", "500"))
+UPLOAD_BATCH_CONCURRENCY = int(os.getenv("UPLOAD_BATCH_CONCURRENCY", "8"))
+
+@app.post("/api/upload-batch")
+async def upload_batch(
+    username: str = Depends(get_username_briefly),
+    source_files: list[UploadFile] = File(...),
+    target_files: list[UploadFile] = File(...)
+):
+    """
+    Uploads many source/target pairs in one request: the i-th `source_files` part is paired
+    with the i-th `target_files` part. Files are stored as in /api/upload-files, and the
+    pairs whose files were stored are recorded together.
+    Returns one result per pair, in order: "queued" with its job, "reused" with the earlier
+    report, or "failed" with an error, in which case nothing was recorded for that pair.
+    """
+    if not gcs.load().bucket:
+        raise HTTPException(status_code=500, detail="GCS not configured")
+    if len(source_files) != len(target_files):
+        raise HTTPException(status_code=400, detail=f"Got {len(source_files)} source files but {len(target_files)} target files")
+    if len(source_files) > UPLOAD_BATCH_MAX_PAIRS:
+        raise HTTPException(status_code=413, detail=f"A batch holds at most {UPLOAD_BATCH_MAX_PAIRS} pairs")
+
+    pairs = list(zip(source_files, target_files))
+    files = await store_uploads(source_files + target_files, username, UPLOAD_BATCH_CONCURRENCY)
+
+    def pair_outcome(source_file: UploadFile, target_file: UploadFile, stored: list):
+        for outcome in stored:
+            if isinstance(outcome, UploadTooLargeError):
+                return str(outcome)
+            if isinstance(outcome, Exception):
+                logger.error(f"Batch upload of '{source_file.filename}'/'{target_file.filename}' failed for user '{username}': {outcome}")
+                return f"Upload failed: {outcome}"
+        return stored
+
+    stored = [
+        pair_outcome(source, target, [files[index], files[len(pairs) + index]])
+        for index, (source, target) in enumerate(pairs)
+    ]
+    ready = [index for index, outcome in enumerate(stored) if not isinstance(outcome, str)]
+
+    recorded = {}
+    if ready:
+        try:
+            entries = await run_in_threadpool(with_connection, insert_file_records_batch, username, [stored[index] for index in ready])
+        except Exception as e:
+            logger.error(f"Recording a batch of {len(ready)} upload(s) failed for user '{username}': {e}", exc_info=True)
+            raise HTTPException(status_code=500, detail=f"Upload failed: {e}")
+        recorded = dict(zip(ready, entries))
+        for entry in entries:
+            if entry["job_id"] is not None:
+                status_hub.publish(username, "job", {"job_id": entry["job_id"], "state": "queued", "history_id": entry["history_id"]})
+                job_runner.enqueue(entry["job_id"], username)
+            else:
+                status_hub.publish(username, "history", {"history_id": entry["history_id"], "report_id": entry["report_id"], "reused_report": True})
+
+    results = []
+    for index, (source_file, target_file) in enumerate(pairs):
+        result = {"index": index, "source_file": source_file.filename, "target_file": target_file.filename}
+        if index in recorded:
+            source, target = stored[index]
+            entry = recorded[index]
+            result.update({
+                "status": "queued" if entry["job_id"] is not None else "reused",
+                "history_id": entry["history_id"],
+                "job_id": entry["job_id"],
+                "report_id": entry["report_id"],
+                "uploaded": {"source": source["uploaded"], "target": target["uploaded"]},
+            })
+        else:
+            result.update({"status": "failed", "error": stored[index]})
+        results.append(result)
+
+    logger.info(f"Batch of {len(pairs)} pair(s) for user '{username}': {len(recorded)} recorded, {len(pairs) - len(recorded)} failed.")
+    return {"recorded": len(recorded), "failed": len(pairs) - len(recorded), "results": results}
+
+@app.get("/api/upload-progress")
+def get_upload_progress(username: str = Depends(get_current_username)):
+    """
+    Lists the current user's in-flight GCS transfers with bytes uploaded so far.
+    """
+    return JSONResponse({"uploads": upload_progress.transfers(username)})
+
+@app.get("/api/jobs/{job_id}")
+def get_validation_job(job_id: int, username: str = Depends(get_current_username), conn = Depends(get_db)):
+    job = jobs.get_job(conn, job_id, username)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JSONResponse(job)
+
+@app.post("/api/jobs/{job_id}/cancel")
+async def cancel_validation_job(job_id: int, username: str = Depends(get_current_username)):
+    previous = await job_runner.cancel(job_id, username)
+    if previous is None:
+        raise HTTPException(status_code=409, detail="Job is not queued or running")
+    return JSONResponse({"id": job_id, "state": "cancelled", "previous_state": previous})
+
+# Counting a heavy user's full history is as expensive as the scan we are avoiding,
+# so the total is counted up to this cap and reported as an estimate beyond it.
+HISTORY_COUNT_CAP = int(os.getenv("HISTORY_COUNT_CAP", "10000"))
+
+def escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
 @app.get("/api/upload-history")
-async def upload_history(username: str = Depends(get_current_username), page: int = 1, search: str = None, status: str = None):
-    conn = get_connection()
-    base_query = "SELECT source_file_name, target_file_name, is_valid, created_at FROM validation_history WHERE username = %s"
+def upload_history(
+    username: str = Depends(get_current_username),
+    conn = Depends(get_db),
+    cursor: Optional[str] = None,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=100),
+    search: str = None,
+    status: str = None
+):
+    """
+    Keyset-paginated upload history, newest first. Pass the returned `next_cursor` back as
+    `cursor` to fetch the next page; each page is an index range scan on
+    (username, created_at, id) regardless of depth. `page` is only honoured without a
+    cursor, for clients that still page by number.
+    Filename search uses ILIKE, served by the trigram indexes from
+    migrations/001_validation_history_pagination.sql.
+    Each record carries its validation `job_state` (queued, running, done, failed,
+    cancelled); `status` accepts those states as well as success/failure.
+    """
+    where = "WHERE username = %s"
     filters = [username]
     if search:
-        base_query += " AND (source_file_name ILIKE %s OR target_file_name ILIKE %s)"
-        filters.extend([f"%{search}%"]*2)
+        where += " AND (source_file_name ILIKE %s OR target_file_name ILIKE %s)"
+        filters.extend([f"%{escape_like(search)}%"]*2)
     if status == "success":
-        base_query += " AND is_valid = TRUE"
+        where += " AND is_valid = TRUE"
     elif status == "failure":
-        base_query += " AND is_valid = FALSE"
-    base_query += " ORDER BY created_at DESC LIMIT 10 OFFSET %s"
-    filters.append((page-1)*10)
-    with conn.cursor() as cursor:
-        cursor.execute(base_query, tuple(filters))
-        rows = cursor.fetchall()
+        where += " AND is_valid = FALSE"
+    elif status in jobs.JOB_STATES:
+        where += " AND id IN (SELECT history_id FROM validation_jobs WHERE username = %s AND state = %s)"
+        filters.extend([username, status])
+
+    page_query = f"""
+        SELECT id, source_file_name, target_file_name, is_valid, created_at,
+            (SELECT state FROM validation_jobs WHERE history_id = validation_history.id) AS job_state,
+            report_id
+        FROM validation_history {where}
+    """
+    page_params = list(filters)
+    offset = 0
+    if cursor:
+        try:
+            created_at, last_id = decode_cursor(cursor)
+            created_at = datetime.fromisoformat(created_at)
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+        page_query += " AND (created_at, id) < (%s, %s)"
+        page_params.extend([created_at, last_id])
+    else:
+        offset = (page-1)*page_size
+    page_query += " ORDER BY created_at DESC, id DESC LIMIT %s OFFSET %s"
+    page_params.extend([page_size + 1, offset])
+
+    with conn.cursor() as db_cursor:
+        db_cursor.execute(page_query, tuple(page_params))
+        rows = db_cursor.fetchall()
+        total = None
+        if not cursor:
+            db_cursor.execute(
+                f"SELECT COUNT(*) FROM (SELECT 1 FROM validation_history {where} LIMIT %s) AS capped",
+                tuple(filters) + (HISTORY_COUNT_CAP,)
+            )
+            total = db_cursor.fetchone()[0]
+
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
     data = [{
-        "source_file_name": r[0],
-        "target_file_name": r[1],
-        "is_valid": r[2],
-        "created_at": r[3].isoformat()
+        "id": r[0],
+        "source_file_name": r[1],
+        "target_file_name": r[2],
+        "is_valid": r[3],
+        "created_at": r[4].isoformat(),
+        "job_state": r[5],
+        "report_id": r[6]
     } for r in rows]
-    return JSONResponse({"records": data, "current_page": page})
+    return JSONResponse({
+        "records": data,
+        "current_page": page,
+        "page_size": page_size,
+        "next_cursor": encode_cursor(rows[-1][4].isoformat(), rows[-1][0]) if has_more else None,
+        "total_estimate": total,
+        "total_is_estimate": total is not None and total >= HISTORY_COUNT_CAP,
+    })
+
+# Columns the report listing can project. `id` and `time` are always selected because
+# they form the pagination cursor.
+REPORT_FIELDS = {
+    "id": "id",
+    "report_date": "report_date",
+    "report_name": "report_name",
+    "status": "status",
+    "data_profiling_url": "data_profiling_url",
+    "detailed_overview_url": "detailed_overview_url",
+    "failed_checks_url": "failed_checks_url",
+    "time": "time",
+    "has_checks": "checks IS NOT NULL",
+    "has_profiling": "profiling IS NOT NULL",
+    "has_detailed_overview": "detailedoverview IS NOT NULL",
+}
+REPORT_URL_FIELDS = ("data_profiling_url", "detailed_overview_url", "failed_checks_url")
+REPORTS_PAGE_SIZE = int(os.getenv("REPORTS_PAGE_SIZE", "50"))
+REPORTS_MAX_PAGE_SIZE = 500
+REPORTS_EXPORT_BATCH = 500
+# Matches reports_username_time_idx (migrations/009_reports_pagination.sql)
+REPORTS_ORDER = "ORDER BY time DESC NULLS LAST, id DESC"
+
+def parse_report_fields(fields: Optional[str]) -> list:
+    if not fields:
+        return list(REPORT_FIELDS)
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in REPORT_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown report field(s): {', '.join(unknown)}")
+    return requested
+
+def build_reports_query(username: str, fields: list, status: Optional[str], from_date: Optional[date], to_date: Optional[date]):
+    """
+    Returns (select_sql, where_sql, params) for the user's reports with the given projection
+    and filters, ordered newest first by (time, id); reports without a time come last.
+    """
+    columns = ["id", "time"] + [REPORT_FIELDS[f] for f in fields if f not in ("id", "time")]
+    where = "WHERE username = %s"
+    params = [username]
+    if status == "success":
+        where += " AND status = 'P'"
+    elif status == "failure":
+        where += " AND status != 'P'"
+    if from_date:
+        where += " AND time >= %s"
+        params.append(from_date)
+    if to_date:
+        where += " AND time < %s"
+        params.append(to_date + timedelta(days=1))
+    return f"SELECT {', '.join(columns)} FROM reports", where, params
+
+def format_report_rows(rows, fields: list, signed_urls: bool) -> list:
+    """
+    Formats rows selected by `build_reports_query`. URLs are signed in one batch, and only
+    when a URL field was requested.
+    """
+    columns = ["id", "time"] + [f for f in fields if f not in ("id", "time")]
+    url_fields = [f for f in REPORT_URL_FIELDS if f in fields]
+    urls = {}
+    if signed_urls and url_fields:
+        urls = generate_signed_urls(r[columns.index(f)] for r in rows for f in url_fields)
 
-@app.get("/api/reports")
-def reports(username: str = Depends(get_current_username)):
-    conn = get_connection()
-    with conn.cursor() as cursor:
-        cursor.execute("""
-            SELECT id, report_date, report_name, status, data_profiling_url,
-            detailed_overview_url, failed_checks_url, time,
-            checks IS NOT NULL, profiling IS NOT NULL, detailedoverview IS NOT NULL
-            FROM reports WHERE username = %s ORDER BY time DESC
-        """, (username,))
-        reports = cursor.fetchall()
     formatted = []
-    for r in reports:
-        formatted.append({
-            "id": r[0],
-            "report_date": r[1].strftime("%Y-%m-%d") if r[1] else None,
-            "report_name": r[2],
-            "status": "success" if r[3] == 'P' else "failure",
-            "data_profiling_url": generate_signed_url(r[4]),
-            "detailed_overview_url": generate_signed_url(r[5]),
-            "failed_checks_url": generate_signed_url(r[6]),
-            "time": r[7].strftime("%Y-%m-%d %H:%M:%S") if r[7] else None,
-            "has_checks": r[8],
-            "has_profiling": r[9],
-            "has_detailed_overview": r[10]
-        })
-    return JSONResponse({"reports": formatted})
+    for r in rows:
+        row = dict(zip(columns, r))
+        report = {}
+        for f in fields:
+            value = row[f]
+            if f == "report_date":
+                value = value.strftime("%Y-%m-%d") if value else None
+            elif f == "status":
+                value = "success" if value == 'P' else "failure"
+            elif f == "time":
+                value = value.strftime("%Y-%m-%d %H:%M:%S") if value else None
+            elif f in REPORT_URL_FIELDS:
+                value = urls.get(value, "")
+            report[f] = value
+        formatted.append(report)
+    return formatted
+
+def stream_reports_export(select_sql: str, where: str, params: list, fields: list, signed_urls: bool, fmt: str):
+    """
+    Yields every matching report as NDJSON lines or as one JSON array, reading through a
+    server-side cursor in batches so memory stays constant in the number of reports.
+    Uses its own pooled connection because it outlives the request's dependencies.
+    """
+    conn = engine.raw_connection()
+    try:
+        with conn.cursor(name=f"reports_export_{uuid.uuid4().hex}") as cursor:
+            cursor.itersize = REPORTS_EXPORT_BATCH
+            cursor.execute(f"{select_sql} {where} {REPORTS_ORDER}", tuple(params))
+            first = True
+            if fmt == "json":
+                yield b"["
+            while True:
+                rows = cursor.fetchmany(REPORTS_EXPORT_BATCH)
+                if not rows:
+                    break
+                for report in format_report_rows(rows, fields, signed_urls):
+                    line = json.dumps(report)
+                    if fmt == "ndjson":
+                        yield (line + "\n").encode()
+                    else:
+                        yield (line if first else "," + line).encode()
+                    first = False
+            if fmt == "json":
+                yield b"]"
+    finally:
+        conn.close()
 
-@app.get("/api/reports/{id}/checks")
-def report_checks(id: int, username: str = Depends(get_current_username)):
-    conn = get_connection()
+@app.get("/api/reports")
+def reports(
+    username: str = Depends(get_current_username),
+    conn = Depends(get_db),
+    signed_urls: bool = True,
+    cursor: Optional[str] = None,
+    limit: int = Query(REPORTS_PAGE_SIZE, ge=1, le=REPORTS_MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
+    status: Optional[str] = Query(None, pattern="^(success|failure)$"),
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    export: Optional[str] = Query(None, pattern="^(ndjson|json)$")
+):
+    """
+    Lists the user's reports, newest first, one page at a time. Pass `next_cursor` back as
+    `cursor` for the next page.
+    - `fields`: comma-separated projection; URL signing and the has_* flags are skipped
+      unless requested. With `signed_urls=false` URLs are left empty and can be fetched
+      per report from /api/reports/{id}/urls.
+    - `status`, `from_date`, `to_date`: filters on status and report time.
+    - `export=ndjson|json`: streams every matching report instead of a page.
+    """
+    selected = parse_report_fields(fields)
+    select_sql, where, params = build_reports_query(username, selected, status, from_date, to_date)
+
+    if export:
+        media_type = "application/x-ndjson" if export == "ndjson" else "application/json"
+        return StreamingResponse(
+            stream_reports_export(select_sql, where, params, selected, signed_urls, export),
+            media_type=media_type
+        )
+
+    if cursor:
+        try:
+            last_time, last_id = decode_cursor(cursor)
+            last_time = datetime.fromisoformat(last_time) if last_time is not None else None
+            last_id = int(last_id)
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+        # Reports without a time sort after all the others (NULLS LAST)
+        if last_time is None:
+            where += " AND time IS NULL AND id < %s"
+            params.append(last_id)
+        else:
+            where += " AND ((time, id) < (%s, %s) OR time IS NULL)"
+            params.extend([last_time, last_id])
+
+    with conn.cursor() as db_cursor:
+        db_cursor.execute(f"{select_sql} {where} {REPORTS_ORDER} LIMIT %s", tuple(params) + (limit + 1,))
+        rows = db_cursor.fetchall()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = None
+    if has_more:
+        last_id, last_time = rows[-1][0], rows[-1][1]
+        next_cursor = encode_cursor(last_time.isoformat() if last_time else None, last_id)
+    return JSONResponse({
+        "reports": format_report_rows(rows, selected, signed_urls),
+        "next_cursor": next_cursor,
+    })
+
+@app.get("/api/reports/{id}/urls")
+def report_urls(id: int, username: str = Depends(get_current_username), conn = Depends(get_db)):
     with conn.cursor() as cursor:
-        cursor.execute("SELECT checks, failed_checks_url FROM reports WHERE id = %s AND username = %s", (id, username))
+        cursor.execute("""
+            SELECT data_profiling_url, detailed_overview_url, failed_checks_url
+            FROM reports WHERE id = %s AND username = %s
+        """, (id, username))
         result = cursor.fetchone()
     if not result:
-        raise HTTPException(status_code=404, detail="Checks not found")
-    return JSONResponse({"checks": result[0], "download_url": generate_signed_url(result[1])})
+        raise HTTPException(status_code=404, detail="Report not found")
+    urls = generate_signed_urls(result)
+    return JSONResponse({
+        "id": id,
+        "data_profiling_url": urls[result[0]],
+        "detailed_overview_url": urls[result[1]],
+        "failed_checks_url": urls[result[2]],
+    })
 
-@app.get("/api/reports/{id}/profiling")
-def report_profiling(id: int, username: str = Depends(get_current_username)):
-    conn = get_connection()
+def entry_query_params(
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=5000),
+    name: Optional[str] = None,
+    field: Optional[str] = None,
+    status: Optional[str] = None,
+    sort: Optional[str] = Query(None, pattern="^(position|name|field|status)$"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    summary_only: bool = False
+) -> EntryQuery:
+    """
+    Slicing parameters shared by the report document endpoints. Without any of them the
+    whole document is returned as before.
+    """
+    return EntryQuery(offset, limit, name, field, status, sort, order, summary_only)
+
+# Whole (unsliced) documents are passed through as the JSON text the database already
+# holds instead of being decoded into dicts and re-encoded on every request. A body is
+# identified by a strong ETag over the report id, its document version and the signed
+# download URL embedded in it, so revalidations get a 304 without reading the document,
+# and each encoding of a body is built (and compressed) once and then served from
+# `document_body_cache` (see report_documents.py).
+document_body_cache = DocumentBodyCache(int(os.getenv("DOCUMENT_CACHE_MAX_BYTES", str(256 * 1024 * 1024))))
+
+def read_whole_document(kind: str, id: int, username: str, conn, request: Request) -> Response:
+    doc = REPORT_DOCUMENTS[kind]
+    headers = {"Vary": "Accept-Encoding", "Cache-Control": "private, no-cache"}
     with conn.cursor() as cursor:
-        cursor.execute("SELECT profiling, data_profiling_url FROM reports WHERE id = %s AND username = %s", (id, username))
+        cursor.execute(f"SELECT version, {doc.url_column} FROM reports WHERE id = %s AND username = %s", (id, username))
         result = cursor.fetchone()
-    if not result:
-        raise HTTPException(status_code=404, detail="Profiling not found")
-    return JSONResponse({"profile": result[0], "download_url": generate_signed_url(result[1])})
+        if not result:
+            raise HTTPException(status_code=404, detail=doc.not_found)
+        download_url = generate_signed_url(result[1])
+        base = etag_base(kind, id, result[0], download_url)
+        matched = matching_etag(request.headers.get("if-none-match"), base)
+        if matched:
+            return Response(status_code=304, headers={**headers, "ETag": matched})
+
+        requested = negotiate_encoding(request.headers.get("accept-encoding"))
+        cached = document_body_cache.get((base, requested))
+        if cached is None:
+            # The version is re-read with the document, so a concurrent write cannot pair a
+            # new document with the old tag.
+            cursor.execute(f"SELECT version, {doc.column}::STRING FROM reports WHERE id = %s AND username = %s", (id, username))
+            result = cursor.fetchone()
+            if not result:
+                raise HTTPException(status_code=404, detail=doc.not_found)
+            base = etag_base(kind, id, result[0], download_url)
+            cached = encode_document(doc, result[1], download_url, requested)
+            document_body_cache.put((base, requested), *cached)
+    body, encoding = cached
+    headers["ETag"] = etag(base, encoding)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def read_report_document(kind: str, id: int, username: str, conn, query: EntryQuery, request: Request):
+    if not query.is_sliced:
+        return read_whole_document(kind, id, username, conn, request)
+    doc = REPORT_DOCUMENTS[kind]
+    with conn.cursor() as cursor:
+        cursor.execute(f"SELECT {doc.url_column} FROM reports WHERE id = %s AND username = %s", (id, username))
+        result = cursor.fetchone()
+        if not result:
+            raise HTTPException(status_code=404, detail=doc.not_found)
+        body = query_entries(cursor, doc, query, id, username)
+    body["download_url"] = generate_signed_url(result[0])
+    return JSONResponse(body)
+
+@app.get("/api/reports/{id}/checks")
+def report_checks(id: int, request: Request, username: str = Depends(get_current_username), conn = Depends(get_db), query: EntryQuery = Depends(entry_query_params)):
+    return read_report_document("checks", id, username, conn, query, request)
+
+@app.get("/api/reports/{id}/profiling")
+def report_profiling(id: int, request: Request, username: str = Depends(get_current_username), conn = Depends(get_db), query: EntryQuery = Depends(entry_query_params)):
+    return read_report_document("profiling", id, username, conn, query, request)
 
 @app.get("/api/reports/{id}/detailed")
-def report_detailed(id: int, username: str = Depends(get_current_username)):
-    conn = get_connection()
+def report_detailed(id: int, request: Request, username: str = Depends(get_current_username), conn = Depends(get_db), query: EntryQuery = Depends(entry_query_params)):
+    return read_report_document("detailed", id, username, conn, query, request)
+
+@app.get("/api/reports/{id}/{kind}/export")
+def export_report_document(
+    id: int,
+    kind: str = Path(..., pattern="^(checks|profiling|detailed)$"),
+    format: str = Query("csv", pattern="^(csv|parquet)$"),
+    username: str = Depends(get_current_username),
+    conn = Depends(get_db),
+    query: EntryQuery = Depends(entry_query_params)
+):
+    """
+    Streams a report document's entries as CSV or Parquet with chunked encoding, applying
+    the viewers' filters and sort (and offset/limit when given).
+    """
+    doc = REPORT_DOCUMENTS[kind]
     with conn.cursor() as cursor:
-        cursor.execute("SELECT detailedoverview, detailed_overview_url FROM reports WHERE id = %s AND username = %s", (id, username))
-        result = cursor.fetchone()
-    if not result:
-        raise HTTPException(status_code=404, detail="Overview not found")
-    return JSONResponse({"detailed_overview": result[0], "download_url": generate_signed_url(result[1])})
+        cursor.execute("SELECT 1 FROM reports WHERE id = %s AND username = %s", (id, username))
+        if not cursor.fetchone():
+            raise HTTPException(status_code=404, detail=doc.not_found)
+    from report_exports import EXPORT_FORMATS, stream_entries
+    media_type, extension = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        stream_entries(engine.raw_connection, doc, query, id, username, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="report-{id}-{kind}.{extension}"'},
+    )
 
 @app.get("/api/profile")
-def get_profile(username: str = Depends(get_current_username)):
-    conn = get_connection()
+def get_profile(username: str = Depends(get_current_username), conn = Depends(get_db)):
     with conn.cursor() as cursor:
         cursor.execute("SELECT username, email, first_name, last_name FROM users WHERE username = %s", (username,))
         result = cursor.fetchone()
@@ -608,10 +1618,9 @@ def get_profile(username: str = Depends(get_current_username)):
     })
 
 @app.post("/api/account-settings")
-def update_password(username: str = Depends(get_current_username), current_password: str = Form(...), new_password: str = Form(...), confirm_password: str = Form(...)):
+def update_password(username: str = Depends(get_current_username), conn = Depends(get_db), current_password: str = Form(...), new_password: str = Form(...), confirm_password: str = Form(...)):
     if new_password != confirm_password:
         return JSONResponse(status_code=400, content={"error": "Passwords do not match"})
-    conn = get_connection()
     with conn.cursor() as cursor:
         cursor.execute("SELECT password FROM users WHERE username = %s", (username,))
         record = cursor.fetchone()
@@ -622,17 +1631,91 @@ def update_password(username: str = Depends(get_current_username), current_passw
         conn.commit()
     return JSONResponse({"message": "Password updated"})
 
+@app.get("/api/ruleset")
+def get_ruleset(username: str = Depends(get_current_username), conn = Depends(get_db)):
+    """The user's check rules; `default` is true (and `ruleset` null) while the default rules apply."""
+    with conn.cursor() as cursor:
+        ruleset = rulesets.fetch_ruleset(cursor, username)
+    return JSONResponse({"ruleset": ruleset, "default": ruleset is None})
+
+@app.put("/api/ruleset")
+def put_ruleset(body: Ruleset, username: str = Depends(get_current_username), conn = Depends(get_db)):
+    """
+    Replaces the rules later uploads are checked against. Jobs already queued keep the
+    rules they were queued with.
+    """
+    try:
+        ruleset = rulesets.validate_ruleset(body.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        with conn.cursor() as cursor:
+            rulesets.save_ruleset(cursor, username, ruleset)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return JSONResponse({"ruleset": ruleset, "default": False})
+
+@app.delete("/api/ruleset")
+def delete_ruleset(username: str = Depends(get_current_username), conn = Depends(get_db)):
+    """Goes back to the default rules for later uploads."""
+    try:
+        with conn.cursor() as cursor:
+            rulesets.save_ruleset(cursor, username, None)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return JSONResponse({"ruleset": None, "default": True})
+
+def on_pubsub_flush(usernames):
+    invalidate_dashboard(*usernames)
+    for username in usernames:
+        status_hub.publish(username, "history", {"source": "pubsub"})
+
+# Pub/Sub pushes are coalesced into multi-row inserts; each push is acknowledged only
+# once the batch holding it has been committed.
+pubsub_buffer = IngestBuffer(
+    engine,
+    max_batch=int(os.getenv("PUBSUB_BATCH_SIZE", "500")),
+    max_delay=float(os.getenv("PUBSUB_BATCH_DELAY_SECONDS", "0.05")),
+    on_flush=on_pubsub_flush,
+)
+
+# The push subscription's endpoint carries `?token=<PUBSUB_VERIFICATION_TOKEN>`; pushes
+# without it are rejected. Unset only for local development.
+PUBSUB_VERIFICATION_TOKEN = os.getenv("PUBSUB_VERIFICATION_TOKEN")
+if not PUBSUB_VERIFICATION_TOKEN:
+    logger.warning("PUBSUB_VERIFICATION_TOKEN is not set; /pubsub-handler accepts unauthenticated pushes")
+
 @app.post("/pubsub-handler")
-async def pubsub_handler(payload: PubSubMessage):
+async def pubsub_handler(payload: PubSubMessage, token: Optional[str] = Query(None)):
+    if PUBSUB_VERIFICATION_TOKEN and not hmac.compare_digest(token or "", PUBSUB_VERIFICATION_TOKEN):
+        return JSONResponse(status_code=403, content={"error": "Invalid Pub/Sub token"})
     try:
         message_data = base64.b64decode(payload.message["data"]).decode("utf-8")
         attributes = payload.message.get("attributes", {})
-        logger.info(f"PubSub Triggered. Data: {message_data}, Attributes: {attributes}")
+        logger.debug(f"PubSub Triggered. Data: {message_data}, Attributes: {attributes}")
+
+        # Job notifications (e.g. from a validation topic) schedule an already-recorded job.
+        # The job's owner comes from its row, never from the message.
+        if attributes.get("jobId"):
+            job_id = int(attributes["jobId"])
+            username = await run_in_threadpool(with_connection, jobs.queued_job_owner, job_id)
+            if username is None:
+                return JSONResponse({"status": "ignored", "job": job_id})
+            job_runner.enqueue(job_id, username)
+            return JSONResponse({"status": "ok", "job": job_id})
 
         blob_name = attributes.get("objectId") or json.loads(message_data).get("name")
         if not blob_name:
             raise ValueError("No blob name found in message")
 
+        # Content-addressed uploads and their columnar copies are recorded by the upload path itself
+        if content_store.is_content_blob(blob_name) or blob_name.endswith(COLUMNAR_SUFFIX):
+            return JSONResponse({"status": "ignored", "blob": blob_name})
+
         parts = blob_name.split('/')
         if len(parts) < 2:
             raise ValueError(f"Unexpected blob path: {blob_name}")
@@ -640,19 +1723,134 @@ async def pubsub_handler(payload: PubSubMessage):
         username = parts[0]
         file_name = parts[-1]
         
-        conn = get_connection()
-        with conn.cursor() as cursor:
-            cursor.execute("""
-                INSERT INTO validation_history (username, source_file_name, is_valid, created_at)
-                VALUES (%s, %s, %s, %s)
-            """, (username, file_name, True, datetime.utcnow()))
-            conn.commit()
+        await pubsub_buffer.submit(IngestRecord(
+            idempotency_key=idempotency_key_for(payload.message),
+            username=username,
+            file_name=file_name,
+            is_valid=True,
+            created_at=datetime.utcnow(),
+        ))
 
         return JSONResponse({"status": "ok", "blob": blob_name})
     except Exception as e:
         logger.error(f"Pub/Sub processing failed: {e}")
         return JSONResponse(status_code=500, content={"error": "Pub/Sub processing error"})
 
+# ------------------------------------------------------
+# Readiness and warm-up
+# ------------------------------------------------------
+# Run by the lifespan before the server accepts connections. Each step blocks on the
+# network or on imports, so they run concurrently and startup costs the slowest step
+# rather than the sum. A step that fails or is still running at the timeout is logged and
+# left to happen lazily on first use. Modules listed here are otherwise imported by the
+# first upload, job completion or export.
+WARMUP_MODULES = ("checks_engine", "profiler", "columnar", "report_exports")
+WARMUP_DB_CONNECTIONS = int(os.getenv("WARMUP_DB_CONNECTIONS", str(min(DB_POOL_SIZE, 4))))
+
+class Readiness:
+    """Startup state for /readyz: "starting" -> "ready" -> "draining"."""
+
+    def __init__(self):
+        self.state = "starting"
+        self.components = {}
+        self.startup_seconds = None
+        self._started = time.perf_counter()
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    def record(self, component: str, ok: bool, seconds: float, error: str | None = None):
+        self.components[component] = {"ok": ok, "seconds": round(seconds, 3), "error": error}
+
+    def mark_ready(self):
+        self.startup_seconds = time.perf_counter() - self._started
+        self.state = "ready"
+        logger.info("Ready in %.2fs: %s", self.startup_seconds, self.components)
+
+    def mark_draining(self):
+        self.state = "draining"
+
+readiness = Readiness()
+
+def _warm_jwks():
+    jwks_store.start()
+    if not jwks_store.has_keys:
+        raise JWKSFetchError("no signing keys fetched")
+
+async def _warm_db_pool():
+    # Opened concurrently and returned to the pool, so the first requests skip the handshake.
+    connections = await asyncio.gather(
+        *(run_in_threadpool(engine.raw_connection) for _ in range(WARMUP_DB_CONNECTIONS)),
+        return_exceptions=True,
+    )
+    for connection in connections:
+        if not isinstance(connection, BaseException):
+            connection.close()
+    errors = [c for c in connections if isinstance(c, BaseException)]
+    if errors:
+        raise errors[0]
+
+def _import_modules():
+    for name in WARMUP_MODULES:
+        importlib.import_module(name)
+
+async def _warm_step(component: str, step):
+    start = time.perf_counter()
+    try:
+        await step()
+    except Exception as e:
+        readiness.record(component, False, time.perf_counter() - start, str(e))
+        logger.warning(f"Warm-up of {component} failed: {e}")
+    else:
+        readiness.record(component, True, time.perf_counter() - start)
+
+async def warm_up(timeout: float):
+    steps = {
+        "jwks": lambda: run_in_threadpool(_warm_jwks),
+        "db_pool": _warm_db_pool,
+        "gcs": lambda: run_in_threadpool(gcs.warm),
+        "imports": lambda: run_in_threadpool(_import_modules),
+    }
+    tasks = {asyncio.create_task(_warm_step(name, step)): name for name, step in steps.items()}
+    _, pending = await asyncio.wait(tasks, timeout=timeout)
+    for task in pending:
+        # Left running; its result replaces this entry when it finishes.
+        readiness.record(tasks[task], False, timeout, "still warming at startup timeout")
+        logger.warning(f"Warm-up of {tasks[task]} did not finish within {timeout}s")
+
+@app.get("/healthz", include_in_schema=False)
+async def healthz():
+    return {"status": "ok"}
+
+@app.get("/readyz", include_in_schema=False)
+async def readyz():
+    return JSONResponse(
+        status_code=200 if readiness.ready else 503,
+        content={"status": readiness.state, "startup_seconds": readiness.startup_seconds, "components": readiness.components},
+    )
+
+# ------------------------------------------------------
+# Metrics
+# ------------------------------------------------------
+# Saturation gauges, read at scrape time. Size containers so that checked-out DB
+# connections and borrowed threadpool tokens stay below their totals under load.
+metrics.gauge_callback("db_pool_size", "Configured DB pool size (excluding overflow)", lambda: engine.pool.size())
+metrics.gauge_callback("db_pool_checked_out", "DB connections currently checked out", lambda: engine.pool.checkedout())
+metrics.gauge_callback("db_pool_overflow", "DB connections open beyond pool_size", lambda: max(0, engine.pool.overflow()))
+metrics.gauge_callback("threadpool_tokens_total", "Threadpool capacity", lambda: anyio.to_thread.current_default_thread_limiter().total_tokens)
+metrics.gauge_callback("threadpool_tokens_borrowed", "Threadpool workers busy", lambda: anyio.to_thread.current_default_thread_limiter().borrowed_tokens)
+metrics.gauge_callback("signing_queue_depth", "URL signing tasks waiting for a worker", lambda: len(signing_queue))
+metrics.gauge_callback("validation_jobs_running", "Validation jobs in flight in this process", job_runner.running_count)
+metrics.gauge_callback("validation_jobs_queued", "Validation jobs waiting in this process", job_runner.queued_count)
+metrics.gauge_callback("app_startup_seconds", "Seconds from importing the app until it was ready to serve", lambda: readiness.startup_seconds)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    # async so the threadpool gauges are read on the event loop
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
 # ------------------------------------------------------
 # Start server (for local dev)
 # ------------------------------------------------------
@@ -0,0 +1,185 @@
+# metrics.py
+#
+# Prometheus metrics and request timing for the API.
+# - MetricsMiddleware records per-route latency histograms, status counts and an
+#   in-flight gauge. Routes are labelled by their template (`/api/reports/{id}`), so
+#   label cardinality stays bounded.
+# - `span("name")` times a hot-path operation (DB query, JWT verification, JWKS fetch,
+#   GCS upload, URL signing) into a shared histogram and into the current request's
+#   timing record, which is logged as one JSON line per request when
+#   METRICS_LOG_REQUESTS is set.
+# - `TimedCursor` is installed as the psycopg2 cursor class, so every query executed on a
+#   pooled connection is a `db_query` span without touching call sites.
+# - Pool saturation gauges are callbacks evaluated at scrape time (see `gauge_callback`).
+#
+# Metrics live in this process's default registry; with several workers each exposes
+# its own /metrics and the scraper aggregates.
+
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from psycopg2.extensions import cursor as _psycopg2_cursor
+
+logger = logging.getLogger("request_timing")
+
+LOG_REQUESTS = os.getenv("METRICS_LOG_REQUESTS", "").lower() in ("1", "true", "yes")
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Request latency by route", ["method", "route"], buckets=LATENCY_BUCKETS
+)
+REQUEST_COUNT = Counter("http_requests_total", "Requests by route and status", ["method", "route", "status"])
+IN_FLIGHT = Gauge("http_requests_in_flight", "Requests currently being handled")
+SPAN_LATENCY = Histogram(
+    "span_duration_seconds", "Latency of instrumented operations", ["span"], buckets=LATENCY_BUCKETS
+)
+SPAN_ERRORS = Counter("span_errors_total", "Instrumented operations that raised", ["span"])
+
+_request_timings: contextvars.ContextVar = contextvars.ContextVar("request_timings", default=None)
+
+
+# --------------------------------------------------
+# Spans
+# --------------------------------------------------
+def _record(name: str, seconds: float):
+    SPAN_LATENCY.labels(name).observe(seconds)
+    timings = _request_timings.get()
+    if timings is not None:
+        entry = timings.setdefault(name, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+
+@contextmanager
+def span(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        SPAN_ERRORS.labels(name).inc()
+        raise
+    finally:
+        _record(name, time.perf_counter() - start)
+
+
+def timed(name: str):
+    """Decorator form of `span`."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TimedCursor(_psycopg2_cursor):
+    """psycopg2 cursor that records every execute as a `db_query` span."""
+
+    def execute(self, query, vars=None):
+        with span("db_query"):
+            return super().execute(query, vars)
+
+    def executemany(self, query, vars_list):
+        with span("db_query"):
+            return super().executemany(query, vars_list)
+
+
+def gauge_callback(name: str, documentation: str, fn):
+    """Registers a gauge whose value is `fn()` at scrape time; errors read as NaN."""
+    def read():
+        try:
+            return float(fn())
+        except Exception:
+            return float("nan")
+    Gauge(name, documentation).set_function(read)
+
+
+class QueueDepth:
+    """Counts tasks submitted to an executor through `submit` that no worker has started yet."""
+
+    def __init__(self):
+        self._waiting = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._waiting
+
+    def _add(self, n: int):
+        with self._lock:
+            self._waiting += n
+
+    def submit(self, executor, fn, *args):
+        def run():
+            self._add(-1)
+            return fn(*args)
+        self._add(1)
+        try:
+            return executor.submit(run)
+        except BaseException:
+            self._add(-1)
+            raise
+
+
+def render() -> tuple:
+    """Returns (body, content type) for the /metrics endpoint."""
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+# --------------------------------------------------
+# Middleware
+# --------------------------------------------------
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (does not buffer streaming responses). Latency is measured until
+    the response body has been fully sent.
+    """
+
+    def __init__(self, app, skip_paths=("/metrics",)):
+        self.app = app
+        self.skip_paths = set(skip_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        timings = {}
+        token = _request_timings.set(timings)
+        IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            IN_FLIGHT.dec()
+            _request_timings.reset(token)
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            REQUEST_LATENCY.labels(method, template).observe(elapsed)
+            REQUEST_COUNT.labels(method, template, str(status["code"])).inc()
+            if LOG_REQUESTS:
+                logger.info(json.dumps({
+                    "method": method,
+                    "route": template,
+                    "path": scope["path"],
+                    "status": status["code"],
+                    "duration_ms": round(elapsed * 1000, 3),
+                    "spans": {k: {"count": n, "ms": round(s * 1000, 3)} for k, (n, s) in timings.items()},
+                }))
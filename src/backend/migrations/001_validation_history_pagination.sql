@@ -0,0 +1,15 @@
+-- 001_validation_history_pagination.sql
+-- Supports keyset pagination and filename search on /api/upload-history.
+
+-- Keyset pagination: each page is a range scan on (username, created_at, id),
+-- newest first, so deep pages cost the same as the first one.
+CREATE INDEX IF NOT EXISTS validation_history_user_created_idx
+    ON validation_history (username, created_at DESC, id DESC)
+    STORING (source_file_name, target_file_name, is_valid);
+
+-- Substring search: trigram inverted indexes let `ILIKE '%term%'` use an index
+-- instead of scanning every row of the user's history.
+CREATE INDEX IF NOT EXISTS validation_history_source_file_trgm_idx
+    ON validation_history USING GIN (source_file_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS validation_history_target_file_trgm_idx
+    ON validation_history USING GIN (target_file_name gin_trgm_ops);
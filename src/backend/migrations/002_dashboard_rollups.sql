@@ -0,0 +1,21 @@
+-- 002_dashboard_rollups.sql
+-- Per-user dashboard rollups maintained by rollups.py in the same transaction as the
+-- writes to validation_history / reports. Backfill (and repair drift) with:
+--     python rollups.py
+
+CREATE TABLE IF NOT EXISTS user_dashboard_rollups (
+    username STRING PRIMARY KEY,
+    total INT8 NOT NULL DEFAULT 0,
+    successful INT8 NOT NULL DEFAULT 0,
+    failed INT8 NOT NULL DEFAULT 0,
+    profiling_time_sum FLOAT8 NOT NULL DEFAULT 0,
+    profiling_time_count INT8 NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS user_daily_validations (
+    username STRING NOT NULL,
+    day DATE NOT NULL,
+    total INT8 NOT NULL DEFAULT 0,
+    PRIMARY KEY (username, day)
+);
@@ -0,0 +1,8 @@
+-- 003_validation_history_idempotency.sql
+-- Deduplicates Pub/Sub redeliveries: ingest.py inserts with
+-- ON CONFLICT (idempotency_key) DO NOTHING. Rows written by the upload path keep a NULL key.
+
+ALTER TABLE validation_history ADD COLUMN IF NOT EXISTS idempotency_key STRING;
+
+CREATE UNIQUE INDEX IF NOT EXISTS validation_history_idempotency_key_idx
+    ON validation_history (idempotency_key);
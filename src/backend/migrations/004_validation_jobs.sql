@@ -0,0 +1,29 @@
+-- 004_validation_jobs.sql
+-- Background validation jobs run by jobs.py. One job per validation_history row; the
+-- state column ('queued', 'running', 'done', 'failed', 'cancelled') is what
+-- /api/upload-history reports. Jobs still queued or running at startup are re-queued.
+
+CREATE TABLE IF NOT EXISTS validation_jobs (
+    id INT8 PRIMARY KEY DEFAULT unique_rowid(),
+    history_id INT8 NOT NULL,
+    username STRING NOT NULL,
+    source_blob STRING NOT NULL,
+    target_blob STRING NOT NULL,
+    state STRING NOT NULL DEFAULT 'queued',
+    attempts INT8 NOT NULL DEFAULT 0,
+    error STRING,
+    run_after TIMESTAMP,
+    report_id INT8,
+    created_at TIMESTAMP NOT NULL DEFAULT now(),
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS validation_jobs_history_id_idx
+    ON validation_jobs (history_id) STORING (state);
+
+CREATE INDEX IF NOT EXISTS validation_jobs_username_state_idx
+    ON validation_jobs (username, state);
+
+CREATE INDEX IF NOT EXISTS validation_jobs_state_idx
+    ON validation_jobs (state, created_at);
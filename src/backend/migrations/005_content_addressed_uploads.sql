@@ -0,0 +1,18 @@
+-- 005_content_addressed_uploads.sql
+-- Content hashes of uploads and reusable validation results (content_store.py).
+-- Rows written before this migration keep NULL hashes and are never reused.
+
+ALTER TABLE validation_history ADD COLUMN IF NOT EXISTS source_hash STRING;
+ALTER TABLE validation_history ADD COLUMN IF NOT EXISTS target_hash STRING;
+ALTER TABLE validation_history ADD COLUMN IF NOT EXISTS report_id INT8;
+
+CREATE TABLE IF NOT EXISTS validation_results (
+    username STRING NOT NULL,
+    source_hash STRING NOT NULL,
+    target_hash STRING NOT NULL,
+    ruleset_version INT8 NOT NULL,
+    report_id INT8 NOT NULL,
+    is_valid BOOL NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT now(),
+    PRIMARY KEY (username, source_hash, target_hash, ruleset_version)
+);
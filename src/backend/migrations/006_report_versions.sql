@@ -0,0 +1,7 @@
+-- 006_report_versions.sql
+-- Version of a report's documents, bumped by every write to checks, profiling or
+-- detailedoverview after the report is created. The document endpoints derive their
+-- ETags from (report id, version), so unchanged documents are revalidated with a 304 and
+-- their encoded bodies can be cached.
+
+ALTER TABLE reports ADD COLUMN IF NOT EXISTS version INT8 NOT NULL DEFAULT 1;
@@ -0,0 +1,9 @@
+-- 007_oauth_states.sql
+-- Pending OAuth login states for the "database" OAuth state store (oauth_state.py), used
+-- when the login and its callback can be served by different instances. Expired rows are
+-- never redeemed and are deleted by row-level TTL.
+
+CREATE TABLE IF NOT EXISTS oauth_states (
+    state STRING PRIMARY KEY,
+    expires_at TIMESTAMPTZ NOT NULL
+) WITH (ttl_expiration_expression = 'expires_at', ttl_job_cron = '*/10 * * * *');
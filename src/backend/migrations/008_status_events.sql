@@ -0,0 +1,14 @@
+-- 008_status_events.sql
+-- Per-user status events for the "database" backend of status_events.py. Every API process
+-- reads back recent rows for the users it has streams open for, and reconnecting clients
+-- replay the rows after their Last-Event-ID. The rows are advisory; they expire after a day.
+
+CREATE TABLE IF NOT EXISTS status_events (
+    id INT8 PRIMARY KEY DEFAULT unique_rowid(),
+    username STRING NOT NULL,
+    type STRING NOT NULL,
+    payload JSONB NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    INDEX status_events_username_id_idx (username, id),
+    INDEX status_events_created_at_idx (created_at, username) STORING (type, payload)
+) WITH (ttl_expire_after = '1 day');
@@ -0,0 +1,8 @@
+-- 009_reports_pagination.sql
+-- Supports keyset pagination on /api/reports.
+
+-- Each page is a range scan on (username, time, id), newest first. A DESC column keeps
+-- NULLs last, matching `ORDER BY time DESC NULLS LAST, id DESC`, so reports without a
+-- time are paged through after all the others.
+CREATE INDEX IF NOT EXISTS reports_username_time_idx
+    ON reports (username, time DESC, id DESC);
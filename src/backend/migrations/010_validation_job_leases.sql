@@ -0,0 +1,6 @@
+-- 010_validation_job_leases.sql
+-- A running job is leased to the runner that claimed it. The runner renews the lease
+-- while the job runs (JobRunner heartbeat); only jobs whose lease has expired, because
+-- their runner died, are re-queued, however long a healthy job takes.
+
+ALTER TABLE validation_jobs ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP;
@@ -0,0 +1,12 @@
+-- 011_user_rulesets.sql
+-- Per-user check rulesets (rulesets.py, /api/ruleset). A job stores the ruleset it was
+-- queued with, so a later edit does not change what a queued or retried job checks;
+-- NULL means checks_engine.default_rules.
+
+CREATE TABLE IF NOT EXISTS user_rulesets (
+    username STRING PRIMARY KEY,
+    ruleset JSONB NOT NULL,
+    updated_at TIMESTAMP NOT NULL DEFAULT now()
+);
+
+ALTER TABLE validation_jobs ADD COLUMN IF NOT EXISTS ruleset JSONB;
@@ -0,0 +1,137 @@
+# oauth_state.py
+#
+# Pending OAuth `state` values between /api/login and /api/callback, keyed by the state
+# itself so concurrent logins never overwrite each other. Every store expires entries after
+# `ttl` seconds and consumes them atomically, so a state can be redeemed once.
+#
+# Backends (OAUTH_STATE_STORE):
+# - "memory":   this process only; enough for a single uvicorn worker.
+# - "sqlite":   a file shared by the worker processes of one container (the default, so
+#               the multi-worker launch in the Dockerfile works without extra services).
+# - "database": the `oauth_states` table (migrations/007_oauth_states.sql), for when the
+#               login and the callback can land on different instances.
+
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+OAUTH_STATE_BACKENDS = ("memory", "sqlite", "database")
+
+
+class MemoryStateStore:
+    """Bounded, thread-safe LRU of state -> expiry time."""
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, state: str):
+        with self._lock:
+            self._entries[state] = time.time() + self.ttl
+            self._entries.move_to_end(state)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def consume(self, state: str) -> bool:
+        with self._lock:
+            expires_at = self._entries.pop(state, None)
+        return expires_at is not None and expires_at > time.time()
+
+
+class SQLiteStateStore:
+    """
+    State shared by the processes on one host through a SQLite file in WAL mode. Each put
+    drops expired entries and, past `max_size`, the ones closest to expiring.
+    """
+
+    def __init__(self, path: str, ttl: float, max_size: int):
+        self.path = path
+        self.ttl = ttl
+        self.max_size = max_size
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS oauth_states (state TEXT PRIMARY KEY, expires_at REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS oauth_states_expires_at_idx ON oauth_states (expires_at)")
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5, isolation_level=None)
+
+    def put(self, state: str):
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("INSERT OR REPLACE INTO oauth_states (state, expires_at) VALUES (?, ?)", (state, now + self.ttl))
+            conn.execute("DELETE FROM oauth_states WHERE expires_at <= ?", (now,))
+            conn.execute("""
+                DELETE FROM oauth_states WHERE expires_at < (
+                    SELECT expires_at FROM oauth_states ORDER BY expires_at DESC LIMIT 1 OFFSET ?
+                )
+            """, (self.max_size - 1,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def consume(self, state: str) -> bool:
+        conn = self._connect()
+        try:
+            cursor = conn.execute("DELETE FROM oauth_states WHERE state = ? AND expires_at > ?", (state, time.time()))
+            return cursor.rowcount == 1
+        finally:
+            conn.close()
+
+
+class DatabaseStateStore:
+    """
+    State in the shared database. Rows carry their expiry; row-level TTL on the table
+    deletes them in the background, so the table is bounded by the login rate times `ttl`.
+    """
+
+    def __init__(self, engine, ttl: float):
+        self.engine = engine
+        self.ttl = ttl
+
+    def _execute(self, sql: str, params: tuple):
+        conn = self.engine.raw_connection()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(sql, params)
+                row = cursor.fetchone() if cursor.description else None
+            conn.commit()
+            return row
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def put(self, state: str):
+        self._execute(
+            "UPSERT INTO oauth_states (state, expires_at) VALUES (%s, now() + %s * INTERVAL '1 second')",
+            (state, self.ttl),
+        )
+
+    def consume(self, state: str) -> bool:
+        row = self._execute("DELETE FROM oauth_states WHERE state = %s AND expires_at > now() RETURNING state", (state,))
+        return row is not None
+
+
+def create_state_store(backend: str, engine=None, ttl: float = 600, max_size: int = 10000, path: str | None = None):
+    if backend == "memory":
+        return MemoryStateStore(ttl, max_size)
+    if backend == "sqlite":
+        return SQLiteStateStore(path or os.path.join(tempfile.gettempdir(), "oauth_states.sqlite3"), ttl, max_size)
+    if backend == "database":
+        return DatabaseStateStore(engine, ttl)
+    raise ValueError(f"Unknown OAuth state store '{backend}', expected one of {', '.join(OAUTH_STATE_BACKENDS)}")
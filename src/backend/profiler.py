@@ -0,0 +1,373 @@
+# profiler.py
+#
+# Single-pass, bounded-memory data profiler for uploaded files.
+# Per column it keeps exact counts, null counts, min/max and mean/variance (Welford,
+# merged with Chan's formula) plus three mergeable sketches over the column's values:
+#   - HyperLogLog for distinct counts,
+#   - a KLL-style compactor hierarchy for quantiles of numeric values,
+#   - a Misra-Gries / Space-Saving summary for top-k frequent values.
+# Every partial profile merges with another, so chunks can be profiled in parallel
+# processes and combined. The result is stored in `reports.profiling`, whose `time`
+# feeds the dashboard's average-time metric through rollups.record_report_time.
+
+import io
+import json
+import logging
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+import rollups
+from checks_engine import NUMBER_PATTERN, null_mask, read_batches
+from hashing import hash_strings
+
+logger = logging.getLogger(__name__)
+
+HLL_PRECISION = 14
+KLL_CAPACITY = 200
+TOP_K = 10
+TOP_K_CAPACITY = 100
+QUANTILES = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+
+
+# --------------------------------------------------
+# Sketches
+# --------------------------------------------------
+def _leading_zeros(x: np.ndarray) -> np.ndarray:
+    """Vectorized count of leading zero bits in uint64 values (binary search over shifts)."""
+    x = x.copy()
+    zeros = np.zeros(len(x), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        top_clear = x < (np.uint64(1) << np.uint64(64 - shift))
+        zeros[top_clear] += shift
+        x[top_clear] <<= np.uint64(shift)
+    return zeros
+
+
+class HyperLogLog:
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add_hashes(self, hashes: np.ndarray):
+        if not len(hashes):
+            return
+        p = np.uint64(self.precision)
+        index = (hashes >> (np.uint64(64) - p)).astype(np.int64)
+        remainder = (hashes << p) | (np.uint64(1) << (p - np.uint64(1)))
+        # Rank = position of the leftmost 1-bit in the remaining 64 - p bits.
+        rank = (_leading_zeros(remainder) + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: "HyperLogLog"):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return int(round(m * math.log(m / zeros)))
+        return int(round(raw))
+
+
+class KLLSketch:
+    """
+    Quantile sketch: level h holds items of weight 2**h. A level that outgrows `capacity`
+    is sorted and every other item (random offset) is promoted to the next level.
+    """
+
+    def __init__(self, capacity: int = KLL_CAPACITY, seed: int = 0):
+        self.capacity = capacity
+        self.levels = [np.zeros(0, dtype=np.float64)]
+        self.count = 0
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values: np.ndarray):
+        if not len(values):
+            return
+        self.count += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values.astype(np.float64)])
+        self._compress()
+
+    def merge(self, other: "KLLSketch"):
+        self.count += other.count
+        for h, items in enumerate(other.levels):
+            if h >= len(self.levels):
+                self.levels.append(np.zeros(0, dtype=np.float64))
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self._compress()
+
+    def _compress(self):
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if len(level) > self.capacity:
+                level = np.sort(level)
+                if len(level) % 2:
+                    # Keep one item back so the promoted half carries exactly double weight.
+                    keep, level = level[-1:], level[:-1]
+                else:
+                    keep = level[:0]
+                promoted = level[self._rng.integers(0, 2)::2]
+                self.levels[h] = keep
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.zeros(0, dtype=np.float64))
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+            h += 1
+
+    def quantiles(self, qs) -> dict:
+        if not self.count:
+            return {}
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2 ** h, dtype=np.float64) for h, level in enumerate(self.levels)])
+        order = np.argsort(items)
+        items, cumulative = items[order], np.cumsum(weights[order])
+        total = cumulative[-1]
+        return {f"p{round(q * 100)}": float(items[min(np.searchsorted(cumulative, q * total), len(items) - 1)]) for q in qs}
+
+
+class TopKSummary:
+    """
+    Misra-Gries summary (the mergeable form of Space-Saving) with `capacity` counters.
+    Batches are folded in as exact value counts, so per-row work stays in Arrow.
+    `error` carries the total decremented by pruning, across updates and merges: a value's
+    true count lies between its counter (0 if untracked) and the counter plus `error`.
+    """
+
+    def __init__(self, capacity: int = TOP_K_CAPACITY):
+        self.capacity = capacity
+        self.counters = {}
+        self.error = 0
+
+    def update_counts(self, values: list, counts: list):
+        for value, count in zip(values, counts):
+            self.counters[value] = self.counters.get(value, 0) + count
+        self._prune()
+
+    def update(self, values: pa.Array):
+        if not len(values):
+            return
+        value_counts = pc.value_counts(values)
+        batch_values = value_counts.field("values")
+        counts = value_counts.field("counts").to_numpy()
+        if len(counts) > self.capacity + 1:
+            # Tracked values always get their batch count. Of the others, only the heaviest
+            # capacity + 1 can outlast the prune: the rest are at or below the threshold it
+            # subtracts, so leaving them out gives the same summary and the same error.
+            if self.counters:
+                tracked = pc.is_in(batch_values, value_set=pa.array(list(self.counters), type=batch_values.type))
+                tracked = tracked.to_numpy(zero_copy_only=False)
+            else:
+                tracked = np.zeros(len(counts), dtype=bool)
+            others = np.flatnonzero(~tracked)
+            if len(others) > self.capacity + 1:
+                others = others[np.argpartition(counts[others], -self.capacity - 1)[-self.capacity - 1:]]
+            keep = np.concatenate([np.flatnonzero(tracked), others])
+            self.update_counts(batch_values.take(pa.array(keep)).to_pylist(), counts[keep].tolist())
+        else:
+            self.update_counts(batch_values.to_pylist(), counts.tolist())
+
+    def merge(self, other: "TopKSummary"):
+        self.error += other.error
+        self.update_counts(list(other.counters), list(other.counters.values()))
+
+    def _prune(self):
+        if len(self.counters) <= self.capacity:
+            return
+        threshold = sorted(self.counters.values(), reverse=True)[self.capacity]
+        self.error += threshold
+        self.counters = {v: c - threshold for v, c in self.counters.items() if c > threshold}
+
+    def top(self, k: int = TOP_K) -> list:
+        ranked = sorted(self.counters.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [{"value": v, "count": c} for v, c in ranked]
+
+
+# --------------------------------------------------
+# Column and table profiles
+# --------------------------------------------------
+class ColumnProfile:
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.null_count = 0
+        self.numeric_count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+        self.min_length = None
+        self.max_length = None
+        self.hll = HyperLogLog()
+        self.quantiles = KLLSketch()
+        self.top_k = TopKSummary()
+
+    def update(self, values: pa.Array):
+        nulls = null_mask(values)
+        present = pc.filter(values, pc.invert(nulls))
+        self.count += len(values)
+        self.null_count += len(values) - len(present)
+        if not len(present):
+            return
+
+        self.hll.add_hashes(hash_strings(present))
+        self.top_k.update(present)
+        lengths = pc.utf8_length(present)
+        self._merge_range("min_length", "max_length", pc.min(lengths).as_py(), pc.max(lengths).as_py())
+
+        numeric = pc.fill_null(pc.match_substring_regex(present, NUMBER_PATTERN), False)
+        numbers = pc.cast(pc.utf8_trim_whitespace(pc.filter(present, numeric)), pa.float64()).to_numpy()
+        if len(numbers):
+            self._merge_moments(len(numbers), float(numbers.mean()), float(((numbers - numbers.mean()) ** 2).sum()))
+            self._merge_range("min", "max", float(numbers.min()), float(numbers.max()))
+            self.quantiles.update(numbers)
+        elif not self.numeric_count:
+            # Text columns report lexicographic min/max.
+            self._merge_range("min", "max", pc.min(present).as_py(), pc.max(present).as_py())
+
+    def _merge_moments(self, n: int, mean: float, m2: float):
+        total = self.numeric_count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.numeric_count * n / total
+        self.numeric_count = total
+
+    def _merge_range(self, low_attr: str, high_attr: str, low, high):
+        current_low, current_high = getattr(self, low_attr), getattr(self, high_attr)
+        if current_low is not None and isinstance(current_low, str) != isinstance(low, str):
+            # Mixed numeric/text partials: keep the numeric range.
+            if isinstance(low, str):
+                return
+            current_low = current_high = None
+        setattr(self, low_attr, low if current_low is None or low < current_low else current_low)
+        setattr(self, high_attr, high if current_high is None or high > current_high else current_high)
+
+    def merge(self, other: "ColumnProfile"):
+        self.count += other.count
+        self.null_count += other.null_count
+        if other.numeric_count:
+            self._merge_moments(other.numeric_count, other.mean, other.m2)
+        if other.min is not None:
+            self._merge_range("min", "max", other.min, other.max)
+        if other.min_length is not None:
+            self._merge_range("min_length", "max_length", other.min_length, other.max_length)
+        self.hll.merge(other.hll)
+        self.quantiles.merge(other.quantiles)
+        self.top_k.merge(other.top_k)
+
+    def to_dict(self) -> dict:
+        numeric = self.numeric_count > 0 and self.numeric_count == self.count - self.null_count
+        stddev = math.sqrt(self.m2 / (self.numeric_count - 1)) if self.numeric_count > 1 else 0.0
+        return {
+            "field": self.name,
+            "type": "number" if numeric else "string",
+            "count": self.count,
+            "null_count": self.null_count,
+            "null_rate": round(self.null_count / self.count, 6) if self.count else 0.0,
+            "distinct_estimate": min(self.hll.estimate(), self.count - self.null_count),
+            "min": self.min,
+            "max": self.max,
+            "mean": self.mean if self.numeric_count else None,
+            "stddev": stddev if self.numeric_count else None,
+            "min_length": self.min_length,
+            "max_length": self.max_length,
+            "quantiles": self.quantiles.quantiles(QUANTILES),
+            "top_k": self.top_k.top(),
+            "top_k_error": self.top_k.error,
+            "status": "Passed" if self.null_count == 0 else "Warning",
+        }
+
+
+class TableProfile:
+    def __init__(self):
+        self.row_count = 0
+        self.columns = {}
+
+    def update(self, batch: pa.RecordBatch):
+        self.row_count += batch.num_rows
+        for name, column in zip(batch.schema.names, batch.columns):
+            if name not in self.columns:
+                self.columns[name] = ColumnProfile(name)
+            self.columns[name].update(column)
+
+    def merge(self, other: "TableProfile"):
+        self.row_count += other.row_count
+        for name, column in other.columns.items():
+            if name in self.columns:
+                self.columns[name].merge(column)
+            else:
+                self.columns[name] = column
+
+    def to_dict(self, seconds: float) -> dict:
+        return {
+            "time": round(seconds, 3),
+            "row_count": self.row_count,
+            "columns": [column.to_dict() for column in self.columns.values()],
+        }
+
+
+# --------------------------------------------------
+# Entry points
+# --------------------------------------------------
+def profile_batches(batches: Iterable[pa.RecordBatch]) -> TableProfile:
+    profile = TableProfile()
+    for batch in batches:
+        profile.update(batch)
+    return profile
+
+
+def _profile_ipc(payload: bytes) -> TableProfile:
+    with pa.ipc.open_stream(io.BytesIO(payload)) as reader:
+        return profile_batches(reader)
+
+
+def _to_ipc(batch: pa.RecordBatch) -> bytes:
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+
+def profile_file(opener, workers: int = 1, max_pending: Optional[int] = None) -> dict:
+    """
+    Profiles a CSV in one streaming pass. With `workers > 1` batches are profiled in a
+    process pool and the partial profiles merged; at most `max_pending` batches are in
+    flight, which bounds memory.
+    """
+    start = time.perf_counter()
+    batches = read_batches(opener)
+    if workers <= 1:
+        profile = profile_batches(batches)
+    else:
+        profile = TableProfile()
+        max_pending = max_pending or 2 * workers
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = []
+            for batch in batches:
+                pending.append(pool.submit(_profile_ipc, _to_ipc(batch)))
+                if len(pending) >= max_pending:
+                    profile.merge(pending.pop(0).result())
+            for future in pending:
+                profile.merge(future.result())
+    seconds = time.perf_counter() - start
+    logger.info("Profiled %d rows in %.2fs", profile.row_count, seconds)
+    return profile.to_dict(seconds)
+
+
+def save_profile(cursor, report_id: int, username: str, profile: dict):
+    """
+    Stores the profile on the report and adds its time to the dashboard rollups. Runs on
+    the caller's cursor; the caller commits.
+    """
+    cursor.execute(
+        "UPDATE reports SET profiling = %s, version = version + 1 WHERE id = %s AND username = %s",
+        (json.dumps(profile), report_id, username)
+    )
+    rollups.record_report_time(cursor, username, profile["time"])
@@ -0,0 +1,301 @@
+# reconcile.py
+#
+# Out-of-core source-vs-target reconciliation.
+# Both files are streamed once, rows are hashed on a configurable key and spilled to disk
+# into `num_partitions` Arrow IPC files per side (LZ4 compressed). Matching partitions are
+# then compared in parallel across a process pool, each small enough to fit in memory.
+# Every row is written once and read once, so spill I/O is predictable: roughly one
+# compressed copy of each file.
+#
+# The result is stored in `reports.detailedoverview`: per-column mismatch entries under
+# `fields` (the shape the detailed-overview viewer and slicing endpoints consume) plus
+# counts and samples of missing, extra and mismatched rows.
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
+import numpy as np
+import pyarrow as pa
+
+from checks_engine import column_names, read_batches
+from hashing import combine_hashes, first_occurrence_mask, hash_strings
+
+logger = logging.getLogger(__name__)
+
+KEY_HASH = "__key_hash"
+ROW_HASH = "__row_hash"
+DEFAULT_PARTITIONS = 64
+MAX_SAMPLES = 20
+IPC_OPTIONS = pa.ipc.IpcWriteOptions(compression="lz4")
+
+
+# --------------------------------------------------
+# Partitioning
+# --------------------------------------------------
+def _with_hashes(batch: pa.RecordBatch, key_columns: list, value_columns: list) -> pa.RecordBatch:
+    key_hash = combine_hashes(hash_strings(batch.column(name)) for name in key_columns)
+    row_hash = combine_hashes(hash_strings(batch.column(name)) for name in value_columns) if value_columns else np.zeros(batch.num_rows, np.uint64)
+    return batch.append_column(KEY_HASH, pa.array(key_hash)).append_column(ROW_HASH, pa.array(row_hash))
+
+
+def partition_file(opener, out_dir: str, key_columns: list, value_columns: list, num_partitions: int) -> dict:
+    """
+    Streams one file into `num_partitions` spill files by key hash.
+    Returns {"rows": n, "bytes": spilled bytes, "columns": [...]}.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    writers = {}
+    rows = 0
+    columns = []
+    try:
+        for batch in read_batches(opener):
+            columns = batch.schema.names
+            missing = [c for c in key_columns if c not in columns]
+            if missing:
+                raise ValueError(f"Key column(s) not found: {', '.join(missing)}")
+            batch = _with_hashes(batch, key_columns, [c for c in value_columns if c in columns])
+            partitions = (batch.column(KEY_HASH).to_numpy() >> np.uint64(32)) % np.uint64(num_partitions)
+            order = np.argsort(partitions, kind="stable")
+            bounds = np.concatenate([[0], np.cumsum(np.bincount(partitions.astype(np.int64), minlength=num_partitions))])
+            grouped = batch.take(pa.array(order))
+            for part in np.flatnonzero(np.diff(bounds)):
+                if part not in writers:
+                    path = os.path.join(out_dir, f"part-{part:05d}.arrow")
+                    writers[part] = pa.ipc.new_file(path, batch.schema, options=IPC_OPTIONS)
+                writers[part].write_batch(grouped.slice(bounds[part], bounds[part + 1] - bounds[part]))
+            rows += batch.num_rows
+    finally:
+        for writer in writers.values():
+            writer.close()
+    spilled = sum(os.path.getsize(os.path.join(out_dir, f)) for f in os.listdir(out_dir))
+    return {"rows": rows, "bytes": spilled, "columns": columns}
+
+
+def _read_partition(path: str) -> Optional[pa.Table]:
+    if not os.path.exists(path):
+        return None
+    # Spill files are LZ4 compressed, so reading decompresses into fresh buffers.
+    return pa.ipc.open_file(pa.memory_map(path)).read_all()
+
+
+# --------------------------------------------------
+# Comparison
+# --------------------------------------------------
+def _key_values(table: pa.Table, key_columns: list, indices: np.ndarray) -> list:
+    taken = table.select(key_columns).take(pa.array(indices))
+    return [dict(zip(key_columns, row)) for row in zip(*(col.to_pylist() for col in taken.columns))]
+
+
+def compare_partition(source_path: str, target_path: str, key_columns: list, value_columns: list, max_samples: int = MAX_SAMPLES) -> dict:
+    """
+    Compares one pair of spill files. Duplicate keys within a side are counted and only
+    their first occurrence is compared.
+    """
+    source = _read_partition(source_path)
+    target = _read_partition(target_path)
+    result = {
+        "missing": 0, "extra": 0, "mismatched": 0, "matched": 0,
+        "duplicate_source_keys": 0, "duplicate_target_keys": 0,
+        "missing_samples": [], "extra_samples": [], "mismatch_samples": [],
+        "columns": {name: {"mismatched_rows": 0, "samples": []} for name in value_columns},
+    }
+    if source is None and target is None:
+        return result
+
+    def keyed(table):
+        if table is None:
+            return None, np.zeros(0, np.uint64), np.zeros(0, np.int64)
+        keys = table.column(KEY_HASH).to_numpy()
+        first = first_occurrence_mask(keys)
+        return table, keys, np.flatnonzero(first)
+
+    source, source_keys, source_rows = keyed(source)
+    target, target_keys, target_rows = keyed(target)
+    result["duplicate_source_keys"] = len(source_keys) - len(source_rows)
+    result["duplicate_target_keys"] = len(target_keys) - len(target_rows)
+
+    _, s_idx, t_idx = np.intersect1d(source_keys[source_rows], target_keys[target_rows], assume_unique=True, return_indices=True)
+    s_matched, t_matched = source_rows[s_idx], target_rows[t_idx]
+
+    missing = np.setdiff1d(source_rows, s_matched, assume_unique=True)
+    extra = np.setdiff1d(target_rows, t_matched, assume_unique=True)
+    result["missing"] = len(missing)
+    result["extra"] = len(extra)
+    if len(missing):
+        result["missing_samples"] = _key_values(source, key_columns, missing[:max_samples])
+    if len(extra):
+        result["extra_samples"] = _key_values(target, key_columns, extra[:max_samples])
+    if not len(s_matched):
+        return result
+
+    differs = source.column(ROW_HASH).to_numpy()[s_matched] != target.column(ROW_HASH).to_numpy()[t_matched]
+    result["matched"] = int(len(s_matched) - differs.sum())
+    result["mismatched"] = int(differs.sum())
+    if not result["mismatched"]:
+        return result
+
+    s_diff, t_diff = s_matched[differs], t_matched[differs]
+    s_take, t_take = pa.array(s_diff), pa.array(t_diff)
+    sample_keys = _key_values(source, key_columns, s_diff[:max_samples])
+    fields_by_row = [[] for _ in sample_keys]
+    for name in value_columns:
+        if name not in source.column_names or name not in target.column_names:
+            continue
+        s_values = source.column(name).take(s_take)
+        t_values = target.column(name).take(t_take)
+        column_differs = np.flatnonzero(hash_strings(s_values) != hash_strings(t_values))
+        stats = result["columns"][name]
+        stats["mismatched_rows"] = len(column_differs)
+        if len(column_differs):
+            picked = column_differs[:max_samples]
+            keys = _key_values(source, key_columns, s_diff[picked])
+            s_sample = s_values.take(pa.array(picked)).to_pylist()
+            t_sample = t_values.take(pa.array(picked)).to_pylist()
+            stats["samples"] = [{"key": k, "source": s, "target": t} for k, s, t in zip(keys, s_sample, t_sample)]
+            for i in column_differs[column_differs < len(sample_keys)]:
+                fields_by_row[i].append(name)
+    result["mismatch_samples"] = [{"key": k, "fields": f} for k, f in zip(sample_keys, fields_by_row)]
+    return result
+
+
+def _merge_results(total: dict, part: dict, max_samples: int):
+    for key in ("missing", "extra", "mismatched", "matched", "duplicate_source_keys", "duplicate_target_keys"):
+        total[key] += part[key]
+    for key in ("missing_samples", "extra_samples", "mismatch_samples"):
+        total[key].extend(part[key][:max_samples - len(total[key])])
+    for name, stats in part["columns"].items():
+        merged = total["columns"].setdefault(name, {"mismatched_rows": 0, "samples": []})
+        merged["mismatched_rows"] += stats["mismatched_rows"]
+        merged["samples"].extend(stats["samples"][:max_samples - len(merged["samples"])])
+
+
+# --------------------------------------------------
+# Entry point
+# --------------------------------------------------
+def reconcile(source_opener, target_opener, key_columns: list, value_columns: Optional[list] = None,
+              num_partitions: int = DEFAULT_PARTITIONS, workers: Optional[int] = None,
+              spill_dir: Optional[str] = None, max_samples: int = MAX_SAMPLES) -> dict:
+    """
+    Reconciles target against source on `key_columns`. `value_columns` defaults to every
+    non-key column present in both files. Choose `num_partitions` so that one partition of
+    each side (file size / num_partitions) fits comfortably in a worker's memory.
+    """
+    start = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    work_dir = tempfile.mkdtemp(prefix="reconcile-", dir=spill_dir)
+    try:
+        if value_columns is None:
+            value_columns = _common_value_columns(source_opener, target_opener, key_columns)
+
+        source_dir = os.path.join(work_dir, "source")
+        target_dir = os.path.join(work_dir, "target")
+        # Openers are closures (not picklable), so both sides are partitioned on threads;
+        # CSV parsing, hashing and IPC writes all release the GIL.
+        with ThreadPoolExecutor(max_workers=2) as threads:
+            source_job = threads.submit(partition_file, source_opener, source_dir, key_columns, value_columns, num_partitions)
+            target_job = threads.submit(partition_file, target_opener, target_dir, key_columns, value_columns, num_partitions)
+            source_info, target_info = source_job.result(), target_job.result()
+        partition_seconds = time.perf_counter() - start
+
+        totals = {
+            "missing": 0, "extra": 0, "mismatched": 0, "matched": 0,
+            "duplicate_source_keys": 0, "duplicate_target_keys": 0,
+            "missing_samples": [], "extra_samples": [], "mismatch_samples": [], "columns": {},
+        }
+        pairs = [
+            (os.path.join(source_dir, f"part-{p:05d}.arrow"), os.path.join(target_dir, f"part-{p:05d}.arrow"))
+            for p in range(num_partitions)
+        ]
+        if workers == 1:
+            # In-process, e.g. inside a validation job that already runs in a pool worker.
+            for source_path, target_path in pairs:
+                _merge_results(totals, compare_partition(source_path, target_path, key_columns, value_columns, max_samples), max_samples)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                jobs = [
+                    pool.submit(compare_partition, source_path, target_path, key_columns, value_columns, max_samples)
+                    for source_path, target_path in pairs
+                ]
+                for job in jobs:
+                    _merge_results(totals, job.result(), max_samples)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    seconds = time.perf_counter() - start
+    logger.info(
+        "Reconciled %d source / %d target rows in %.2fs (spilled %.1f MB)",
+        source_info["rows"], target_info["rows"], seconds,
+        (source_info["bytes"] + target_info["bytes"]) / 1024 ** 2,
+    )
+    return _to_overview(totals, source_info, target_info, key_columns, value_columns, seconds, partition_seconds)
+
+
+def default_key_columns(source_names: list, target_names: list) -> list:
+    """
+    The key used when none is configured: the first column both files share that is named
+    `id` or ends in `_id`, otherwise the first shared column. Empty if they share none.
+    """
+    shared = [name for name in source_names if name in target_names]
+    for name in shared:
+        if name.lower() == "id" or name.lower().endswith("_id"):
+            return [name]
+    return shared[:1]
+
+
+def _common_value_columns(source_opener, target_opener, key_columns: list) -> list:
+    target_names = column_names(target_opener)
+    return [c for c in column_names(source_opener) if c in target_names and c not in key_columns]
+
+
+def _to_overview(totals: dict, source_info: dict, target_info: dict, key_columns: list,
+                 value_columns: list, seconds: float, partition_seconds: float) -> dict:
+    fields = []
+    for name in value_columns:
+        stats = totals["columns"].get(name, {"mismatched_rows": 0, "samples": []})
+        first = stats["samples"][0] if stats["samples"] else {}
+        fields.append({
+            "field": name,
+            "name": "Value Mismatch",
+            "status": "Failed" if stats["mismatched_rows"] else "Passed",
+            "mismatched_rows": stats["mismatched_rows"],
+            "source": first.get("source"),
+            "target": first.get("target"),
+            "samples": stats["samples"],
+        })
+    for name in source_info["columns"]:
+        if name not in target_info["columns"]:
+            fields.append({"field": name, "name": "Missing In Target", "status": "Failed", "mismatched_rows": None, "source": name, "target": None, "samples": []})
+    for name in target_info["columns"]:
+        if name not in source_info["columns"]:
+            fields.append({"field": name, "name": "Missing In Source", "status": "Failed", "mismatched_rows": None, "source": None, "target": name, "samples": []})
+    return {
+        "time": round(seconds, 3),
+        "partition_time": round(partition_seconds, 3),
+        "key_columns": key_columns,
+        "source_rows": source_info["rows"],
+        "target_rows": target_info["rows"],
+        "matched_rows": totals["matched"],
+        "mismatched_rows": totals["mismatched"],
+        "missing_rows": totals["missing"],
+        "extra_rows": totals["extra"],
+        "duplicate_source_keys": totals["duplicate_source_keys"],
+        "duplicate_target_keys": totals["duplicate_target_keys"],
+        "missing_samples": totals["missing_samples"],
+        "extra_samples": totals["extra_samples"],
+        "mismatch_samples": totals["mismatch_samples"],
+        "fields": fields,
+    }
+
+
+def save_overview(cursor, report_id: int, username: str, overview: dict):
+    """Stores the overview on the report. Runs on the caller's cursor; the caller commits."""
+    cursor.execute(
+        "UPDATE reports SET detailedoverview = %s, version = version + 1 WHERE id = %s AND username = %s",
+        (json.dumps(overview), report_id, username)
+    )
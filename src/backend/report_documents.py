@@ -0,0 +1,286 @@
+# report_documents.py
+#
+# Server-side access to the per-report JSONB documents (checks, profiling, detailed
+# overview). Slicing, filtering, sorting and summary counts are evaluated in SQL over
+# the document's entries, so only the requested page ever leaves the database.
+# Whole documents are served as the stored JSON text, never decoded: see the
+# "Whole-document responses" section.
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+import metrics
+
+try:
+    import brotli
+except ImportError:  # responses fall back to gzip
+    brotli = None
+
+
+@dataclass(frozen=True)
+class ReportDocument:
+    column: str          # JSONB column on `reports`
+    url_column: str      # GCS path of the downloadable copy
+    entries_key: str     # key holding the entries array when the document is an object
+    response_key: str    # key the API returns the document under
+    not_found: str       # 404 detail
+
+
+REPORT_DOCUMENTS = {
+    "checks": ReportDocument("checks", "failed_checks_url", "checks", "checks", "Checks not found"),
+    "profiling": ReportDocument("profiling", "data_profiling_url", "columns", "profile", "Profiling not found"),
+    "detailed": ReportDocument("detailedoverview", "detailed_overview_url", "fields", "detailed_overview", "Overview not found"),
+}
+
+# Entry keys that can be filtered and sorted on; `position` is the entry's index in the document.
+FILTER_KEYS = ("name", "field", "status")
+SORT_KEYS = ("position", "name", "field", "status")
+
+
+@dataclass
+class EntryQuery:
+    offset: int = 0
+    limit: Optional[int] = None
+    name: Optional[str] = None
+    field: Optional[str] = None
+    status: Optional[str] = None
+    sort: Optional[str] = None
+    order: str = "asc"
+    summary_only: bool = False
+
+    @property
+    def is_sliced(self) -> bool:
+        """True when the caller asked for anything other than the whole document."""
+        return bool(
+            self.offset or self.limit is not None or self.summary_only or self.sort
+            or any(getattr(self, key) is not None for key in FILTER_KEYS)
+        )
+
+
+def _entries_cte(doc: ReportDocument) -> str:
+    # Documents are either an array of entries or an object holding that array under
+    # `entries_key`; anything else has no sliceable entries.
+    return f"""
+        WITH entries AS (
+            SELECT e.value AS entry, e.ordinality AS position
+            FROM reports r,
+                 jsonb_array_elements(
+                     CASE
+                         WHEN jsonb_typeof(r.{doc.column}) = 'array' THEN r.{doc.column}
+                         WHEN jsonb_typeof(r.{doc.column}->'{doc.entries_key}') = 'array' THEN r.{doc.column}->'{doc.entries_key}'
+                         ELSE '[]'::JSONB
+                     END
+                 ) WITH ORDINALITY AS e(value, ordinality)
+            WHERE r.id = %s AND r.username = %s
+        )
+    """
+
+
+def _filters(query: EntryQuery):
+    clauses = []
+    params = []
+    for key in FILTER_KEYS:
+        value = getattr(query, key)
+        if value is not None:
+            clauses.append(f"entry->>'{key}' = %s")
+            params.append(value)
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+def _order_by(query: EntryQuery) -> str:
+    direction = "DESC" if query.order == "desc" else "ASC"
+    if not query.sort or query.sort == "position":
+        return f" ORDER BY position {direction}"
+    return f" ORDER BY entry->>'{query.sort}' {direction}, position ASC"
+
+
+def entries_sql(doc: ReportDocument, query: EntryQuery, report_id: int, username: str, paged: bool = True):
+    """
+    Returns (sql, params) selecting the filtered, sorted entries of one report document.
+    With `paged=False` the offset/limit are ignored (used by streaming exports).
+    """
+    where, filter_params = _filters(query)
+    sql = _entries_cte(doc) + "SELECT entry FROM entries" + where + _order_by(query)
+    params = [report_id, username] + filter_params
+    if paged:
+        if query.limit is not None:
+            sql += " LIMIT %s"
+            params.append(query.limit)
+        sql += " OFFSET %s"
+        params.append(query.offset)
+    return sql, params
+
+
+def count_entries(cursor, doc: ReportDocument, query: EntryQuery, report_id: int, username: str) -> int:
+    where, filter_params = _filters(query)
+    cursor.execute(_entries_cte(doc) + "SELECT COUNT(*) FROM entries" + where, [report_id, username] + filter_params)
+    return cursor.fetchone()[0]
+
+
+def summarize_entries(cursor, doc: ReportDocument, report_id: int, username: str) -> list:
+    """
+    Per-field, per-status entry counts over the whole document, so a viewer can render the
+    overview before paging through individual entries.
+    """
+    cursor.execute(_entries_cte(doc) + """
+        SELECT entry->>'field', entry->>'status', COUNT(*)
+        FROM entries
+        GROUP BY 1, 2
+        ORDER BY 3 DESC, 1
+    """, [report_id, username])
+    return [{"field": r[0], "status": r[1], "count": r[2]} for r in cursor.fetchall()]
+
+
+def query_entries(cursor, doc: ReportDocument, query: EntryQuery, report_id: int, username: str) -> dict:
+    """
+    Evaluates a sliced read of one report document. The summary is included on the first
+    page (offset 0) and is all that is returned with `summary_only`.
+    The page, its total (`COUNT(*) OVER ()` is taken before LIMIT/OFFSET) and the summary
+    come from one statement over one expansion of the document: the `entries` CTE is
+    referenced twice, so the database materializes it once.
+    """
+    if query.summary_only:
+        return {"summary": summarize_entries(cursor, doc, report_id, username)}
+
+    where, filter_params = _filters(query)
+    order = _order_by(query)
+    paging = " LIMIT %s OFFSET %s" if query.limit is not None else " OFFSET %s"
+    sql = _entries_cte(doc) + f"""
+        , page AS (
+            SELECT entry, COUNT(*) OVER () AS total, ROW_NUMBER() OVER ({order}) AS page_position
+            FROM entries{where}{order}{paging}
+        )
+        SELECT 0, page_position, entry, total, NULL::TEXT, NULL::TEXT FROM page
+    """
+    params = [report_id, username] + filter_params
+    params += [query.limit, query.offset] if query.limit is not None else [query.offset]
+    with_summary = query.offset == 0
+    if with_summary:
+        sql += """
+        UNION ALL
+        SELECT 1, COUNT(*), NULL::JSONB, NULL::INT8, entry->>'field', entry->>'status'
+        FROM entries
+        GROUP BY entry->>'field', entry->>'status'
+        """
+    cursor.execute(sql + " ORDER BY 1, 2", params)
+    rows = cursor.fetchall()
+
+    entries = [r[2] for r in rows if r[0] == 0]
+    result = {}
+    if with_summary:
+        summary = [{"field": r[4], "status": r[5], "count": r[1]} for r in rows if r[0] == 1]
+        summary.sort(key=lambda s: (-s["count"], s["field"] is None, s["field"] or ""))
+        result["summary"] = summary
+    result[doc.response_key] = entries
+    if entries:
+        result["total"] = next(r[3] for r in rows if r[0] == 0)
+    elif query.offset or query.limit == 0:
+        # An empty page has no row to carry the window total.
+        result["total"] = count_entries(cursor, doc, query, report_id, username)
+    else:
+        result["total"] = 0
+    result["offset"] = query.offset
+    result["limit"] = query.limit
+    return result
+
+
+# --------------------------------------------------
+# Whole-document responses
+# --------------------------------------------------
+# Bodies smaller than this are not worth compressing.
+DOCUMENT_COMPRESS_MIN_BYTES = int(os.getenv("DOCUMENT_COMPRESS_MIN_BYTES", "1024"))
+DOCUMENT_ENCODINGS = ("br", "gzip") if brotli else ("gzip",)
+
+
+class DocumentBodyCache:
+    """
+    Thread-safe LRU of encoded document bodies keyed by (ETag base, encoding), bounded by
+    the total size of the bodies held.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> tuple | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: tuple, body: bytes, encoding: str):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous[0])
+            self._entries[key] = (body, encoding)
+            self._bytes += len(body)
+            while self._bytes > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+
+def etag_base(kind: str, report_id: int, version: int, download_url: str) -> str:
+    url_digest = hashlib.sha256(download_url.encode()).hexdigest()[:16]
+    return f"{report_id}-{kind}-v{version}-{url_digest}"
+
+
+def etag(base: str, encoding: str) -> str:
+    return f'"{base}"' if encoding == "identity" else f'"{base}.{encoding}"'
+
+
+def matching_etag(if_none_match: str | None, base: str) -> str | None:
+    """The client's tag for any encoding of `base`, if If-None-Match lists one."""
+    if not if_none_match:
+        return None
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return etag(base, "identity")
+        tag = tag.removeprefix("W/")
+        if tag.strip('"').split(".", 1)[0] == base:
+            return tag
+    return None
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str:
+    accepted = set()
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.partition(";")
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                if float(params[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name.strip().lower())
+    for encoding in DOCUMENT_ENCODINGS:
+        if encoding in accepted or "*" in accepted:
+            return encoding
+    return "identity"
+
+
+def encode_document(doc: ReportDocument, document_text: str | None, download_url: str, encoding: str) -> tuple:
+    """Returns (body, encoding actually applied); small bodies are sent uncompressed."""
+    body = b"".join((
+        b'{"', doc.response_key.encode(), b'":', (document_text or "null").encode(),
+        b',"download_url":', json.dumps(download_url).encode(), b"}",
+    ))
+    if encoding == "identity" or len(body) < DOCUMENT_COMPRESS_MIN_BYTES:
+        return body, "identity"
+    with metrics.span("document_compress"):
+        if encoding == "br":
+            return brotli.compress(body, quality=5), "br"
+        return gzip.compress(body, compresslevel=6), "gzip"
@@ -0,0 +1,151 @@
+# report_exports.py
+#
+# Streaming CSV / Parquet exports of the per-report JSONB documents.
+# Entries are filtered and sorted in SQL by the same builder the viewers use
+# (report_documents.entries_sql) and read through a server-side cursor in batches; each
+# batch is serialized and sent before the next is fetched, so server memory is bounded by
+# the batch size rather than the document. Replaces building the CSV in the browser from
+# an already-downloaded document (src/utils/downloadCSV.js).
+
+import csv
+import io
+import json
+import uuid
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from report_documents import EntryQuery, ReportDocument, _entries_cte, _filters, entries_sql
+
+EXPORT_BATCH = 1000
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+# Leading columns per document, in the order the viewers show them; any other keys follow alphabetically.
+PREFERRED_COLUMNS = {
+    "checks": ["name", "field", "row", "source", "target", "status", "failed_count", "total_count"],
+    "columns": ["field", "type", "count", "null_count", "null_rate", "distinct_estimate", "min", "max", "mean", "stddev", "status"],
+    "fields": ["field", "name", "status", "source", "target", "mismatched_rows"],
+}
+
+
+def export_columns(cursor, doc: ReportDocument, query: EntryQuery, report_id: int, username: str) -> list:
+    """
+    Returns [(key, arrow type)] for the filtered entries, derived in SQL from the JSON
+    types seen under each key: numbers become int64/float64, booleans bool, strings string,
+    and objects, arrays or mixed types JSON-encoded strings.
+    """
+    where, filter_params = _filters(query)
+    cursor.execute(_entries_cte(doc) + f"""
+        SELECT kv.key,
+               array_agg(DISTINCT jsonb_typeof(kv.value)),
+               bool_and(jsonb_typeof(kv.value) <> 'number' OR kv.value::STRING ~ '^-?[0-9]+$')
+        FROM (SELECT entry FROM entries{where}) AS filtered, jsonb_each(filtered.entry) AS kv
+        GROUP BY kv.key
+    """, [report_id, username] + filter_params)
+    types = {}
+    for key, json_types, all_integer in cursor.fetchall():
+        seen = set(json_types) - {"null"}
+        if seen == {"number"}:
+            types[key] = pa.int64() if all_integer else pa.float64()
+        elif seen == {"boolean"}:
+            types[key] = pa.bool_()
+        else:
+            types[key] = pa.string()
+    if not types:
+        # No entries: still write the viewers' columns, so an empty export has a header.
+        return [(k, pa.string()) for k in PREFERRED_COLUMNS.get(doc.entries_key, [])]
+    preferred = [k for k in PREFERRED_COLUMNS.get(doc.entries_key, []) if k in types]
+    return [(k, types[k]) for k in preferred + sorted(set(types) - set(preferred))]
+
+
+def _cell(value, arrow_type):
+    if value is None:
+        return None
+    if arrow_type == pa.string() and not isinstance(value, str):
+        return json.dumps(value)
+    return value
+
+
+def iter_entry_batches(conn, doc: ReportDocument, query: EntryQuery, report_id: int, username: str, batch_size: int = EXPORT_BATCH):
+    """Yields lists of entry dicts from a server-side cursor, `batch_size` at a time."""
+    paged = bool(query.offset) or query.limit is not None
+    sql, params = entries_sql(doc, query, report_id, username, paged=paged)
+    with conn.cursor(name=f"entries_export_{uuid.uuid4().hex}") as cursor:
+        cursor.itersize = batch_size
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield [r[0] for r in rows]
+
+
+def _csv_chunks(batches, columns: list):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in columns])
+    for batch in batches:
+        for entry in batch:
+            writer.writerow([_cell(entry.get(name), pa.string()) for name, _ in columns])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands written bytes back to the generator that drains it."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _parquet_chunks(batches, columns: list):
+    schema = pa.schema(columns)
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+        for batch in batches:
+            arrays = [pa.array([_cell(entry.get(name), arrow_type) for entry in batch], type=arrow_type) for name, arrow_type in columns]
+            # One row group per batch, flushed to the client before the next batch is read.
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            data = sink.drain()
+            if data:
+                yield data
+    yield sink.drain()
+
+
+def stream_entries(connect, doc: ReportDocument, query: EntryQuery, report_id: int, username: str, fmt: str):
+    """
+    Yields the export in `fmt` ("csv" or "parquet"). `connect` returns a fresh DB connection,
+    owned by the generator because it outlives the request's dependencies.
+    """
+    conn = connect()
+    try:
+        with conn.cursor() as cursor:
+            columns = export_columns(cursor, doc, query, report_id, username)
+        batches = iter_entry_batches(conn, doc, query, report_id, username)
+        chunks = _csv_chunks(batches, columns) if fmt == "csv" else _parquet_chunks(batches, columns)
+        yield from chunks
+    finally:
+        conn.close()
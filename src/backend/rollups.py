@@ -0,0 +1,168 @@
+# rollups.py
+#
+# Per-user dashboard rollups, maintained incrementally by every writer of
+# `validation_history` and `reports` so /api/dashboard never aggregates base tables.
+# Tables are created by migrations/002_dashboard_rollups.sql.
+
+import argparse
+import logging
+import os
+from collections import defaultdict
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+def record_validations(cursor, entries):
+    """
+    Adds validation_history rows to the rollups. Must run on the same cursor and in the
+    same transaction as the INSERT into validation_history.
+    `entries` is an iterable of (username, is_valid, created_at) tuples.
+    """
+    totals = defaultdict(lambda: [0, 0, 0])
+    daily = defaultdict(int)
+    for username, is_valid, created_at in entries:
+        counts = totals[username]
+        counts[0] += 1
+        counts[1 if is_valid else 2] += 1
+        daily[(username, created_at.date())] += 1
+
+    for username, (total, successful, failed) in totals.items():
+        cursor.execute("""
+            INSERT INTO user_dashboard_rollups (username, total, successful, failed, updated_at)
+            VALUES (%s, %s, %s, %s, now())
+            ON CONFLICT (username) DO UPDATE SET
+                total = user_dashboard_rollups.total + EXCLUDED.total,
+                successful = user_dashboard_rollups.successful + EXCLUDED.successful,
+                failed = user_dashboard_rollups.failed + EXCLUDED.failed,
+                updated_at = now()
+        """, (username, total, successful, failed))
+
+    for (username, day), count in daily.items():
+        cursor.execute("""
+            INSERT INTO user_daily_validations (username, day, total)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (username, day) DO UPDATE SET
+                total = user_daily_validations.total + EXCLUDED.total
+        """, (username, day, count))
+
+
+def record_validation_outcome(cursor, username: str, was_valid: bool, is_valid: bool):
+    """
+    Moves one validation between the successful and failed buckets when a writer flips
+    `validation_history.is_valid` on an existing row.
+    """
+    if was_valid == is_valid:
+        return
+    delta = 1 if is_valid else -1
+    cursor.execute("""
+        UPDATE user_dashboard_rollups
+        SET successful = successful + %s, failed = failed - %s, updated_at = now()
+        WHERE username = %s
+    """, (delta, delta, username))
+
+
+def record_report_time(cursor, username: str, seconds: float):
+    """
+    Adds a report's profiling time to the running sum/count behind the average-time metric.
+    Must run in the same transaction as the write to `reports`.
+    """
+    cursor.execute("""
+        INSERT INTO user_dashboard_rollups (username, profiling_time_sum, profiling_time_count, updated_at)
+        VALUES (%s, %s, 1, now())
+        ON CONFLICT (username) DO UPDATE SET
+            profiling_time_sum = user_dashboard_rollups.profiling_time_sum + EXCLUDED.profiling_time_sum,
+            profiling_time_count = user_dashboard_rollups.profiling_time_count + 1,
+            updated_at = now()
+    """, (username, float(seconds)))
+
+
+def fetch_dashboard(cursor, username: str) -> dict:
+    """
+    Reads the dashboard metrics for one user: two primary-key lookups, independent of
+    history size.
+    """
+    cursor.execute("""
+        SELECT total, successful, failed, profiling_time_sum, profiling_time_count
+        FROM user_dashboard_rollups WHERE username = %s
+    """, (username,))
+    row = cursor.fetchone() or (0, 0, 0, 0.0, 0)
+    total, successful, failed, time_sum, time_count = row
+
+    cursor.execute("""
+        SELECT TO_CHAR(day, 'FMDay'), total
+        FROM user_daily_validations
+        WHERE username = %s AND day >= CURRENT_DATE - INTERVAL '6 days'
+        ORDER BY 1
+    """, (username,))
+    chart = cursor.fetchall()
+
+    avg_time = time_sum / time_count if time_count else 0
+    return {
+        "total": total,
+        "successful": successful,
+        "failed": failed,
+        "chart_labels": [r[0] for r in chart],
+        "chart_values": [r[1] for r in chart],
+        "avg_time": round(avg_time, 2),
+    }
+
+
+def rebuild_rollups(conn, username: str | None = None):
+    """
+    Reconciliation job: recomputes the rollups from `validation_history` and `reports`
+    for one user (or everyone) in a single transaction, correcting any drift.
+    """
+    user_filter = "WHERE username = %s" if username else ""
+    params = (username,) if username else ()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"DELETE FROM user_dashboard_rollups {user_filter}", params)
+            cursor.execute(f"DELETE FROM user_daily_validations {user_filter}", params)
+            cursor.execute(f"""
+                INSERT INTO user_dashboard_rollups (username, total, successful, failed, updated_at)
+                SELECT username, COUNT(*), COUNT(*) FILTER (WHERE is_valid), COUNT(*) FILTER (WHERE NOT is_valid), now()
+                FROM validation_history {user_filter}
+                GROUP BY username
+            """, params)
+            cursor.execute(f"""
+                INSERT INTO user_daily_validations (username, day, total)
+                SELECT username, created_at::DATE, COUNT(*)
+                FROM validation_history {user_filter}
+                GROUP BY username, created_at::DATE
+            """, params)
+            report_filter = f"{user_filter} {'AND' if username else 'WHERE'} profiling->>'time' IS NOT NULL"
+            cursor.execute(f"""
+                INSERT INTO user_dashboard_rollups (username, profiling_time_sum, profiling_time_count, updated_at)
+                SELECT username, SUM((profiling->>'time')::FLOAT), COUNT(*), now()
+                FROM reports {report_filter}
+                GROUP BY username
+                ON CONFLICT (username) DO UPDATE SET
+                    profiling_time_sum = EXCLUDED.profiling_time_sum,
+                    profiling_time_count = EXCLUDED.profiling_time_count,
+                    updated_at = now()
+            """, params)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    logger.info("Dashboard rollups rebuilt for %s at %s", username or "all users", datetime.utcnow().isoformat())
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    from sqlalchemy import create_engine
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Rebuild dashboard rollups from the base tables.")
+    parser.add_argument("--user", help="Only rebuild this username")
+    args = parser.parse_args()
+
+    engine = create_engine(os.environ["DATABASE_URL"], future=True)
+    conn = engine.raw_connection()
+    try:
+        rebuild_rollups(conn, args.user)
+    finally:
+        conn.close()
@@ -0,0 +1,106 @@
+# rulesets.py
+#
+# Per-user check rulesets: the rules checks_engine.run_checks evaluates for a user's
+# uploads, stored in `user_rulesets` (migrations/011_user_rulesets.sql) and edited through
+# /api/ruleset. A user without one gets checks_engine.default_rules.
+# Each job carries a snapshot of the ruleset taken when it was queued, and reused results
+# are keyed by `ruleset_key`, so changing a ruleset never serves reports checked under
+# the old rules. No NumPy / pyarrow here: the API validates rulesets without loading the
+# checks engine.
+
+import hashlib
+import json
+import re
+from datetime import datetime
+from typing import Optional
+
+from versions import RULESET_VERSION
+
+# Parameters each check requires besides `field` (which every check but
+# duplicate_records requires). Optional ones: range min/max, referential target_field,
+# completeness min_ratio.
+REQUIRED_PARAMS = {
+    "not_null": (),
+    "type": ("type",),
+    "range": (),
+    "unique": (),
+    "referential": (),
+    "format": ("pattern",),
+    "date_format": ("format",),
+    "duplicate_records": (),
+    "completeness": (),
+}
+TYPES = ("number", "integer", "boolean")
+MAX_RULES = 500
+
+
+def validate_ruleset(ruleset) -> dict:
+    """Returns the ruleset as stored ({"rules": [...]}) or raises ValueError naming the bad rule."""
+    if not isinstance(ruleset, dict) or not isinstance(ruleset.get("rules"), list):
+        raise ValueError('A ruleset is an object with a "rules" list')
+    rules = ruleset["rules"]
+    if not rules or len(rules) > MAX_RULES:
+        raise ValueError(f"A ruleset holds 1 to {MAX_RULES} rules")
+    for index, rule in enumerate(rules):
+        where = f"rules[{index}]"
+        if not isinstance(rule, dict):
+            raise ValueError(f"{where} is not an object")
+        check = rule.get("check")
+        if check not in REQUIRED_PARAMS:
+            raise ValueError(f"{where}: unknown check {check!r}")
+        required = REQUIRED_PARAMS[check] + (() if check == "duplicate_records" else ("field",))
+        for param in required:
+            if not isinstance(rule.get(param), str) or not rule[param]:
+                raise ValueError(f"{where}: {check} needs a {param!r} string")
+        if check == "type" and rule["type"] not in TYPES:
+            raise ValueError(f"{where}: type must be one of {', '.join(TYPES)}")
+        if check == "format":
+            try:
+                re.compile(rule["pattern"])
+            except re.error as e:
+                raise ValueError(f"{where}: invalid pattern: {e}")
+        if check == "date_format":
+            try:
+                datetime.now().strftime(rule["format"])
+            except ValueError as e:
+                raise ValueError(f"{where}: invalid format: {e}")
+        if check == "range":
+            for bound in ("min", "max"):
+                if bound in rule and (isinstance(rule[bound], bool) or not isinstance(rule[bound], (int, float))):
+                    raise ValueError(f"{where}: {bound} must be a number")
+        if check == "completeness" and "min_ratio" in rule:
+            ratio = rule["min_ratio"]
+            if isinstance(ratio, bool) or not isinstance(ratio, (int, float)) or not 0 <= ratio <= 1:
+                raise ValueError(f"{where}: min_ratio must be between 0 and 1")
+    return {"rules": rules}
+
+
+def ruleset_key(ruleset: Optional[dict]) -> int:
+    """
+    The `validation_results.ruleset_version` a result checked under `ruleset` is stored and
+    looked up with: RULESET_VERSION for the default rules, otherwise a 63-bit digest of
+    RULESET_VERSION and the rules.
+    """
+    if not ruleset:
+        return RULESET_VERSION
+    canonical = json.dumps([RULESET_VERSION, ruleset], sort_keys=True, separators=(",", ":"))
+    return int.from_bytes(hashlib.sha256(canonical.encode()).digest()[:8], "big") >> 1
+
+
+def fetch_ruleset(cursor, username: str) -> Optional[dict]:
+    cursor.execute("SELECT ruleset FROM user_rulesets WHERE username = %s", (username,))
+    row = cursor.fetchone()
+    if not row:
+        return None
+    return json.loads(row[0]) if isinstance(row[0], str) else row[0]
+
+
+def save_ruleset(cursor, username: str, ruleset: Optional[dict]):
+    """Stores the user's ruleset, or removes it (back to the default rules) when None."""
+    if ruleset is None:
+        cursor.execute("DELETE FROM user_rulesets WHERE username = %s", (username,))
+        return
+    cursor.execute("""
+        INSERT INTO user_rulesets (username, ruleset, updated_at) VALUES (%s, %s, now())
+        ON CONFLICT (username) DO UPDATE SET ruleset = EXCLUDED.ruleset, updated_at = now()
+    """, (username, json.dumps(ruleset)))
@@ -0,0 +1,301 @@
+# status_events.py
+#
+# Per-user status events pushed to the browser over Server-Sent Events (GET /api/events),
+# so the frontend no longer re-polls /api/upload-history and /api/reports after an upload.
+# Event types:
+# - "job":     a validation job changed state (queued, running, done, failed, cancelled);
+# - "history": upload history rows were recorded or settled without a job (Pub/Sub
+#              notifications, uploads that reused an earlier report);
+# - "resync":  the events since the client's Last-Event-ID are no longer available, so the
+#              client should refetch its lists once.
+#
+# StatusHub fans events out to the streams connected to this process. Event ids increase,
+# and a reconnecting EventSource sends the last id it saw, so only missed events are
+# replayed.
+#
+# Backends (STATUS_EVENTS_BACKEND):
+# - "memory":   events raised in this process, with a short per-user backlog for replay.
+#               Enough when one process serves the API and runs the validation jobs.
+# - "database": events are appended to `status_events` (migrations/008_status_events.sql)
+#               and each process delivers what it reads back, so a stream sees events
+#               raised by any worker, instance or standalone job runner. The table is only
+#               read while this process has streams open.
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+from datetime import timedelta
+from typing import AsyncIterator, Optional
+
+from psycopg2.extras import execute_values
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+STATUS_BACKENDS = ("memory", "database")
+RESYNC = "resync"
+_LAGGING = object()  # queued in place of events for a subscriber that fell too far behind
+
+
+class StatusHub:
+    def __init__(self, backend: str = "memory", engine=None, backlog: int = 256, max_users: int = 10000,
+                 queue_size: int = 256, poll_interval: float = 0.5, lookback: float = 5.0):
+        if backend not in STATUS_BACKENDS:
+            raise ValueError(f"Unknown status events backend '{backend}', expected one of {', '.join(STATUS_BACKENDS)}")
+        self.backend = backend
+        self.engine = engine
+        self.backlog = backlog
+        self.max_users = max_users
+        self.queue_size = queue_size
+        self.poll_interval = poll_interval
+        self.lookback = lookback
+        self._subscribers: dict = defaultdict(set)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: list = []
+        # memory backend
+        self._id_lock = threading.Lock()
+        self._last_id = 0
+        self._backlogs: OrderedDict = OrderedDict()
+        self._lost_through: dict = {}
+        self._floor = self._next_id()
+        # database backend
+        self._outbox: Optional[asyncio.Queue] = None
+        self._watermark = None
+        self._delivered: OrderedDict = OrderedDict()
+
+    # --------------------------------------------------
+    # Lifecycle
+    # --------------------------------------------------
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        if self.backend == "database":
+            self._outbox = asyncio.Queue()
+            self._tasks = [
+                asyncio.create_task(self._write_loop(), name="status-events-write"),
+                asyncio.create_task(self._poll_loop(), name="status-events-poll"),
+            ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._outbox is not None and not self._outbox.empty():
+            batch = [self._outbox.get_nowait() for _ in range(self._outbox.qsize())]
+            try:
+                await run_in_threadpool(self._insert, batch)
+            except Exception as e:
+                logger.warning("Dropped %d status event(s) at shutdown: %s", len(batch), e)
+        for queues in self._subscribers.values():
+            for queue in queues:
+                self._offer(queue, _LAGGING)
+        self._loop = None
+
+    # --------------------------------------------------
+    # Publishing
+    # --------------------------------------------------
+    def publish(self, username: str, event_type: str, data: dict):
+        """Queues an event for `username`. Safe to call from any thread; never blocks on I/O."""
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            on_loop = asyncio.get_running_loop() is loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            self._publish(username, event_type, data)
+        else:
+            loop.call_soon_threadsafe(self._publish, username, event_type, data)
+
+    def _publish(self, username: str, event_type: str, data: dict):
+        if self.backend == "database":
+            self._outbox.put_nowait((username, event_type, data))
+            return
+        event = (self._next_id(), event_type, data)
+        self._remember(username, event)
+        self._deliver(username, event)
+
+    def _next_id(self) -> int:
+        # Microseconds since the epoch, so ids keep increasing across restarts.
+        with self._id_lock:
+            self._last_id = max(self._last_id + 1, time.time_ns() // 1000)
+            return self._last_id
+
+    def _remember(self, username: str, event: tuple):
+        backlog = self._backlogs.pop(username, None)
+        if backlog is None:
+            backlog = deque()
+        if len(backlog) == self.backlog:
+            self._lost_through[username] = backlog.popleft()[0]
+        backlog.append(event)
+        self._backlogs[username] = backlog
+        while len(self._backlogs) > self.max_users:
+            evicted, events = self._backlogs.popitem(last=False)
+            self._lost_through[evicted] = events[-1][0]
+        if len(self._lost_through) > self.max_users:
+            # Forgetting where a user's history was cut only makes their next replay resync.
+            self._floor = max(self._floor, self._lost_through.pop(next(iter(self._lost_through))))
+
+    def _deliver(self, username: str, event: tuple):
+        for queue in self._subscribers.get(username, ()):
+            self._offer(queue, event)
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, item):
+        if queue.full():
+            # The stream ends and the client's reconnect replays from its Last-Event-ID.
+            while not queue.empty():
+                queue.get_nowait()
+            item = _LAGGING
+        queue.put_nowait(item)
+
+    # --------------------------------------------------
+    # Subscribing
+    # --------------------------------------------------
+    async def stream(self, username: str, last_event_id: Optional[int], keepalive: float = 15.0) -> AsyncIterator:
+        """
+        Yields (id, type, data) events for `username`: those after `last_event_id` first,
+        then live ones. A new stream (no `last_event_id`) starts with (id, None, None), the
+        current position, so that its first reconnect can resume from there. Yields None
+        every `keepalive` seconds without events; returns when the subscriber falls behind
+        or the hub stops.
+        """
+        queue = asyncio.Queue(self.queue_size)
+        self._subscribers[username].add(queue)
+        try:
+            replayed = set()
+            if last_event_id is None:
+                yield await self._position(username), None, None
+            else:
+                events, resync_id = await self._replay(username, last_event_id)
+                if resync_id is not None:
+                    yield resync_id, RESYNC, {}
+                for event in events:
+                    replayed.add(event[0])
+                    yield event
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if event is _LAGGING:
+                    return
+                if event[0] not in replayed:
+                    yield event
+        finally:
+            self._subscribers[username].discard(queue)
+            if not self._subscribers[username]:
+                del self._subscribers[username]
+
+    async def _position(self, username: str) -> int:
+        if self.backend == "database":
+            return await run_in_threadpool(self._with_cursor, self._newest_id, username)
+        return self._last_id
+
+    async def _replay(self, username: str, last_event_id: int) -> tuple:
+        """Returns (events after `last_event_id`, id of a resync event or None)."""
+        if self.backend == "database":
+            return await run_in_threadpool(self._replay_from_table, username, last_event_id)
+        backlog = list(self._backlogs.get(username, ()))
+        if last_event_id < max(self._floor, self._lost_through.get(username, 0)):
+            return [], backlog[-1][0] if backlog else self._next_id()
+        return [e for e in backlog if e[0] > last_event_id], None
+
+    # --------------------------------------------------
+    # Database backend
+    # --------------------------------------------------
+    def _with_cursor(self, fn, *args):
+        conn = self.engine.raw_connection()
+        try:
+            with conn.cursor() as cursor:
+                result = fn(cursor, *args)
+            conn.commit()
+            return result
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def _insert(self, batch: list):
+        def insert(cursor):
+            execute_values(
+                cursor,
+                "INSERT INTO status_events (username, type, payload) VALUES %s",
+                [(username, event_type, json.dumps(data)) for username, event_type, data in batch],
+            )
+        self._with_cursor(insert)
+
+    async def _write_loop(self):
+        while True:
+            batch = [await self._outbox.get()]
+            while not self._outbox.empty() and len(batch) < 500:
+                batch.append(self._outbox.get_nowait())
+            try:
+                await run_in_threadpool(self._insert, batch)
+            except Exception as e:
+                # Status events are advisory; the job and history tables stay authoritative.
+                logger.error("Failed to store %d status event(s): %s", len(batch), e)
+
+    def _fetch_recent(self, cursor, usernames: list):
+        # Rows are read back over a `lookback` window rather than strictly after the last id:
+        # ids from different nodes are not ordered by commit, so a row can commit after a
+        # later id was already delivered.
+        cursor.execute("""
+            SELECT id, username, type, payload, created_at FROM status_events
+            WHERE created_at > COALESCE(%s, now()) - %s * INTERVAL '1 second' AND username = ANY(%s)
+            ORDER BY id
+        """, (self._watermark, self.lookback, usernames))
+        return cursor.fetchall()
+
+    async def _poll_loop(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            if not self._subscribers:
+                self._watermark = None
+                self._delivered.clear()
+                continue
+            try:
+                rows = await run_in_threadpool(self._with_cursor, self._fetch_recent, list(self._subscribers))
+            except Exception as e:
+                logger.error("Failed to read status events: %s", e)
+                continue
+            for event_id, username, event_type, payload, created_at in rows:
+                if event_id in self._delivered:
+                    continue
+                self._delivered[event_id] = created_at
+                self._deliver(username, (event_id, event_type, payload))
+                if self._watermark is None or created_at > self._watermark:
+                    self._watermark = created_at
+            if self._watermark is not None:
+                horizon = self._watermark - timedelta(seconds=self.lookback)
+                while self._delivered and next(iter(self._delivered.values())) < horizon:
+                    self._delivered.popitem(last=False)
+
+    def _replay_from_table(self, username: str, last_event_id: int) -> tuple:
+        def replay(cursor):
+            cursor.execute("SELECT 1 FROM status_events WHERE id = %s AND username = %s", (last_event_id, username))
+            known = cursor.fetchone() is not None
+            cursor.execute("""
+                SELECT id, type, payload FROM status_events
+                WHERE username = %s AND id > %s
+                ORDER BY id
+                LIMIT %s
+            """, (username, last_event_id, self.backlog + 1))
+            rows = [tuple(r) for r in cursor.fetchall()]
+            if (known or last_event_id == 0) and len(rows) <= self.backlog:
+                return rows, None
+            # Expired or too far behind: resync, continuing from the newest event.
+            return [], self._newest_id(cursor, username)
+        return self._with_cursor(replay)
+
+    @staticmethod
+    def _newest_id(cursor, username: str) -> int:
+        """The user's newest event id, 0 if there is none (0 resumes from the beginning)."""
+        cursor.execute("SELECT max(id) FROM status_events WHERE username = %s", (username,))
+        return cursor.fetchone()[0] or 0
@@ -0,0 +1,23 @@
+# Shared setup for the backend tests: makes the backend modules importable and gives
+# main.py the configuration it refuses to import without. Nothing configured here is
+# contacted; tests replace the database and GCS with stubs.
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+for name, value in {
+    "DATABASE_URL": "postgresql://test@127.0.0.1:1/test",
+    "FRONTEND_URL": "http://localhost:5173",
+    "KINDE_ISSUER_URL": "https://test.local",
+    "CLIENT_ID": "test",
+    "CLIENT_SECRET": "test",
+    "KINDE_CALLBACK_URL": "http://localhost/api/callback",
+    "BUCKET_NAME": "test-bucket",
+    "OAUTH_STATE_STORE": "memory",
+    "UPLOAD_PROGRESS_STORE": "memory",
+    "CACHE_INVALIDATION_STORE": "memory",
+    "STATUS_EVENTS_BACKEND": "memory",
+}.items():
+    os.environ.setdefault(name, value)
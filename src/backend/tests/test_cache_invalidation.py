@@ -0,0 +1,50 @@
+# Keys published by one worker are applied by every other worker on its next sync, and a
+# worker that missed trimmed entries clears its caches rather than serve stale ones.
+
+import time
+
+from cache_invalidation import create_invalidation_log
+
+
+def worker(path, retention=3600):
+    log = create_invalidation_log("sqlite", retention=retention, path=path)
+    dropped = []
+    log.register("dashboard", dropped.append)
+    return log, dropped
+
+
+def test_published_keys_reach_every_worker_once(tmp_path):
+    path = str(tmp_path / "invalidations.sqlite3")
+    (first, first_dropped), (second, second_dropped) = worker(path), worker(path)
+    first.publish("dashboard", "alice", "bob")
+    assert first_dropped == ["alice", "bob"]
+    second.sync()
+    second.sync()
+    assert second_dropped == ["alice", "bob"]
+
+
+def test_dict_keys_round_trip(tmp_path):
+    log = create_invalidation_log("sqlite", path=str(tmp_path / "invalidations.sqlite3"))
+    seen = []
+    log.register("token", seen.append)
+    log.publish("token", {"kinde_id": "kp_1", "username": "alice"})
+    assert seen == [{"kinde_id": "kp_1", "username": "alice"}]
+
+
+def test_worker_that_missed_trimmed_entries_clears_everything(tmp_path, monkeypatch):
+    path = str(tmp_path / "invalidations.sqlite3")
+    (first, _), (second, second_dropped) = worker(path, retention=60), worker(path, retention=60)
+    first.publish("dashboard", "alice")
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    first.publish("dashboard", "bob")
+    second.sync()
+    assert second_dropped == [None]
+
+
+def test_memory_log_applies_keys_immediately():
+    log = create_invalidation_log("memory")
+    dropped = []
+    log.register("dashboard", dropped.append)
+    log.publish("dashboard", "alice")
+    assert dropped == ["alice"]
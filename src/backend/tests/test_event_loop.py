@@ -0,0 +1,108 @@
+# A route blocked on the database or GCS must not stall the event loop: blocking calls
+# run in the threadpool, so other requests keep being served meanwhile.
+
+import asyncio
+import io
+import threading
+import time
+
+import httpx
+import pytest
+
+import main
+
+BLOCK_SECONDS = 1.0
+blocking = threading.Event()  # set by a stub once it starts blocking
+
+
+def block():
+    blocking.set()
+    time.sleep(BLOCK_SECONDS)
+
+
+class SlowCursor:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        block()
+
+    def fetchone(self):
+        return ("alice", "alice@example.com", "Alice", "Example")
+
+
+class SlowConnection:
+    def cursor(self):
+        return SlowCursor()
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class SlowBlob:
+    def exists(self):
+        block()
+        return True
+
+
+class SlowBucket:
+    def blob(self, name, **kwargs):
+        return SlowBlob()
+
+
+@pytest.fixture
+def stubs(monkeypatch):
+    blocking.clear()
+    monkeypatch.setattr(main.gcs, "load", lambda: main.gcs)
+    monkeypatch.setattr(main.gcs, "bucket", SlowBucket())
+    monkeypatch.setattr(main, "with_connection", lambda fn, *args: {"history_id": 1, "job_id": None, "report_id": 1})
+    main.app.dependency_overrides[main.get_current_username] = lambda: "alice"
+    main.app.dependency_overrides[main.get_username_briefly] = lambda: "alice"
+    main.app.dependency_overrides[main.get_db] = SlowConnection
+    yield
+    main.app.dependency_overrides.clear()
+
+
+async def slow_and_fast(send_slow) -> tuple:
+    """
+    Sends the slow request, then /healthz once the slow one is blocked in its stub.
+    Returns both responses and when each finished, in seconds since the first was sent.
+    """
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        start = time.perf_counter()
+
+        async def finish(request):
+            response = await request
+            return response, time.perf_counter() - start
+
+        slow = asyncio.create_task(finish(send_slow(client)))
+        while not blocking.is_set():
+            await asyncio.sleep(0.01)
+        fast_response, fast_finished = await finish(client.get("/healthz"))
+        slow_response, slow_finished = await slow
+    return slow_response, slow_finished, fast_response, fast_finished
+
+
+@pytest.mark.parametrize("send_slow", [
+    pytest.param(lambda client: client.get("/api/profile"), id="database"),
+    pytest.param(lambda client: client.post("/api/upload-files", files={
+        "source_file": ("source.csv", io.BytesIO(b"a\n1\n"), "text/csv"),
+        "target_file": ("target.csv", io.BytesIO(b"a\n2\n"), "text/csv"),
+    }), id="gcs"),
+])
+def test_blocking_call_does_not_stall_other_requests(stubs, send_slow):
+    slow_response, slow_finished, fast_response, fast_finished = asyncio.run(slow_and_fast(send_slow))
+    assert slow_response.status_code == 200, slow_response.text
+    assert slow_finished >= BLOCK_SECONDS
+    assert fast_response.status_code == 200
+    assert fast_finished < BLOCK_SECONDS / 2
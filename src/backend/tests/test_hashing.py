@@ -0,0 +1,54 @@
+# hash_strings must give every value the same hash wherever it sits in an array.
+
+import numpy as np
+import pyarrow as pa
+import pytest
+
+from hashing import _LENGTH_MIX, _MULTIPLIER, _NULL_HASH, hash_strings, mix64
+
+MASK = (1 << 64) - 1
+
+
+def reference_hash(value) -> np.uint64:
+    """The polynomial hash_strings vectorizes, one value at a time in Python ints."""
+    if value is None:
+        return _NULL_HASH
+    data = value.encode()
+    total = 0
+    for position, byte in enumerate(data):
+        total = (total + (byte + 1) * pow(int(_MULTIPLIER), position, 1 << 64)) & MASK
+    return mix64(np.array([total ^ ((len(data) * int(_LENGTH_MIX)) & MASK)], dtype=np.uint64))[0]
+
+
+CASES = {
+    "trailing empty": ["ab", ""],
+    "trailing null": ["ab", None],
+    "trailing empties and nulls": ["ab", "cd", "", None, ""],
+    "leading empties and nulls": ["", None, "", "ab", "cd"],
+    "interleaved": ["a", "", "bc", None, "", "def", None, "g", ""],
+    "only empties and nulls": ["", None, ""],
+    "single byte values": ["x", "", "y", ""],
+    "multibyte": ["é", "", "日本", None],
+}
+
+
+@pytest.mark.parametrize("values", CASES.values(), ids=CASES.keys())
+@pytest.mark.parametrize("string_type", [pa.string(), pa.large_string()])
+def test_matches_reference(values, string_type):
+    hashes = hash_strings(pa.array(values, type=string_type))
+    assert list(hashes) == [reference_hash(v) for v in values]
+
+
+@pytest.mark.parametrize("values", CASES.values(), ids=CASES.keys())
+def test_slices_and_chunks_hash_like_whole_arrays(values):
+    array = pa.array(["pad", ""] + values + ["", "pad"])
+    expected = [reference_hash(v) for v in values]
+    assert list(hash_strings(array.slice(2, len(values)))) == expected
+    chunked = pa.chunked_array([pa.array(values[:1], pa.string()), pa.array(values[1:], pa.string())])
+    assert list(hash_strings(chunked)) == expected
+
+
+def test_last_byte_before_trailing_empty_is_hashed():
+    assert hash_strings(pa.array(["ab", ""]))[0] != hash_strings(pa.array(["ac", ""]))[0]
+    assert hash_strings(pa.array(["ab", ""]))[0] == hash_strings(pa.array(["ab"]))[0]
+    assert hash_strings(pa.array([None, ""]))[1] != hash_strings(pa.array([None, ""]))[0]
@@ -0,0 +1,54 @@
+# NumPy / pyarrow load with the checks engine and the columnar cache. Importing the API,
+# recording an upload and handling a push must not pull them in just to read a constant.
+
+import os
+import subprocess
+import sys
+
+SCRIPT = """
+import base64, sys
+import conftest
+import main
+from fastapi.testclient import TestClient
+
+
+class Connection:
+    answers = [None, None]  # no ruleset, no earlier result for the pair, then ids for every RETURNING
+
+    def cursor(self):
+        return self
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        return False
+    def execute(self, sql, params=None):
+        pass
+    def fetchone(self):
+        return self.answers.pop(0) if self.answers else (1,)
+    def fetchall(self):
+        return []
+    def commit(self):
+        pass
+    def rollback(self):
+        pass
+
+
+stored = {"filename": "a.csv", "blob": "alice/objects/sha256/aa", "hash": "aa", "uploaded": True}
+main.insert_file_records(Connection(), "alice", stored, stored)
+main.PUBSUB_VERIFICATION_TOKEN = None
+data = base64.b64encode(b"{}").decode()
+TestClient(main.app).post("/pubsub-handler", json={
+    "message": {"data": data, "attributes": {"objectId": "alice/objects/sha256/aa.arrow"}},
+    "subscription": "s",
+})
+heavy = [m for m in ("numpy", "pyarrow", "checks_engine", "columnar") if m in sys.modules]
+print("heavy:" + ",".join(heavy))
+"""
+
+
+def test_uploads_and_pushes_do_not_import_the_heavy_modules():
+    tests = os.path.dirname(os.path.abspath(__file__))
+    env = {**os.environ, "PYTHONPATH": os.path.join(tests, "..")}
+    out = subprocess.run([sys.executable, "-c", SCRIPT], cwd=tests, env=env, capture_output=True, text=True)
+    assert out.returncode == 0, out.stderr
+    assert out.stdout.strip().splitlines()[-1] == "heavy:"
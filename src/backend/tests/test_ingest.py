@@ -0,0 +1,85 @@
+# IngestBuffer keeps flushing after a batch fails.
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+import ingest
+from ingest import IngestBuffer, IngestRecord
+
+
+class NullEngine:
+    def raw_connection(self):
+        return self
+
+    def close(self):
+        pass
+
+
+def record(key: str) -> IngestRecord:
+    return IngestRecord(idempotency_key=key, username="alice", file_name=f"{key}.csv", is_valid=True, created_at=datetime(2026, 1, 1))
+
+
+async def submit_all(buffer: IngestBuffer, *keys) -> list:
+    return await asyncio.wait_for(
+        asyncio.gather(*(buffer.submit(record(key)) for key in keys), return_exceptions=True), timeout=5
+    )
+
+
+def test_failed_write_fails_its_batch_only(monkeypatch):
+    written = []
+
+    def write_batch(conn, records):
+        if any(r.idempotency_key == "bad" for r in records):
+            raise RuntimeError("database unavailable")
+        written.extend(r.idempotency_key for r in records)
+        return {r.username for r in records}
+
+    monkeypatch.setattr(ingest, "write_batch", write_batch)
+
+    async def scenario():
+        buffer = IngestBuffer(NullEngine(), max_delay=0.01)
+        buffer.start()
+        first = await submit_all(buffer, "bad", "a")
+        second = await submit_all(buffer, "b")
+        await buffer.stop()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in first)
+    assert second == [None]
+    assert written == ["b"]
+
+
+@pytest.mark.parametrize("fail_in", ["on_flush", "flush"])
+def test_flusher_survives_unexpected_errors(monkeypatch, fail_in):
+    monkeypatch.setattr(ingest, "write_batch", lambda conn, records: {r.username for r in records})
+    calls = []
+
+    def on_flush(usernames):
+        calls.append(usernames)
+        if fail_in == "on_flush" and len(calls) == 1:
+            raise RuntimeError("status hub is gone")
+
+    async def scenario():
+        buffer = IngestBuffer(NullEngine(), max_delay=0.01, on_flush=on_flush)
+        if fail_in == "flush":
+            flush = buffer._flush
+
+            async def failing_once(batch):
+                buffer._flush = flush
+                raise RuntimeError("unexpected")
+            buffer._flush = failing_once
+        buffer.start()
+        first = await submit_all(buffer, "a")
+        second = await submit_all(buffer, "b")
+        await buffer.stop()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    if fail_in == "on_flush":
+        assert first == [None]  # committed, so acknowledged despite the callback failing
+    else:
+        assert isinstance(first[0], RuntimeError)
+    assert second == [None]
@@ -0,0 +1,206 @@
+# Completing a job is one transaction that starts by settling the job row, and running
+# jobs keep their lease for as long as their runner is alive.
+
+import asyncio
+from concurrent.futures import Executor, Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+import jobs
+from checks_engine import CheckResult
+
+JOB = {"id": 7, "history_id": 3, "username": "alice", "source_blob": "a/s.csv", "target_blob": "a/t.csv", "attempts": 1}
+RESULT = CheckResult(entries=[], rows=1, failed_checks=0, seconds=0.1)
+PROFILE = {"time": 0.5}
+
+
+class ScriptedConnection:
+    """Answers each fetchone with the next of `answers` and records statements and commits."""
+
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.log = []
+
+    def cursor(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.log.append(" ".join(sql.split()))
+
+    def fetchone(self):
+        return self.answers.pop(0) if self.answers else None
+
+    def commit(self):
+        self.log.append("COMMIT")
+
+    def rollback(self):
+        self.log.append("ROLLBACK")
+
+
+def test_complete_job_settles_the_job_before_storing_anything():
+    conn = ScriptedConnection((JOB["id"],), (42,), (False,))
+    assert jobs._complete_job(conn, JOB, RESULT, PROFILE, {"matched_rows": 1}) == 42
+    assert conn.log[0].startswith("UPDATE validation_jobs SET state = 'done'")
+    assert any(sql.startswith("INSERT INTO reports") for sql in conn.log)
+    assert any("detailedoverview" in sql for sql in conn.log)
+    assert conn.log.count("COMMIT") == 1
+    assert conn.log[-1] == "COMMIT"
+
+
+def test_complete_job_stores_nothing_for_a_cancelled_job():
+    conn = ScriptedConnection(None)
+    assert jobs._complete_job(conn, JOB, RESULT, PROFILE, None) is None
+    assert conn.log[-1] == "ROLLBACK"
+    assert "COMMIT" not in conn.log
+    assert not any("reports" in sql for sql in conn.log)
+
+
+def test_complete_job_rolls_back_the_whole_report_on_error():
+    class FailingConnection(ScriptedConnection):
+        def execute(self, sql, params=None):
+            super().execute(sql, params)
+            if "profiling_time_sum" in sql:
+                raise RuntimeError("rollup failed")
+
+    conn = FailingConnection((JOB["id"],), (42,))
+    with pytest.raises(RuntimeError):
+        jobs._complete_job(conn, JOB, RESULT, PROFILE, None)
+    assert "COMMIT" not in conn.log
+    assert conn.log[-1] == "ROLLBACK"
+
+
+def test_heartbeat_renews_leases_of_running_jobs(monkeypatch):
+    renewed = []
+    runner = jobs.JobRunner(engine=None, lease_seconds=0.09)
+    monkeypatch.setattr(runner, "_with_conn", lambda fn, *args: renewed.append((fn, args)))
+
+    async def run():
+        runner._running = {7: "alice", 8: "bob"}
+        task = asyncio.create_task(runner._heartbeat())
+        await asyncio.sleep(0.1)
+        runner._running = {}
+        await asyncio.sleep(0.05)
+        runner._stopping = True
+        await task
+
+    asyncio.run(run())
+    assert renewed
+    assert all(fn is jobs._renew_leases and args == ([7, 8], 0.09) for fn, args in renewed)
+
+
+async def until(condition):
+    while not condition():
+        await asyncio.sleep(0.01)
+
+
+class InlinePool(Executor):
+    """Runs submissions in the calling thread; `broken` pools fail them like a pool whose worker died."""
+
+    def __init__(self, broken: bool):
+        self.broken = broken
+        self.shut_down = False
+
+    def submit(self, fn, *args):
+        future = Future()
+        if self.broken:
+            future.set_exception(BrokenProcessPool("A child process terminated abruptly"))
+        else:
+            future.set_result(fn(*args))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shut_down = True
+
+
+def test_broken_pool_is_replaced_and_the_job_requeued_without_an_attempt(monkeypatch):
+    pools = [InlinePool(broken=True), InlinePool(broken=False)]
+    calls = []
+    attempts = {"n": 0}
+
+    def with_conn(fn, *args):
+        calls.append(fn.__name__)
+        if fn is jobs._pending_jobs:
+            return []
+        if fn is jobs._claim_job:
+            attempts["n"] += 1
+            return {**JOB, "attempts": attempts["n"]}
+        if fn is jobs._release_job:
+            attempts["n"] -= 1
+        if fn is jobs._complete_job:
+            return 42
+
+    runner = jobs.JobRunner(engine=None, workers=1)
+    monkeypatch.setattr(runner, "_new_pool", lambda: pools.pop(0))
+    monkeypatch.setattr(runner, "_with_conn", with_conn)
+    monkeypatch.setattr(jobs, "run_validation", lambda source, target, ruleset: (RESULT, PROFILE, None))
+    done = []
+    runner.on_complete = done.append
+
+    async def run():
+        await runner.start()
+        first = runner._pool
+        runner.enqueue(JOB["id"], "alice")
+        await asyncio.wait_for(until(lambda: done), 5)
+        await runner.stop()
+        return first
+
+    first = asyncio.run(run())
+    assert first.shut_down and not pools
+    assert calls == ["_pending_jobs", "_claim_job", "_release_job", "_claim_job", "_complete_job"]
+    assert attempts["n"] == 1
+    assert "_fail_job" not in calls
+
+
+def test_running_jobs_are_referenced_until_they_finish(monkeypatch):
+    runner = jobs.JobRunner(engine=None, workers=1)
+    release = None
+
+    async def execute(job_id, username):
+        await release.wait()
+        runner._running.pop(job_id, None)
+
+    monkeypatch.setattr(runner, "_execute", execute)
+    monkeypatch.setattr(runner, "_with_conn", lambda fn, *args: [])
+    monkeypatch.setattr(runner, "_new_pool", lambda: InlinePool(broken=False))
+
+    async def run():
+        nonlocal release
+        release = asyncio.Event()
+        await runner.start()
+        runner.enqueue(JOB["id"], "alice")
+        await asyncio.sleep(0.05)
+        assert len(runner._jobs) == 1
+        release.set()
+        await asyncio.sleep(0.05)
+        assert not runner._jobs
+        await runner.stop()
+
+    asyncio.run(run())
+
+
+def test_only_the_lock_holder_runs_jobs_and_another_takes_over(monkeypatch, tmp_path):
+    runners = [jobs.JobRunner(engine=None, workers=1, poll_interval=0.02, lock_path=str(tmp_path / "jobs.lock")) for _ in range(2)]
+    for runner in runners:
+        monkeypatch.setattr(runner, "_with_conn", lambda fn, *args: [])
+        monkeypatch.setattr(runner, "_new_pool", lambda: InlinePool(broken=False))
+
+    async def run():
+        leader, follower = runners
+        await leader.start()
+        await follower.start()
+        assert leader._pool is not None and follower._pool is None
+        follower.enqueue(JOB["id"], "alice")
+        assert follower.queued_count() == 0
+        await leader.stop()
+        await asyncio.wait_for(until(lambda: follower._pool is not None), 5)
+        await follower.stop()
+        assert follower._pool is None and follower._lock_file is None
+
+    asyncio.run(run())
@@ -0,0 +1,168 @@
+# JWKSKeyStore against a local JWKS endpoint whose key set and health the tests control.
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+
+from jwks import JWKSFetchError, JWKSKeyStore
+
+
+def make_key(kid: str) -> tuple:
+    """(private PEM, public JWK) for a fresh RSA key."""
+    private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = private.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+    public = jwk.construct(pem, "RS256").public_key().to_dict()
+    public.update({"kid": kid, "alg": "RS256", "use": "sig"})
+    return pem, public
+
+
+class FakeJWKS:
+    def __init__(self):
+        self.keys = []
+        self.failing = False
+        self.fetches = 0
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                fake.fetches += 1
+                if fake.failing:
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                body = json.dumps({"keys": fake.keys}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.uri = f"http://127.0.0.1:{self.server.server_address[1]}/.well-known/jwks.json"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def endpoint():
+    fake = FakeJWKS()
+    yield fake
+    fake.close()
+
+
+def make_store(endpoint, **kwargs) -> JWKSKeyStore:
+    return JWKSKeyStore("https://issuer.test", jwks_uri=endpoint.uri, http_timeout=2, **kwargs)
+
+
+def test_constructed_keys_verify_tokens(endpoint):
+    pem, public = make_key("k1")
+    endpoint.keys = [public]
+    store = make_store(endpoint)
+    store.refresh()
+
+    token = jwt.encode({"sub": "alice"}, pem, algorithm="RS256", headers={"kid": "k1"})
+    key = store.get_key("k1")
+    assert jwt.decode(token, key.key, algorithms=[key.alg])["sub"] == "alice"
+
+
+def test_rotation_is_picked_up_by_the_background_refresh(endpoint):
+    _, old = make_key("old")
+    _, new = make_key("new")
+    endpoint.keys = [old]
+    store = make_store(endpoint, ttl=0.05)
+    store.start()
+    try:
+        assert store.get_key("old") is not None
+        endpoint.keys = [new]
+        deadline = time.monotonic() + 5
+        while "new" not in store._keys and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert "new" in store._keys
+        assert "old" not in store._keys
+    finally:
+        store.stop()
+
+
+def test_unknown_kid_refetches_once_per_interval(endpoint):
+    _, first = make_key("k1")
+    _, second = make_key("k2")
+    endpoint.keys = [first]
+    store = make_store(endpoint, min_refetch_interval=60)
+    store.refresh()
+    assert endpoint.fetches == 1
+
+    # Rotated before the interval elapsed: the miss is not allowed to refetch yet.
+    endpoint.keys = [first, second]
+    assert store.get_key("k2") is None
+    assert endpoint.fetches == 1
+
+    store._last_fetch -= 60
+    assert store.get_key("k2") is not None
+    assert endpoint.fetches == 2
+    # Garbage kids right after do not reach the issuer.
+    assert store.get_key("garbage") is None
+    assert endpoint.fetches == 2
+
+
+def test_concurrent_misses_share_one_fetch(endpoint):
+    _, first = make_key("k1")
+    _, second = make_key("k2")
+    endpoint.keys = [first]
+    store = make_store(endpoint, min_refetch_interval=0)
+    store.refresh()
+    endpoint.keys = [first, second]
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(store.get_key("k2"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(result is not None for result in results)
+    assert endpoint.fetches == 2
+
+
+def test_failed_fetch_keeps_serving_the_last_keys(endpoint):
+    _, public = make_key("k1")
+    endpoint.keys = [public]
+    store = make_store(endpoint, min_refetch_interval=0)
+    store.refresh()
+
+    endpoint.failing = True
+    with pytest.raises(JWKSFetchError):
+        store.refresh()
+    assert store.get_key("k1") is not None
+    # A miss during the outage refetches, fails and reports the kid as unknown.
+    assert store.get_key("k2") is None
+    assert store.has_keys
+
+
+def test_fetch_failure_without_keys_raises(endpoint):
+    endpoint.failing = True
+    store = make_store(endpoint, min_refetch_interval=60)
+    store.start()
+    try:
+        assert not store.has_keys
+        with pytest.raises(JWKSFetchError):
+            store.get_key("k1")
+
+        # Once the issuer recovers, the next allowed refetch finds the key.
+        _, public = make_key("k1")
+        endpoint.keys = [public]
+        endpoint.failing = False
+        store._last_fetch -= 60
+        assert store.get_key("k1") is not None
+    finally:
+        store.stop()
@@ -0,0 +1,35 @@
+# Queue depth gauges count work submitted to an executor that no worker has started.
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import jobs
+import metrics
+
+
+def test_queue_depth_counts_tasks_waiting_for_a_worker():
+    depth = metrics.QueueDepth()
+    started, release = threading.Event(), threading.Event()
+
+    def block():
+        started.set()
+        release.wait(5)
+        return "blocked"
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        first = depth.submit(executor, block)
+        started.wait(5)
+        waiting = [depth.submit(executor, lambda n=n: n) for n in range(3)]
+        assert len(depth) == 3
+        release.set()
+        assert first.result() == "blocked"
+        assert [f.result() for f in waiting] == [0, 1, 2]
+    assert len(depth) == 0
+
+
+def test_job_runner_counts():
+    runner = jobs.JobRunner(engine=None)
+    runner._queue.push("alice", 1)
+    runner._queue.push("bob", 2)
+    runner._running[3] = "carol"
+    assert (runner.running_count(), runner.queued_count()) == (1, 2)
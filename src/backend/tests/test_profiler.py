@@ -0,0 +1,78 @@
+# Mergeable profile state: min/max of mixed columns and the top-k summary's error bound.
+
+from collections import Counter
+
+import numpy as np
+import pyarrow as pa
+import pytest
+
+from profiler import ColumnProfile, TopKSummary
+
+
+def profile(*batches) -> ColumnProfile:
+    column = ColumnProfile("c")
+    for batch in batches:
+        column.update(pa.array(batch, pa.string()))
+    return column
+
+
+@pytest.mark.parametrize("batches", [
+    [["abc", "xyz"], ["5", "10"]],
+    [["5", "10"], ["abc", "xyz"]],
+    [["abc"], ["10", "zzz"], ["5"]],
+])
+def test_numeric_range_wins_over_text(batches):
+    column = profile(*batches)
+    assert (column.min, column.max) == (5.0, 10.0)
+
+
+def test_numeric_range_wins_when_merging_partials():
+    text, numeric = profile(["abc", "xyz"]), profile(["5", "10"])
+    text.merge(numeric)
+    assert (text.min, text.max) == (5.0, 10.0)
+    numeric = profile(["5", "10"])
+    numeric.merge(profile(["abc", "xyz"]))
+    assert (numeric.min, numeric.max) == (5.0, 10.0)
+
+
+def test_text_range_stays_lexicographic():
+    column = profile(["m", "b"], ["z", "a"])
+    assert (column.min, column.max) == ("a", "z")
+
+
+def zipf_batches(seed: int, batches: int, size: int) -> list:
+    rng = np.random.default_rng(seed)
+    return [[f"v{x}" for x in rng.zipf(1.3, size) % 5000] for _ in range(batches)]
+
+
+def assert_bounds(summary: TopKSummary, truth: Counter):
+    total = sum(truth.values())
+    assert summary.error <= total / (summary.capacity + 1)
+    for value, count in truth.items():
+        estimate = summary.counters.get(value, 0)
+        assert estimate <= count <= estimate + summary.error, value
+
+
+def test_top_k_bounds_hold_across_batches():
+    batches = zipf_batches(1, 20, 2000)
+    summary = TopKSummary(capacity=20)
+    for batch in batches:
+        summary.update(pa.array(batch))
+    assert_bounds(summary, Counter(v for batch in batches for v in batch))
+
+
+def test_top_k_bounds_hold_across_merges():
+    batches = zipf_batches(2, 24, 1500)
+    partials = []
+    for part in range(4):
+        summary = TopKSummary(capacity=20)
+        for batch in batches[part::4]:
+            summary.update(pa.array(batch))
+        partials.append(summary)
+    merged = partials[0]
+    for other in partials[1:]:
+        merged.merge(other)
+    truth = Counter(v for batch in batches for v in batch)
+    assert_bounds(merged, truth)
+    heaviest = [value for value, _ in truth.most_common(3)]
+    assert [entry["value"] for entry in merged.top(3)] == heaviest
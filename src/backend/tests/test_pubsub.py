@@ -0,0 +1,44 @@
+# /pubsub-handler only takes pushes carrying the subscription's token, and a job
+# notification schedules the job for the user who owns it, whatever the message says.
+
+import base64
+
+import pytest
+from fastapi.testclient import TestClient
+
+import jobs
+import main
+
+
+def push(client, attributes, token=None):
+    body = {"message": {"data": base64.b64encode(b"{}").decode(), "attributes": attributes}, "subscription": "projects/p/subscriptions/s"}
+    return client.post("/pubsub-handler", params={"token": token} if token else None, json=body)
+
+
+@pytest.fixture
+def enqueued(monkeypatch):
+    calls = []
+    owners = {7: "alice"}
+    monkeypatch.setattr(main, "PUBSUB_VERIFICATION_TOKEN", "secret")
+    monkeypatch.setattr(main, "with_connection", lambda fn, *args: owners.get(args[0]) if fn is jobs.queued_job_owner else None)
+    monkeypatch.setattr(main.job_runner, "enqueue", lambda job_id, username: calls.append((job_id, username)))
+    return calls
+
+
+@pytest.mark.parametrize("token", [None, "wrong"])
+def test_push_without_the_token_is_rejected(enqueued, token):
+    response = push(TestClient(main.app), {"jobId": "7", "username": "alice"}, token)
+    assert response.status_code == 403
+    assert enqueued == []
+
+
+def test_job_is_enqueued_for_its_owner(enqueued):
+    response = push(TestClient(main.app), {"jobId": "7", "username": "mallory"}, "secret")
+    assert response.json() == {"status": "ok", "job": 7}
+    assert enqueued == [(7, "alice")]
+
+
+def test_unknown_or_settled_job_is_ignored(enqueued):
+    response = push(TestClient(main.app), {"jobId": "8"}, "secret")
+    assert response.json() == {"status": "ignored", "job": 8}
+    assert enqueued == []
@@ -0,0 +1,54 @@
+# Reconciliation as validation jobs run it: key inference and the in-process comparison.
+
+import pytest
+
+import jobs
+from reconcile import default_key_columns
+
+
+@pytest.mark.parametrize("source, target, expected", [
+    (["name", "customer_id", "id"], ["id", "customer_id"], ["customer_id"]),
+    (["name", "ID"], ["ID", "name"], ["ID"]),
+    (["name", "amount"], ["amount", "name"], ["name"]),
+    (["a"], ["b"], []),
+])
+def test_default_key_columns(source, target, expected):
+    assert default_key_columns(source, target) == expected
+
+
+@pytest.fixture
+def local_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "_worker_local_root", str(tmp_path))
+    monkeypatch.setattr(jobs, "_worker_columnar_cache", None)
+    monkeypatch.setattr(jobs, "RECONCILE_PARTITIONS", 4)
+    monkeypatch.setattr(jobs, "RECONCILE_SPILL_DIR", str(tmp_path))
+
+    def write(name, text):
+        (tmp_path / name).write_text(text)
+        return name
+    return write
+
+
+def test_reconcile_pair_runs_inline(local_files, monkeypatch):
+    monkeypatch.setattr(jobs, "RECONCILE_KEY_COLUMNS", [])
+    source = local_files("source.csv", "id,amount\n1,10\n2,20\n3,30\n")
+    target = local_files("target.csv", "id,amount\n1,10\n2,25\n4,40\n")
+    overview = jobs.reconcile_pair(source, target)
+    assert overview["key_columns"] == ["id"]
+    counts = [overview[f"{kind}_rows"] for kind in ("matched", "mismatched", "missing", "extra")]
+    assert counts == [1, 1, 1, 1]
+
+
+def test_reconcile_pair_ignores_configured_key_missing_from_a_file(local_files, monkeypatch):
+    monkeypatch.setattr(jobs, "RECONCILE_KEY_COLUMNS", ["sku"])
+    source = local_files("source.csv", "id,amount\n1,10\n")
+    target = local_files("target.csv", "id,amount\n1,10\n")
+    overview = jobs.reconcile_pair(source, target)
+    assert overview["key_columns"] == ["id"]
+    assert overview["matched_rows"] == 1
+
+
+def test_reconcile_pair_without_shared_columns(local_files):
+    source = local_files("source.csv", "a\n1\n")
+    target = local_files("target.csv", "b\n1\n")
+    assert jobs.reconcile_pair(source, target) is None
@@ -0,0 +1,60 @@
+# A sliced document read is one statement: the page, its total and the first page's
+# summary share a single expansion of the JSONB document.
+
+from report_documents import REPORT_DOCUMENTS, EntryQuery, query_entries
+
+DOC = REPORT_DOCUMENTS["checks"]
+
+
+class ScriptedCursor:
+    def __init__(self, *results):
+        self.results = list(results)
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        self.executed.append((" ".join(sql.split()), params))
+
+    def fetchall(self):
+        return self.results.pop(0)
+
+    def fetchone(self):
+        return self.results.pop(0)[0]
+
+
+def test_first_page_total_and_summary_in_one_statement():
+    cursor = ScriptedCursor([
+        (0, 1, {"field": "a"}, 5, None, None),
+        (0, 2, {"field": "b"}, 5, None, None),
+        (1, 2, None, None, "b", "Passed"),
+        (1, 3, None, None, "a", "Failed"),
+        (1, 3, None, None, None, "Passed"),
+    ])
+    result = query_entries(cursor, DOC, EntryQuery(limit=2, status="Failed"), 9, "alice")
+    [(sql, params)] = cursor.executed
+    assert sql.count("jsonb_array_elements") == 1
+    assert "COUNT(*) OVER ()" in sql and "UNION ALL" in sql
+    assert params == [9, "alice", "Failed", 2, 0]
+    assert result["checks"] == [{"field": "a"}, {"field": "b"}]
+    assert result["total"] == 5
+    assert result["summary"] == [
+        {"field": "a", "status": "Failed", "count": 3},
+        {"field": None, "status": "Passed", "count": 3},
+        {"field": "b", "status": "Passed", "count": 2},
+    ]
+
+
+def test_later_page_skips_the_summary():
+    cursor = ScriptedCursor([(0, 1, {"field": "c"}, 3, None, None)])
+    result = query_entries(cursor, DOC, EntryQuery(offset=2), 9, "alice")
+    [(sql, params)] = cursor.executed
+    assert "UNION ALL" not in sql
+    assert params == [9, "alice", 2]
+    assert "summary" not in result
+    assert (result["checks"], result["total"]) == ([{"field": "c"}], 3)
+
+
+def test_page_past_the_end_counts_separately():
+    cursor = ScriptedCursor([], [(4,)])
+    result = query_entries(cursor, DOC, EntryQuery(offset=10, limit=5), 9, "alice")
+    assert len(cursor.executed) == 2
+    assert (result["checks"], result["total"]) == ([], 4)
@@ -0,0 +1,126 @@
+# /api/reports/{id}/{kind}/export streams a document's entries through a server-side
+# cursor as CSV or Parquet, batch by batch.
+
+import csv
+import io
+
+import pyarrow.parquet as pq
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+ENTRIES = [
+    {"name": "Null Check", "field": f"c{i % 7}", "status": "Failed" if i % 3 else "Passed", "failed_count": i, "details": {"row": i}}
+    for i in range(2500)
+]
+COLUMN_TYPES = [  # what export_columns' SQL reports: key, JSON types seen, all integers
+    ("name", ["string"], True),
+    ("field", ["string"], True),
+    ("status", ["string"], True),
+    ("failed_count", ["number"], True),
+    ("details", ["object"], True),
+]
+
+
+class FakeCursor:
+    def __init__(self, conn, name=None):
+        self.conn = conn
+        self.name = name
+        self.itersize = None
+        self.sql = ""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.sql = sql
+        self.position = 0
+        self.conn.executed.append((self.name, " ".join(sql.split())))
+
+    def fetchone(self):
+        return (1,)  # the report exists and belongs to the user
+
+    def fetchall(self):
+        return COLUMN_TYPES if self.conn.entries else []
+
+    def fetchmany(self, size):
+        assert self.name, "entries must be read through a server-side cursor"
+        self.conn.fetches.append(size)
+        rows = [(entry,) for entry in self.conn.entries[self.position:self.position + size]]
+        self.position += size
+        return rows
+
+
+class FakeConnection:
+    def __init__(self, entries):
+        self.entries = entries
+        self.executed = []
+        self.fetches = []
+        self.closed = False
+
+    def cursor(self, name=None):
+        return FakeCursor(self, name)
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def export(monkeypatch):
+    def run(entries, fmt):
+        conn = FakeConnection(entries)
+        monkeypatch.setattr(main.engine, "raw_connection", lambda: conn)
+        main.app.dependency_overrides[main.get_current_username] = lambda: "alice"
+        main.app.dependency_overrides[main.get_db] = lambda: conn
+        try:
+            response = TestClient(main.app).get(f"/api/reports/9/checks/export?format={fmt}")
+        finally:
+            main.app.dependency_overrides.clear()
+        return response, conn
+    return run
+
+
+def test_csv_export(export):
+    response, conn = export(ENTRIES, "csv")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "text/csv; charset=utf-8"
+    assert response.headers["content-disposition"] == 'attachment; filename="report-9-checks.csv"'
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == ["name", "field", "status", "failed_count", "details"]
+    assert len(rows) == len(ENTRIES) + 1
+    assert rows[2] == ["Null Check", "c1", "Failed", "1", '{"row": 1}']
+    assert conn.fetches == [1000, 1000, 1000, 1000] and conn.closed
+
+
+def test_parquet_export(export):
+    response, conn = export(ENTRIES, "parquet")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/vnd.apache.parquet"
+    parquet = pq.ParquetFile(io.BytesIO(response.content))
+    assert parquet.schema_arrow.names == ["name", "field", "status", "failed_count", "details"]
+    assert parquet.metadata.num_rows == len(ENTRIES)
+    assert parquet.metadata.num_row_groups == 3  # one per batch
+    table = parquet.read()
+    assert table.column("failed_count").to_pylist() == list(range(2500))
+    assert table.column("details")[5].as_py() == '{"row": 5}'
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_empty_report(export, fmt):
+    response, conn = export([], fmt)
+    assert response.status_code == 200
+    header = ["name", "field", "row", "source", "target", "status", "failed_count", "total_count"]
+    if fmt == "csv":
+        assert list(csv.reader(io.StringIO(response.text))) == [header]
+    else:
+        parquet = pq.ParquetFile(io.BytesIO(response.content))
+        assert parquet.schema_arrow.names == header
+        assert parquet.metadata.num_rows == 0
+    assert conn.closed
@@ -0,0 +1,75 @@
+# Keyset pagination of /api/reports across reports that have no time.
+
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+class RecordingConnection:
+    """Answers every query with `rows` and remembers what was executed."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.executed = []
+
+    def cursor(self, *args, **kwargs):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def client():
+    main.app.dependency_overrides[main.get_current_username] = lambda: "alice"
+    yield TestClient(main.app)
+    main.app.dependency_overrides.clear()
+
+
+def list_reports(client, rows, **params):
+    conn = RecordingConnection(rows)
+    main.app.dependency_overrides[main.get_db] = lambda: conn
+    response = client.get("/api/reports", params={"fields": "id,time", "limit": 2, **params})
+    assert response.status_code == 200, response.text
+    return response.json(), conn.executed[-1]
+
+
+def test_page_ending_on_a_report_without_time(client):
+    body, _ = list_reports(client, [(3, datetime(2026, 1, 2)), (2, None), (1, None)])
+    assert body["reports"] == [{"id": 3, "time": "2026-01-02 00:00:00"}, {"id": 2, "time": None}]
+    assert main.decode_cursor(body["next_cursor"]) == [None, 2]
+
+    _, (sql, params) = list_reports(client, [(1, None)], cursor=body["next_cursor"])
+    assert "time IS NULL AND id < %s" in sql
+    assert params[-2:] == (2, 3)
+
+
+def test_timed_cursor_continues_into_reports_without_time(client):
+    body, _ = list_reports(client, [(5, datetime(2026, 1, 3)), (4, datetime(2026, 1, 2)), (3, None)])
+    assert main.decode_cursor(body["next_cursor"]) == ["2026-01-02T00:00:00", 4]
+
+    _, (sql, params) = list_reports(client, [(3, None)], cursor=body["next_cursor"])
+    assert "((time, id) < (%s, %s) OR time IS NULL)" in sql
+    assert "ORDER BY time DESC NULLS LAST, id DESC" in sql
+    assert params[-3:] == (datetime(2026, 1, 2), 4, 3)
+
+
+def test_malformed_cursor_is_rejected(client):
+    main.app.dependency_overrides[main.get_db] = lambda: RecordingConnection([])
+    cursor = main.encode_cursor("not a time", 1)
+    assert client.get("/api/reports", params={"cursor": cursor}).status_code == 400
@@ -0,0 +1,184 @@
+# Users' stored rulesets reach the checks engine through their jobs, and results are
+# reused only under the ruleset they were checked with.
+
+import asyncio
+from concurrent.futures import Future
+
+import pytest
+from fastapi.testclient import TestClient
+
+import checks_engine
+import jobs
+import main
+import rulesets
+from versions import RULESET_VERSION
+
+RULESET = {"rules": [
+    {"check": "type", "field": "amount", "type": "number"},
+    {"check": "range", "field": "age", "min": 0, "max": 120},
+    {"check": "format", "field": "email", "pattern": r"^[^@\s]+@[^@\s]+$"},
+    {"check": "date_format", "field": "signup", "format": "%Y-%m-%d"},
+    {"check": "unique", "field": "id"},
+]}
+
+
+def test_validator_knows_every_check_and_type():
+    assert set(rulesets.REQUIRED_PARAMS) == set(checks_engine.CHECK_NAMES)
+    assert set(rulesets.TYPES) == set(checks_engine.TYPE_PATTERNS)
+
+
+@pytest.mark.parametrize("ruleset, error", [
+    ({"rules": []}, "1 to"),
+    ({"rules": [{"check": "spelling", "field": "a"}]}, "unknown check"),
+    ({"rules": [{"check": "not_null"}]}, "'field'"),
+    ({"rules": [{"check": "type", "field": "a", "type": "date"}]}, "type must be"),
+    ({"rules": [{"check": "format", "field": "a", "pattern": "("}]}, "invalid pattern"),
+    ({"rules": [{"check": "range", "field": "a", "min": "0"}]}, "min must be a number"),
+    ({"rules": [{"check": "completeness", "field": "a", "min_ratio": 2}]}, "min_ratio"),
+])
+def test_invalid_rulesets_are_rejected(ruleset, error):
+    with pytest.raises(ValueError, match=error):
+        rulesets.validate_ruleset(ruleset)
+
+
+def test_ruleset_key():
+    assert rulesets.ruleset_key(None) == RULESET_VERSION
+    key = rulesets.ruleset_key(RULESET)
+    assert 0 < key < 2 ** 63
+    reordered = {"rules": [{k: rule[k] for k in reversed(list(rule))} for rule in RULESET["rules"]]}
+    assert rulesets.ruleset_key(reordered) == key
+    assert rulesets.ruleset_key({"rules": RULESET["rules"][:1]}) != key
+
+
+def test_stored_rules_run_in_the_job(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "_worker_local_root", str(tmp_path))
+    monkeypatch.setattr(jobs, "_worker_columnar_cache", None)
+    monkeypatch.setattr(jobs, "RECONCILE_ENABLED", False)
+    (tmp_path / "source.csv").write_text(
+        "id,amount,age,email,signup\n"
+        "1,10.5,30,a@example.com,2024-01-02\n"
+        "2,ten,200,not-an-email,02/01/2024\n"
+        "2,3,40,c@example.com,2024-01-03\n"
+    )
+    (tmp_path / "target.csv").write_text("id\n1\n")
+    result, _, _ = jobs.run_validation("source.csv", "target.csv", RULESET)
+    failed = {(e["name"], e["field"]) for e in result.entries if e["status"] == "Failed"}
+    assert failed == {
+        ("Data Type Consistency", "amount"),
+        ("Range Validation", "age"),
+        ("Format Validation", "email"),
+        ("Date Format", "signup"),
+        ("Uniqueness Constraint", "id"),
+    }
+
+
+def test_job_is_checked_with_its_ruleset(monkeypatch):
+    job = {"id": 7, "history_id": 3, "username": "alice", "source_blob": "s", "target_blob": "t", "attempts": 1, "ruleset": RULESET}
+    checked_with = []
+    result = checks_engine.CheckResult(entries=[], rows=1, failed_checks=0, seconds=0.1)
+
+    def with_conn(fn, *args):
+        if fn is jobs._claim_job:
+            return job
+        if fn is jobs._complete_job:
+            return 42
+
+    class Pool:
+        def submit(self, fn, *args):
+            checked_with.append(args[2])
+            future = Future()
+            future.set_result((result, {"time": 0}, None))
+            return future
+
+    runner = jobs.JobRunner(engine=None)
+    runner._pool = Pool()
+    monkeypatch.setattr(runner, "_with_conn", with_conn)
+    asyncio.run(runner._execute(7, "alice"))
+    assert checked_with == [RULESET]
+
+
+def test_complete_job_records_the_result_under_the_ruleset_key(monkeypatch):
+    recorded = []
+    monkeypatch.setattr(jobs.content_store, "record_result", lambda cursor, history_id, report_id, passed, key: recorded.append(key))
+
+    class Connection:
+        answers = [(7,), (42,), (True,)]
+
+        def cursor(self):
+            return self
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def execute(self, sql, params=None):
+            pass
+
+        def fetchone(self):
+            return self.answers.pop(0)
+
+        def commit(self):
+            pass
+
+    job = {"id": 7, "history_id": 3, "username": "alice", "source_blob": "s", "target_blob": "t", "attempts": 1, "ruleset": RULESET}
+    result = checks_engine.CheckResult(entries=[], rows=1, failed_checks=0, seconds=0.1)
+    assert jobs._complete_job(Connection(), job, result, {"time": 0}, None) == 42
+    assert recorded == [rulesets.ruleset_key(RULESET)]
+
+
+class RulesetConnection:
+    def __init__(self):
+        self.executed = []
+        self.committed = False
+
+    def cursor(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.executed.append((" ".join(sql.split()), params))
+
+    def fetchone(self):
+        return None
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        pass
+
+
+@pytest.fixture
+def api():
+    conn = RulesetConnection()
+    main.app.dependency_overrides[main.get_current_username] = lambda: "alice"
+    main.app.dependency_overrides[main.get_db] = lambda: conn
+    yield TestClient(main.app), conn
+    main.app.dependency_overrides.clear()
+
+
+def test_put_ruleset(api):
+    client, conn = api
+    response = client.put("/api/ruleset", json=RULESET)
+    assert response.status_code == 200
+    assert conn.committed
+    assert conn.executed[0][0].startswith("INSERT INTO user_rulesets")
+
+
+def test_put_invalid_ruleset(api):
+    client, conn = api
+    response = client.put("/api/ruleset", json={"rules": [{"check": "type", "field": "a", "type": "date"}]})
+    assert response.status_code == 400
+    assert conn.executed == []
+
+
+def test_get_default_ruleset(api):
+    client, _ = api
+    assert client.get("/api/ruleset").json() == {"ruleset": None, "default": True}
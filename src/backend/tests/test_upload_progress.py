@@ -0,0 +1,32 @@
+# Transfers recorded through one SQLite store are listed through any other on the same
+# file, as they are by the container's uvicorn workers.
+
+import time
+
+import pytest
+
+from upload_progress import create_progress_store
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_transfers_are_listed_per_user_until_finished(backend, tmp_path):
+    store = create_progress_store(backend, path=str(tmp_path / "progress.sqlite3"))
+    store.start("t1", "alice", "alice/objects/sha256/d", 10)
+    store.start("t2", "alice", "alice/objects/sha256/d", 10)
+    store.start("t3", "bob", "bob/objects/sha256/e", None)
+    store.update("t2", 6)
+    store.finish("t1")
+    assert store.transfers("alice") == [{"transfer_id": "t2", "blob": "alice/objects/sha256/d", "bytes_uploaded": 6, "total_bytes": 10}]
+    assert [t["transfer_id"] for t in store.transfers("bob")] == ["t3"]
+
+
+def test_sqlite_progress_is_shared_and_stale_transfers_are_hidden(tmp_path, monkeypatch):
+    path = str(tmp_path / "progress.sqlite3")
+    writer = create_progress_store("sqlite", stale_after=60, path=path)
+    reader = create_progress_store("sqlite", stale_after=60, path=path)
+    writer.start("t1", "alice", "alice/objects/sha256/d", 10)
+    writer.update("t1", 4)
+    assert reader.transfers("alice")[0]["bytes_uploaded"] == 4
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert reader.transfers("alice") == []
@@ -0,0 +1,112 @@
+# Uploads transfer each distinct content once, even when a batch repeats a file or a pair
+# uses the same file on both sides, and progress is tracked per transfer.
+
+import io
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+from google.api_core.exceptions import PreconditionFailed
+
+import main
+
+
+class FakeBucket:
+    """Stores uploads in memory; writes with if_generation_match=0 fail if the blob exists."""
+
+    def __init__(self):
+        self.objects = {}
+        self.transfers = []
+        self.lock = threading.Lock()
+
+    def blob(self, name, **kwargs):
+        return FakeBlob(self, name)
+
+
+class FakeBlob:
+    def __init__(self, bucket, name):
+        self.bucket = bucket
+        self.name = name
+
+    def exists(self):
+        return self.name in self.bucket.objects
+
+    def upload_from_file(self, reader, size=None, content_type=None, rewind=False, if_generation_match=None):
+        data = reader.read()
+        with self.bucket.lock:
+            if if_generation_match == 0 and self.name in self.bucket.objects:
+                raise PreconditionFailed("exists")
+            self.bucket.objects[self.name] = data
+            self.bucket.transfers.append(self.name)
+
+
+@pytest.fixture
+def bucket(monkeypatch):
+    bucket = FakeBucket()
+    monkeypatch.setattr(main.gcs, "load", lambda: main.gcs)
+    monkeypatch.setattr(main.gcs, "bucket", bucket)
+    monkeypatch.setattr(main.job_runner, "enqueue", lambda job_id, username: None)
+    main.app.dependency_overrides[main.get_username_briefly] = lambda: "alice"
+    yield bucket
+    main.app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    calls = []
+
+    def with_connection(fn, username, pairs):
+        calls.append(pairs)
+        return [{"history_id": i, "job_id": i, "report_id": None} for i, _ in enumerate(pairs)]
+
+    monkeypatch.setattr(main, "with_connection", with_connection)
+    return calls
+
+
+def part(name, data):
+    return (name, io.BytesIO(data), "text/csv")
+
+
+def test_batch_transfers_each_distinct_file_once(bucket, recorded):
+    files = [
+        ("source_files", part("a.csv", b"a\n1\n")),
+        ("source_files", part("a-copy.csv", b"a\n1\n")),
+        ("source_files", part("same.csv", b"s\n1\n")),
+        ("target_files", part("b.csv", b"b\n1\n")),
+        ("target_files", part("b.csv", b"b\n1\n")),
+        ("target_files", part("same.csv", b"s\n1\n")),
+    ]
+    response = TestClient(main.app).post("/api/upload-batch", files=files)
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["recorded"] == 3 and body["failed"] == 0
+    assert sorted(bucket.transfers) == sorted(set(bucket.transfers))
+    assert len(bucket.transfers) == 3
+    uploaded = [(r["uploaded"]["source"], r["uploaded"]["target"]) for r in body["results"]]
+    assert uploaded == [(True, True), (False, False), (True, False)]
+    [pairs] = recorded
+    assert pairs[2][0]["blob"] == pairs[2][1]["blob"]
+    assert main.upload_progress.transfers("alice") == []
+
+
+def test_pair_of_identical_files(bucket, recorded, monkeypatch):
+    monkeypatch.setattr(main, "with_connection", lambda fn, username, source, target: {"history_id": 1, "job_id": 1, "report_id": None})
+    response = TestClient(main.app).post("/api/upload-files", files={
+        "source_file": part("same.csv", b"s\n1\n"),
+        "target_file": part("same.csv", b"s\n1\n"),
+    })
+    assert response.status_code == 200, response.text
+    assert response.json()["uploaded"] == {"source": True, "target": False}
+    assert len(bucket.transfers) == 1
+
+
+def test_progress_is_keyed_per_transfer(bucket):
+    readers = [main.UploadStreamReader(io.BytesIO(b"x" * 10), "alice/objects/sha256/d", "alice", 10, 100) for _ in range(2)]
+    assert len(main.upload_progress.transfers("alice")) == 2
+    readers[0].read(4)
+    readers[0].close()
+    readers[1].read(6)
+    [entry] = main.upload_progress.transfers("alice")
+    assert entry["bytes_uploaded"] == 6
+    readers[1].close()
+    assert main.upload_progress.transfers("alice") == []
@@ -0,0 +1,137 @@
+# upload_progress.py
+#
+# Progress of in-flight GCS transfers for GET /api/upload-progress, keyed by a per-transfer
+# id (blob names are content hashes, so two transfers can target the same blob). A transfer
+# is recorded when its stream is opened, updated as chunks are read and removed on close.
+#
+# Backends (UPLOAD_PROGRESS_STORE):
+# - "memory": this process only; enough for a single uvicorn worker.
+# - "sqlite": a file shared by the worker processes of one container (the default), so the
+#             progress request can land on another worker than the upload. Rows left by a
+#             worker that died mid-transfer stop being updated and are hidden, then
+#             dropped, after `stale_after` seconds.
+
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Optional
+
+UPLOAD_PROGRESS_BACKENDS = ("memory", "sqlite")
+
+
+class MemoryProgressStore:
+    """Thread-safe dict of transfer id -> progress entry."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def start(self, transfer_id: str, username: str, blob_name: str, total_bytes: Optional[int]):
+        with self._lock:
+            self._entries[transfer_id] = {
+                "username": username,
+                "transfer_id": transfer_id,
+                "blob": blob_name,
+                "bytes_uploaded": 0,
+                "total_bytes": total_bytes,
+            }
+
+    def update(self, transfer_id: str, bytes_uploaded: int):
+        with self._lock:
+            entry = self._entries.get(transfer_id)
+            if entry is not None:
+                entry["bytes_uploaded"] = bytes_uploaded
+
+    def finish(self, transfer_id: str):
+        with self._lock:
+            self._entries.pop(transfer_id, None)
+
+    def transfers(self, username: str) -> list:
+        """The user's transfers in the order they started, without the username."""
+        with self._lock:
+            return [
+                {k: v for k, v in entry.items() if k != "username"}
+                for entry in self._entries.values() if entry["username"] == username
+            ]
+
+
+class SQLiteProgressStore:
+    """Progress shared by the processes on one host through a SQLite file in WAL mode."""
+
+    def __init__(self, path: str, stale_after: float):
+        self.path = path
+        self.stale_after = stale_after
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS upload_progress (
+                    transfer_id TEXT PRIMARY KEY,
+                    username TEXT NOT NULL,
+                    blob TEXT NOT NULL,
+                    bytes_uploaded INTEGER NOT NULL,
+                    total_bytes INTEGER,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS upload_progress_username_idx ON upload_progress (username)")
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5, isolation_level=None)
+
+    def _execute(self, sql: str, params: tuple):
+        conn = self._connect()
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def start(self, transfer_id: str, username: str, blob_name: str, total_bytes: Optional[int]):
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("""
+                INSERT OR REPLACE INTO upload_progress (transfer_id, username, blob, bytes_uploaded, total_bytes, updated_at)
+                VALUES (?, ?, ?, 0, ?, ?)
+            """, (transfer_id, username, blob_name, total_bytes, now))
+            conn.execute("DELETE FROM upload_progress WHERE updated_at <= ?", (now - self.stale_after,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def update(self, transfer_id: str, bytes_uploaded: int):
+        self._execute(
+            "UPDATE upload_progress SET bytes_uploaded = ?, updated_at = ? WHERE transfer_id = ?",
+            (bytes_uploaded, time.time(), transfer_id),
+        )
+
+    def finish(self, transfer_id: str):
+        self._execute("DELETE FROM upload_progress WHERE transfer_id = ?", (transfer_id,))
+
+    def transfers(self, username: str) -> list:
+        """The user's transfers in the order they started, without the username."""
+        rows = self._execute("""
+            SELECT transfer_id, blob, bytes_uploaded, total_bytes FROM upload_progress
+            WHERE username = ? AND updated_at > ?
+            ORDER BY rowid
+        """, (username, time.time() - self.stale_after))
+        return [
+            {"transfer_id": transfer_id, "blob": blob, "bytes_uploaded": bytes_uploaded, "total_bytes": total_bytes}
+            for transfer_id, blob, bytes_uploaded, total_bytes in rows
+        ]
+
+
+def create_progress_store(backend: str, stale_after: float = 3600, path: str | None = None):
+    if backend == "memory":
+        return MemoryProgressStore()
+    if backend == "sqlite":
+        return SQLiteProgressStore(path or os.path.join(tempfile.gettempdir(), "upload_progress.sqlite3"), stale_after)
+    raise ValueError(f"Unknown upload progress store '{backend}', expected one of {', '.join(UPLOAD_PROGRESS_BACKENDS)}")
@@ -0,0 +1,11 @@
+# versions.py
+#
+# Constants shared by the API and the job workers. This module has no dependencies so
+# main.py can import it at startup without pulling in NumPy / pyarrow with the checks
+# engine or the columnar cache.
+
+# Bump whenever check semantics change so cached results are not reused across versions.
+RULESET_VERSION = 2
+
+# Columnar copies of uploads are stored next to the original as `{blob}{COLUMNAR_SUFFIX}`.
+COLUMNAR_SUFFIX = ".arrow"